@@ -2,21 +2,50 @@ from typing import List, Dict, Any, Optional
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from interaction.chat_environment import ChatEnvironment
-from tools.rag_utils import RAG, store_information, get_knowledge
-from tools.web_search import WebSearch
+    from tools.web_search import WebSearch
+from tools.rag_utils import RAG
 from tools.file_operations import FileOperations
 from concurrency.llm_core import llm_core
+from concurrency.tracing import traced
 import asyncio
-from tools.context_manager import context_manager
+import functools
+import itertools
 import logging
 
 logger = logging.getLogger(__name__)
 logging.getLogger("openai").disabled = True
 logging.getLogger("httpx").disabled = True
 
+def _string_params(**properties: str) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {name: {"type": "string", "description": description} for name, description in properties.items()},
+        "required": list(properties),
+    }
+
+AGENT_TOOLS = [
+    {"type": "function", "function": {"name": "get_knowledge", "description": "Retrieve relevant information from the knowledge base",
+                                      "parameters": _string_params(query="What to look up")}},
+    {"type": "function", "function": {"name": "web_search_and_learn", "description": "Perform a web search and learn from the results",
+                                      "parameters": _string_params(query="Search query")}},
+    {"type": "function", "function": {"name": "read_file", "description": "Read the content of a file",
+                                      "parameters": _string_params(filename="File to read")}},
+    {"type": "function", "function": {"name": "write_file", "description": "Write content to a file",
+                                      "parameters": _string_params(filename="File to write", content="Full file content")}},
+    {"type": "function", "function": {"name": "append_file", "description": "Append content to an existing file",
+                                      "parameters": _string_params(filename="File to append to", content="Content to append")}},
+    {"type": "function", "function": {"name": "store_information", "description": "Store important information in the knowledge base",
+                                      "parameters": _string_params(info="Information to store")}},
+]
+
+# Agent names are only unique within a swarm
+_assistant_keys = itertools.count(1)
+
 class Agent:
     def __init__(self, name: str, role: str, specialties: List[str]):
         self.name = name
+        # Registers this agent's assistant with llm_core, which is shared by every swarm in the process
+        self.assistant_key = f"{name}#{next(_assistant_keys)}"
         self.role = role
         self.specialties = specialties
         self.assistant_id: Optional[str] = None
@@ -24,10 +53,17 @@ class Agent:
         self.rag: Optional[RAG] = None
         self.chat_env: Optional['ChatEnvironment'] = None
         self.current_task: Optional[Dict[str, Any]] = None
-        self.file_ops = FileOperations()
-        self.web_search = WebSearch()
         self.completed_tasks: List[Dict[str, Any]] = []
         self.activated = False
+        self.task_description: Optional[str] = None
+
+    @property
+    def file_ops(self) -> FileOperations:
+        return shared_file_ops()
+
+    @property
+    def web_search(self) -> 'WebSearch':
+        return shared_web_search()
 
     async def initialize_with_context(self, task_description: str, project_overview: str):
         instructions = f"""You are {self.name}, a {self.role} with expertise in {', '.join(self.specialties)}.
@@ -44,30 +80,37 @@ You have access to the following tools:
 
 Use these tools to complete your tasks efficiently. Always consider the project overview and your specific role when making decisions."""
 
-        self.assistant_id = await llm_core.create_assistant(
-            self.name,
-            instructions,
-            [
-                {"type": "function", "function": {"name": "get_knowledge", "description": "Retrieve relevant information from the knowledge base"}},
-                {"type": "function", "function": {"name": "web_search_and_learn", "description": "Perform a web search and learn from the results"}},
-                {"type": "function", "function": {"name": "read_file", "description": "Read the content of a file"}},
-                {"type": "function", "function": {"name": "write_file", "description": "Write content to a file"}},
-                {"type": "function", "function": {"name": "append_file", "description": "Append content to an existing file"}},
-                {"type": "function", "function": {"name": "store_information", "description": "Store important information in the knowledge base"}},
-            ]
+        assistant_id, thread_id = await asyncio.gather(
+            llm_core.create_assistant(self.name, instructions, AGENT_TOOLS, self.assistant_key),
+            llm_core.create_thread()
         )
-        self.thread_id = await llm_core.create_thread()
+        self.assistant_id = assistant_id
+        self.thread_id = thread_id
+        self.task_description = task_description
         logger.info(f"Initialized agent: {self.name} ({self.role})")
 
+    async def reattach(self, assistant_id: str, thread_id: str, instructions: str, task_description: Optional[str] = None):
+        # Resume from a checkpoint without creating a new assistant or thread
+        self.assistant_id = await llm_core.attach_assistant(self.name, assistant_id, instructions, AGENT_TOOLS, self.assistant_key)
+        self.thread_id = thread_id
+        self.task_description = task_description
+        logger.info(f"Reattached agent: {self.name} ({self.role})")
+
+    async def assign_task(self, task: Dict[str, Any]):
+        self.current_task = task
+        logger.info(f"{self.name} assigned task: {task['description']}")
+
+    @traced()
     async def execute_task(self, task: Dict[str, Any]) -> str:
         prompt = f"Execute the following task: {task['description']}\n\nProvide a detailed plan and then execute it step by step. Use the available tools when necessary."
-        response = await llm_core.generate_response(self.name, prompt, self.thread_id)
+        response = await llm_core.generate_response(self.assistant_key, prompt, self.thread_id)
         logger.info(f"{self.name} executed task: {task['description']}")
         self.completed_tasks.append(task)
         return response
 
+    @traced()
     async def ask_question(self, question: str) -> str:
-        response = await llm_core.generate_response(self.name, question, self.thread_id)
+        response = await llm_core.generate_response(self.assistant_key, question, self.thread_id)
         logger.info(f"{self.name} asked question: {question}")
         return response
 
@@ -95,10 +138,37 @@ Use these tools to complete your tasks efficiently. Always consider the project
         self.activated = True
         logger.info(f"{self.name} has been activated.")
 
-# Register tool functions
-llm_core.register_tool_function("get_knowledge", get_knowledge)
-llm_core.register_tool_function("web_search_and_learn", WebSearch().search)
-llm_core.register_tool_function("read_file", FileOperations().read_file)
-llm_core.register_tool_function("write_file", FileOperations().write_file)
-llm_core.register_tool_function("store_information", store_information)
-llm_core.register_tool_function("append_file", FileOperations().append_file)
\ No newline at end of file
+# Tool backends are built on first call: web search pulls in an HTTP client and
+# HTML parser, and FileOperations creates its directory
+@functools.lru_cache(maxsize=None)
+def shared_file_ops() -> FileOperations:
+    return FileOperations()
+
+@functools.lru_cache(maxsize=None)
+def shared_web_search() -> 'WebSearch':
+    from tools.web_search import WebSearch
+    return WebSearch()
+
+async def close_shared_tools():
+    if shared_web_search.cache_info().currsize:
+        search = shared_web_search()
+        logger.info(f"Web search stats: {search.stats()}")
+        await search.aclose()
+
+async def web_search_and_learn(query: str, max_results: int = 10) -> List[Dict[str, str]]:
+    return await shared_web_search().search(query, max_results)
+
+def read_file(filename: str) -> str:
+    return shared_file_ops().read_file(filename)
+
+def write_file(filename: str, content: str):
+    shared_file_ops().write_file(filename, content)
+
+def append_file(filename: str, content: str):
+    shared_file_ops().append_file(filename, content)
+
+# Register tool functions (get_knowledge and store_information are bound to a RAG by the Swarm)
+llm_core.register_tool_function("web_search_and_learn", web_search_and_learn, timeout=120)
+llm_core.register_tool_function("read_file", read_file)
+llm_core.register_tool_function("write_file", write_file)
+llm_core.register_tool_function("append_file", append_file)
\ No newline at end of file
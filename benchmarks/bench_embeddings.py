@@ -0,0 +1,106 @@
+"""Ingest and query throughput of the RAG embedding backends.
+
+The OpenAI backend is only measured when OPENAI_API_KEY is set.
+
+Usage: python -m benchmarks.bench_embeddings --docs 2000 --queries 200 --vector-stores numpy
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from tools.embeddings import create_embeddings
+
+WORDS = ("agent swarm task planner python module database cache query vector index thread "
+         "assistant deploy review test schema api client server latency token budget memory "
+         "report design file search knowledge context summary role priority dependency").split()
+
+def make_corpus(count: int, words_per_doc: int, rng: random.Random) -> List[str]:
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_doc)) + f" doc{i}" for i in range(count)]
+
+async def bench_backend(name: str, docs: List[str], queries: List[str], batch_size: int,
+                        vector_store: str = "chroma") -> Dict[str, Any]:
+    from tools.rag_utils import RAG
+
+    embeddings = create_embeddings(name)
+    start = time.perf_counter()
+    for i in range(0, len(docs), batch_size):
+        embeddings.embed_documents(docs[i:i + batch_size])
+    encode_elapsed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            rag = RAG(embeddings=embeddings, vector_store=vector_store)
+            start = time.perf_counter()
+            for i in range(0, len(docs), batch_size):
+                await rag.upload_data(docs[i:i + batch_size])
+            ingest_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for query in queries:
+                await rag.vectorstore.asimilarity_search(query)
+            query_elapsed = time.perf_counter() - start
+
+            start = time.perf_counter()
+            RAG(embeddings=embeddings, vector_store=vector_store)
+            reopen_elapsed = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "backend": name,
+        "vector_store": vector_store,
+        "encode_docs_per_s": len(docs) / encode_elapsed if encode_elapsed else 0.0,
+        "ingest_docs_per_s": len(docs) / ingest_elapsed if ingest_elapsed else 0.0,
+        "queries_per_s": len(queries) / query_elapsed if query_elapsed else 0.0,
+        "mean_query_ms": query_elapsed / len(queries) * 1000 if queries else 0.0,
+        "reopen_ms": reopen_elapsed * 1000,
+    }
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"{'backend':<10}{'store':<8}{'encode docs/s':>16}{'ingest docs/s':>16}{'queries/s':>12}"
+          f"{'mean query ms':>16}{'reopen ms':>12}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['vector_store']:<8}{r['encode_docs_per_s']:>16.1f}{r['ingest_docs_per_s']:>16.1f}"
+              f"{r['queries_per_s']:>12.1f}{r['mean_query_ms']:>16.2f}{r['reopen_ms']:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare RAG embedding backends.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--words", type=int, default=60, help="Words per synthetic document")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backends", default="hashing,openai")
+    parser.add_argument("--vector-stores", default="chroma,numpy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the report to this path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+    rng = random.Random(args.seed)
+    docs = make_corpus(args.docs, args.words, rng)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(6)) for _ in range(args.queries)]
+
+    results = []
+    for name in args.backends.split(","):
+        if name == "openai" and not os.getenv("OPENAI_API_KEY"):
+            print("Skipping openai: OPENAI_API_KEY is not set")
+            continue
+        for vector_store in args.vector_stores.split(","):
+            results.append(asyncio.run(bench_backend(name, docs, queries, args.batch_size, vector_store)))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
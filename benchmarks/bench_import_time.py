@@ -0,0 +1,91 @@
+"""Cold-start import time of the swarm entry points, with a budget that fails the run.
+
+Each target runs in a fresh interpreter several times; the median wall time is
+compared with the budget, and the modules it pulled in are checked against the
+heavy dependencies that must only load on first use. Exits non-zero on a regression.
+
+Usage: python -m benchmarks.bench_import_time --runs 5 --budget 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List
+
+TARGETS = {
+    "scheduler": "import ensemble.scheduler",
+    "task_store": "import ensemble.task_store",
+    "swarmify": "import ensemble.swarmify",
+    "main --help": "sys.argv = ['main.py', '--help']\ntry:\n    runpy.run_path('main.py', run_name='__main__')\nexcept SystemExit:\n    pass",
+}
+
+# Must not be imported until a RAG, an LLM backend or the web search tool is actually used
+DEFERRED_MODULES = ("langchain", "langchain_core", "langchain_openai", "langchain_chroma", "chromadb",
+                    "openai", "httpx", "google.generativeai", "scrapy", "twisted")
+
+PROBE = """import io, json, runpy, sys, contextlib
+with contextlib.redirect_stdout(io.StringIO()):
+{statement}
+print(json.dumps([name for name in {deferred!r} if name in sys.modules]))
+"""
+
+def run_target(statement: str, env: Dict[str, str]) -> Dict[str, Any]:
+    # Wall time of the whole process: interpreter start-up is part of what a user waits for
+    probe = PROBE.format(statement="\n".join("    " + line for line in statement.splitlines()),
+                         deferred=DEFERRED_MODULES)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", probe], env=env, check=True, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "deferred_loaded": json.loads(result.stdout.strip().splitlines()[-1])}
+
+def bench(runs: int, targets: List[str]) -> List[Dict[str, Any]]:
+    env = dict(os.environ)
+    # Startup must not depend on credentials being present
+    env.pop("OPENAI_API_KEY", None)
+    env.pop("GEMINI_API_KEY", None)
+    results = []
+    for name in targets:
+        samples = [run_target(TARGETS[name], env) for _ in range(runs)]
+        times = [sample["elapsed"] for sample in samples]
+        results.append({
+            "target": name,
+            "runs": runs,
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "max_s": max(times),
+            "deferred_loaded": samples[-1]["deferred_loaded"],
+        })
+    return results
+
+def print_report(results: List[Dict[str, Any]], budget: float):
+    print(f"{'target':<14}{'median ms':>12}{'min ms':>10}{'max ms':>10}  status")
+    for r in results:
+        status = "ok"
+        if r["median_s"] > budget:
+            status = f"over budget ({budget * 1000:.0f} ms)"
+        if r["deferred_loaded"]:
+            status = f"eagerly imports {', '.join(r['deferred_loaded'])}"
+        print(f"{r['target']:<14}{r['median_s'] * 1000:>12.1f}{r['min_s'] * 1000:>10.1f}{r['max_s'] * 1000:>10.1f}  {status}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time and fail on regressions.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="Maximum median seconds per target")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--json", help="Write the report to this path")
+    args = parser.parse_args()
+
+    results = bench(args.runs, args.targets.split(","))
+    print_report(results, args.budget)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    failed = [r for r in results if r["median_s"] > args.budget or r["deferred_loaded"]]
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""WebSearch throughput, politeness and caching against a local stand-in search server.
+
+The server renders DuckDuckGo-style result pages after a fixed delay and records
+how many requests it serves at once, so the per-host limit can be checked
+alongside throughput. Each query is searched twice; the second round is served
+from the cache.
+
+Usage: python -m benchmarks.bench_web_search --queries 50 --per-host 4 --delay 0.05
+"""
+import argparse
+import asyncio
+import html
+import json
+import logging
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List
+from urllib.parse import urlsplit, parse_qs
+
+from tools.web_search import WebSearch, parse_duckduckgo
+
+def render_results(query: str, results_per_page: int) -> str:
+    results = "".join(
+        f'<div class="result"><a class="result__a" href="https://example.com/{i}?q={html.escape(query)}">'
+        f'{html.escape(query)} result {i}</a><a class="result__snippet">About {html.escape(query)}, part {i}.</a></div>'
+        for i in range(results_per_page))
+    return f"<html><body>{results}</body></html>"
+
+def serve(delay: float, results_per_page: int, counters, ports: multiprocessing.Queue):
+    requests, active, max_active = counters
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so the client's connection pool is actually exercised; headers and
+        # body are separate writes, which Nagle plus delayed ACKs would stall by ~40ms
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            with requests.get_lock():
+                requests.value += 1
+                active.value += 1
+                max_active.value = max(max_active.value, active.value)
+            try:
+                time.sleep(delay)
+                query = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+                body = render_results(query, results_per_page).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            finally:
+                with requests.get_lock():
+                    active.value -= 1
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    ports.put(httpd.server_port)
+    httpd.serve_forever()
+
+class StandInSearchServer:
+    """Search server in a child process, so it doesn't compete with the client for the GIL."""
+
+    def __init__(self, delay: float, results_per_page: int):
+        self._requests = multiprocessing.Value("i", 0)
+        self._active = multiprocessing.Value("i", 0, lock=False)
+        self._max_active = multiprocessing.Value("i", 0, lock=False)
+        self._ports = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=serve, args=(delay, results_per_page, (self._requests, self._active, self._max_active), self._ports),
+            daemon=True)
+        self.port = None
+
+    @property
+    def url_template(self) -> str:
+        return f"http://127.0.0.1:{self.port}/html/?q={{query}}"
+
+    @property
+    def requests(self) -> int:
+        return self._requests.value
+
+    @property
+    def max_active(self) -> int:
+        return self._max_active.value
+
+    def __enter__(self) -> 'StandInSearchServer':
+        self.process.start()
+        self.port = self._ports.get(timeout=10)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.process.terminate()
+        self.process.join()
+
+async def bench_round(search: WebSearch, queries: List[str]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    results = await search.search_many(queries)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": elapsed,
+        "queries_per_s": len(queries) / elapsed if elapsed else 0.0,
+        "results": sum(len(r) for r in results.values()),
+    }
+
+async def run_bench(queries: int, per_host: int, delay: float, host_interval: float, results_per_page: int) -> Dict[str, Any]:
+    words = [f"topic {i}" for i in range(queries)]
+    report: Dict[str, Any] = {"queries": queries, "per_host": per_host, "delay_s": delay, "host_interval_s": host_interval}
+    with StandInSearchServer(delay, results_per_page) as server:
+        search = WebSearch(url_template=server.url_template, parser=parse_duckduckgo,
+                           per_host_limit=per_host, host_interval=host_interval)
+        try:
+            report["cold"] = await bench_round(search, words)
+            # Differently spelled but equal after normalization, so all cache hits
+            report["cached"] = await bench_round(search, [f"  {w.upper()} " for w in words])
+        finally:
+            await search.aclose()
+        report["server_requests"] = server.requests
+        report["server_max_concurrent"] = server.max_active
+        report["search_stats"] = search.stats()
+    # Lower bound for the cold round if requests are only limited by the per-host cap
+    report["ideal_cold_s"] = queries / per_host * delay
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"Queries: {report['queries']} | per-host limit: {report['per_host']} | server delay: "
+          f"{report['delay_s'] * 1000:.0f} ms | host interval: {report['host_interval_s'] * 1000:.0f} ms")
+    for name in ("cold", "cached"):
+        r = report[name]
+        print(f"{name:<8}{r['elapsed_s'] * 1000:>10.1f} ms{r['queries_per_s']:>12.1f} queries/s{r['results']:>8} results")
+    print(f"Server requests: {report['server_requests']} | max concurrent at server: {report['server_max_concurrent']} "
+          f"| ideal cold round: {report['ideal_cold_s'] * 1000:.1f} ms")
+    print(f"Search stats: {report['search_stats']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WebSearch against a local stand-in search server.")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--per-host", type=int, default=4, help="Concurrent requests allowed per host")
+    parser.add_argument("--delay", type=float, default=0.05, help="Server response time in seconds")
+    parser.add_argument("--host-interval", type=float, default=0.0, help="Minimum spacing between request starts per host")
+    parser.add_argument("--results", type=int, default=10, help="Results per page")
+    parser.add_argument("--json", help="Write the report to this path")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    report = asyncio.run(run_bench(args.queries, args.per_host, args.delay, args.host_interval, args.results))
+    print_report(report)
+    if report["server_max_concurrent"] > args.per_host:
+        print(f"Per-host limit exceeded: {report['server_max_concurrent']} > {args.per_host}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""End-to-end swarm load test on the offline fake LLM backend.
+
+Usage: python -m benchmarks.load_test --swarms 4 --iterations 3 --latency lognormal:-2.5:0.5
+"""
+import os
+os.environ.setdefault("LLM_BACKEND", "fake")
+# The report covers usage; don't leave llm_usage.* behind in the working directory
+os.environ.setdefault("LLM_METRICS_DIR", "")
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import resource
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, Any, List
+
+from concurrency.fake_backend import FakeBackend, LatencyModel
+from concurrency.llm_core import llm_core
+from concurrency.metrics import percentile
+from concurrency.tracing import tracer
+from ensemble.swarmify import initialize_swarm, close_shared_resources
+
+class PhaseTimer:
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    @contextlib.asynccontextmanager
+    async def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        finally:
+            self.durations.setdefault(name, []).append(time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "p50": percentile(values, 50),
+                "p99": percentile(values, 99),
+                "max": max(values),
+            }
+            for name, values in self.durations.items()
+        }
+
+async def run_one_swarm(index: int, iterations: int, timer: PhaseTimer, task_store: str = "memory",
+                        store_dir: str = None) -> Dict[str, int]:
+    task_store_path = os.path.join(store_dir, f"tasks_{index}.db") if store_dir else None
+    async with timer.phase("initialize_swarm"):
+        swarm = await initialize_swarm(f"Load test goal {index}", f"Synthetic project {index}", use_rag=False,
+                                       task_store=task_store, task_store_path=task_store_path)
+
+    completed_iterations = 0
+    for _ in range(iterations):
+        try:
+            async with timer.phase("run_iteration"):
+                await swarm.run_iteration()
+            completed_iterations += 1
+        except Exception:
+            pass
+        if not len(swarm.scheduler):
+            break
+    completed_tasks = swarm.scheduler.counts()["completed"]
+    await swarm.shutdown()
+    return {"iterations": completed_iterations, "completed_tasks": completed_tasks}
+
+async def run_load_test(swarms: int, iterations: int, backend: FakeBackend, quiet: bool = True,
+                        task_store: str = "memory") -> Dict[str, Any]:
+    llm_core.set_backend(backend)
+    llm_core.latency.records.clear()
+    timer = PhaseTimer()
+
+    output = io.StringIO() if quiet else None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext(), \
+            tempfile.TemporaryDirectory(prefix="swarm_tasks_") as store_dir:
+        # One database per swarm; they would otherwise share the default path
+        results = await asyncio.gather(*[run_one_swarm(i, iterations, timer, task_store, store_dir) for i in range(swarms)],
+                                       return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    await close_shared_resources()
+
+    finished = [r for r in results if isinstance(r, dict)]
+    llm_phases: Dict[str, List[float]] = {}
+    llm_errors: Dict[str, int] = {}
+    for call in llm_core.latency.records:
+        name = f"llm:{call.provider}"
+        llm_phases.setdefault(name, []).append(call.total_latency)
+        llm_errors[name] = llm_errors.get(name, 0) + (1 if call.error else 0)
+    phases = timer.summary()
+    for name, values in llm_phases.items():
+        phases[name] = {"count": len(values), "errors": llm_errors[name], "p50": percentile(values, 50),
+                        "p99": percentile(values, 99), "max": max(values)}
+
+    total_iterations = sum(r["iterations"] for r in finished)
+    total_tasks = sum(r["completed_tasks"] for r in finished)
+    return {
+        "swarms": swarms,
+        "task_store": task_store,
+        "failed_swarms": len(results) - len(finished),
+        "iterations_per_swarm": iterations,
+        "elapsed_s": elapsed,
+        "iterations_per_s": total_iterations / elapsed if elapsed else 0.0,
+        "tasks_per_s": total_tasks / elapsed if elapsed else 0.0,
+        "llm_calls": len(llm_core.latency.records),
+        "injected_failures": backend.failures,
+        "phases": phases,
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"Swarms: {report['swarms']} ({report['failed_swarms']} failed), iterations/swarm: {report['iterations_per_swarm']}, "
+          f"task store: {report['task_store']}")
+    print(f"Elapsed: {report['elapsed_s']:.3f}s | iterations/s: {report['iterations_per_s']:.2f} | "
+          f"tasks/s: {report['tasks_per_s']:.2f} | LLM calls: {report['llm_calls']} | "
+          f"injected failures: {report['injected_failures']}")
+    print(f"{'phase':<20}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in report["phases"].items():
+        print(f"{name:<20}{stats['count']:>8}{stats['errors']:>8}{stats['p50'] * 1000:>10.1f}"
+              f"{stats['p99'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}")
+    if "peak_traced_mb" in report:
+        print(f"Peak traced memory: {report['peak_traced_mb']:.1f} MB")
+    print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run N swarms x M iterations against the fake LLM backend.")
+    parser.add_argument("--swarms", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--tasks", type=int, default=6, help="Tasks in each scripted plan")
+    parser.add_argument("--latency", default="uniform:0.05:0.15", help="Run/content latency, e.g. lognormal:-2.5:0.5")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip Python heap tracing (lower overhead)")
+    parser.add_argument("--verbose", action="store_true", help="Show swarm output")
+    parser.add_argument("--json", help="Write the report to this path")
+    parser.add_argument("--task-store", choices=["memory", "sqlite"], default="memory",
+                        help="Keep each swarm's tasks in memory or in its own SQLite database")
+    parser.add_argument("--trace", help="Write a Chrome trace (chrome://tracing, Perfetto) to this path")
+    args = parser.parse_args()
+
+    latency = LatencyModel.parse(args.latency)
+    backend = FakeBackend(seed=args.seed, latency={"run": latency, "content": latency},
+                          failure_rate=args.failure_rate, num_tasks=args.tasks)
+
+    if args.trace:
+        tracer.enable()
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    report = asyncio.run(run_load_test(args.swarms, args.iterations, backend, quiet=not args.verbose,
+                                     task_store=args.task_store))
+    if not args.no_tracemalloc:
+        report["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    report["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print_report(report)
+    if args.trace:
+        tracer.export_chrome(args.trace)
+        print(f"Trace: {len(tracer.spans)} spans written to {args.trace}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
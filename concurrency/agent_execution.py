@@ -25,11 +25,11 @@ class AgentExecutor:
         if collaboration_group[0].chat_env:
             await collaboration_group[0].chat_env.broadcast_message("System", f"Collaborative task: {prompt}")
             for agent in collaboration_group:
-                response = await llm_core.generate_response(agent.name, f"My thoughts on the task: {prompt}", agent.thread_id)
+                response = await llm_core.generate_response(agent.assistant_key, f"My thoughts on the task: {prompt}", agent.thread_id)
                 await agent.send_message(response)
         
         # Combine the responses from the chat history
-        combined_response = "\n".join([msg["message"] for msg in collaboration_group[0].chat_env.chat_history[-len(collaboration_group):]])
+        combined_response = "\n".join([msg.message for msg in collaboration_group[0].chat_env.chat_history.last(len(collaboration_group))])
         
         for agent in collaboration_group:
             agent.code_output = combined_response
@@ -39,7 +39,7 @@ class AgentExecutor:
 
     async def execute_individual_task(self, agent: Agent):
         prompt = f"As a {agent.role} specialist, how would you approach the task: {agent.current_task['description']}?"
-        response = await llm_core.generate_response(agent.name, prompt, agent.thread_id)
+        response = await llm_core.generate_response(agent.assistant_key, prompt, agent.thread_id)
         agent.code_output = response
         
         if agent.chat_env:
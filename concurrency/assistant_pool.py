@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from concurrency.single_flight import SingleFlight
+
+class AssistantPool:
+    """Reference-counted assistants keyed by a hash of model, instructions and tools.
+
+    Released assistants stay idle for reuse until pruned. With a path, the registry
+    is persisted so later runs reattach to the same assistants.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.created = 0
+        self.reused = 0
+        self._creating = SingleFlight()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for key, entry in json.load(f).items():
+                    self.entries[key] = {"id": entry["id"], "refs": 0, "last_used": entry.get("last_used", 0.0)}
+
+    @staticmethod
+    def make_key(model: str, instructions: str, tools: List[Dict[str, Any]]) -> str:
+        return hashlib.sha256(json.dumps([model, instructions, tools], sort_keys=True).encode('utf-8')).hexdigest()
+
+    async def acquire(self, key: str, create: Callable[[], Awaitable[str]]) -> str:
+        entry = self.entries.get(key)
+        if entry is None:
+            # Concurrent requests for the same key share a single create call
+            assistant_id = await self._creating.do(key, lambda: self._create(key, create))
+            entry = self.entries[key]
+        else:
+            assistant_id = entry["id"]
+            self.reused += 1
+        entry["refs"] += 1
+        entry["last_used"] = time.time()
+        return assistant_id
+
+    async def _create(self, key: str, create: Callable[[], Awaitable[str]]) -> str:
+        assistant_id = await create()
+        self.entries[key] = {"id": assistant_id, "refs": 0, "last_used": time.time()}
+        self.created += 1
+        self._save()
+        return assistant_id
+
+    def adopt(self, key: str, assistant_id: str):
+        # Registers an assistant created elsewhere (e.g. recorded in a checkpoint)
+        if key not in self.entries:
+            self.entries[key] = {"id": assistant_id, "refs": 0, "last_used": time.time()}
+            self._save()
+
+    def release(self, key: str):
+        entry = self.entries.get(key)
+        if entry and entry["refs"] > 0:
+            entry["refs"] -= 1
+            entry["last_used"] = time.time()
+            self._save()
+
+    def forget(self, key: str) -> Optional[str]:
+        entry = self.entries.pop(key, None)
+        self._save()
+        return entry["id"] if entry else None
+
+    def idle(self, max_idle: Optional[float] = None) -> List[str]:
+        now = time.time()
+        return [key for key, entry in self.entries.items()
+                if entry["refs"] == 0 and (max_idle is None or now - entry["last_used"] >= max_idle)]
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({key: {"id": e["id"], "last_used": e["last_used"]} for key, e in self.entries.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "assistants": len(self.entries),
+            "in_use": sum(1 for e in self.entries.values() if e["refs"] > 0),
+            "created": self.created,
+            "reused": self.reused,
+        }
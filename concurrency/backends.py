@@ -0,0 +1,56 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from concurrency.metrics import CallRecord
+
+ToolHandler = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, str]]]]
+
+class LLMBackend(ABC):
+    """Transport used by LLMCore. Subclasses talk to a concrete provider."""
+
+    assistant_provider = "unknown"
+    assistant_model = "unknown"
+    content_provider = "unknown"
+    content_model = "unknown"
+    completion_mode = "direct"
+    # Whether created ids outlive the process (and so may be reused by later runs)
+    persistent_ids = False
+
+    @abstractmethod
+    async def create_assistant(self, name: str, instructions: str, tools: List[Dict[str, Any]]) -> str:
+        ...
+
+    @abstractmethod
+    async def delete_assistant(self, assistant_id: str):
+        ...
+
+    @abstractmethod
+    async def create_thread(self) -> str:
+        ...
+
+    @abstractmethod
+    async def run_thread(self, thread_id: str, assistant_id: str, prompt: str, record: CallRecord,
+                         tool_handler: Optional[ToolHandler] = None) -> str:
+        """Post prompt to the thread, run the assistant on it and return the reply.
+
+        tool_handler receives [{"id", "name", "arguments"}] when the run requests tools
+        and returns the matching [{"tool_call_id", "output"}] to submit.
+        """
+
+    @abstractmethod
+    async def generate_content(self, prompt: str, record: CallRecord) -> str:
+        ...
+
+    async def aclose(self):
+        pass
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    name = name or os.getenv("LLM_BACKEND", "openai")
+    # Provider SDKs are imported only for the backend actually built
+    if name == "openai":
+        from concurrency.openai_backend import OpenAIGeminiBackend
+        return OpenAIGeminiBackend()
+    if name == "fake":
+        from concurrency.fake_backend import FakeBackend
+        return FakeBackend.from_env()
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -0,0 +1,190 @@
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from concurrency.backends import LLMBackend, ToolHandler
+from concurrency.metrics import CallRecord
+from concurrency.rate_limit import estimate_tokens
+from concurrency.tracing import traced
+
+DEFAULT_ROLES = ["Developer", "Tester", "Technical Writer"]
+
+class FakeBackendError(Exception):
+    def __init__(self, status_code: int, message: str = "", retry_after: Optional[float] = None):
+        super().__init__(message or f"Fake backend error {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class LatencyModel:
+    DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, distribution: str = "constant", a: float = 0.0, b: float = 0.0):
+        # constant: a | uniform: [a, b] | normal: mean a, stddev b
+        # lognormal: mu a, sigma b | exponential: mean a
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        # "uniform:0.1:0.5" -> LatencyModel("uniform", 0.1, 0.5)
+        parts = spec.split(':')
+        values = [float(p) for p in parts[1:]] + [0.0, 0.0]
+        return cls(parts[0], values[0], values[1])
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "constant":
+            value = self.a
+        elif self.distribution == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.a, self.b)
+        elif self.distribution == "lognormal":
+            value = rng.lognormvariate(self.a, self.b)
+        else:
+            value = rng.expovariate(1 / self.a) if self.a > 0 else 0.0
+        return max(0.0, value)
+
+def build_plan(num_tasks: int = 4, roles: Optional[List[str]] = None, dependency_every: int = 3) -> str:
+    # Mirrors the planner format requested in Swarm.generate_tasks_and_agents
+    roles = roles or DEFAULT_ROLES
+    task_lines = []
+    for i in range(1, num_tasks + 1):
+        role = roles[(i - 1) % len(roles)]
+        dependencies = f"T{i - 1}" if dependency_every and i > 1 and i % dependency_every == 0 else "None"
+        task_lines.append(f"{i}. Fake task {i} for the {role} | {role} | Priority: {(i - 1) % 5 + 1} | ID: T{i} | Dependencies: {dependencies}")
+    agent_lines = [f"{i}. {role.replace(' ', '')}Bot | {role} | fake {role.lower()} work, reviews"
+                   for i, role in enumerate(roles, start=1)]
+    return "Tasks:\n" + "\n".join(task_lines) + "\n\nAgents:\n" + "\n".join(agent_lines)
+
+class FakeBackend(LLMBackend):
+    """Deterministic offline stand-in for the OpenAI/Gemini backend."""
+
+    # Report the providers being replaced so per-provider limits and metrics group the same way
+    assistant_provider = "openai"
+    assistant_model = "fake-assistant"
+    content_provider = "gemini"
+    content_model = "fake-content"
+    completion_mode = "fake"
+
+    def __init__(self, seed: int = 0, latency: Optional[Dict[str, LatencyModel]] = None, ttft_fraction: float = 0.3,
+                 failure_rate: float = 0.0, failure_statuses: Tuple[int, ...] = (429, 500), retry_after: float = 1.0,
+                 failure_ops: Tuple[str, ...] = ("run", "content"), num_tasks: int = 4, roles: Optional[List[str]] = None,
+                 scripts: Optional[List[Tuple[str, Callable[[str], str]]]] = None,
+                 tool_scripts: Optional[List[Tuple[str, List[Tuple[str, Dict[str, Any]]]]]] = None):
+        self.rng = random.Random(seed)
+        self.latency = {
+            "assistant": LatencyModel("constant", 0.01),
+            "thread": LatencyModel("constant", 0.005),
+            "run": LatencyModel("uniform", 0.05, 0.15),
+            "content": LatencyModel("uniform", 0.02, 0.08),
+        }
+        self.latency.update(latency or {})
+        self.ttft_fraction = ttft_fraction
+        self.failure_rate = failure_rate
+        self.failure_statuses = failure_statuses
+        self.retry_after = retry_after
+        self.failure_ops = failure_ops
+        self.roles = roles or DEFAULT_ROLES
+        self.num_tasks = num_tasks
+
+        # Scripts are (regex, responder) pairs checked in order; custom scripts win over the defaults
+        default_scripts = [
+            (r"Tasks:.*Agents:", lambda prompt: build_plan(self.num_tasks, self.roles)),
+            (r"suggest a new specialty", lambda prompt: "cross-team collaboration"),
+            (r"what new role is most needed", lambda prompt: self.roles[0]),
+            (r"JSON list of task objects", lambda prompt: json.dumps(self._json_tasks())),
+        ]
+        self.scripts = [(re.compile(pattern, re.DOTALL), responder) for pattern, responder in (scripts or []) + default_scripts]
+        # (regex, [(tool name, arguments)]): matching prompts request those tool calls before answering
+        self.tool_scripts = [(re.compile(pattern, re.DOTALL), calls) for pattern, calls in (tool_scripts or [])]
+
+        self._ids = itertools.count(1)
+        self.assistants: Dict[str, Dict[str, Any]] = {}
+        self.threads: Dict[str, List[Dict[str, str]]] = {}
+        self.calls: Dict[str, int] = {}
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> 'FakeBackend':
+        latency = {}
+        if os.getenv("FAKE_LLM_LATENCY"):
+            latency["run"] = latency["content"] = LatencyModel.parse(os.getenv("FAKE_LLM_LATENCY"))
+        return cls(
+            seed=int(os.getenv("FAKE_LLM_SEED", 0)),
+            latency=latency,
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", 0.0)),
+            num_tasks=int(os.getenv("FAKE_LLM_TASKS", 4)),
+        )
+
+    def _json_tasks(self) -> List[Dict[str, Any]]:
+        return [{"name": f"Fake task {i}", "role": self.roles[(i - 1) % len(self.roles)], "priority": (i - 1) % 5 + 1,
+                 "id": f"T{i}", "dependencies": []} for i in range(1, self.num_tasks + 1)]
+
+    def respond(self, prompt: str) -> str:
+        for pattern, responder in self.scripts:
+            if pattern.search(prompt):
+                return responder(prompt)
+        return f"[fake] Response to: {prompt[:80]}"
+
+    async def _simulate(self, op: str, record: Optional[CallRecord] = None):
+        self.calls[op] = self.calls.get(op, 0) + 1
+        delay = self.latency[op].sample(self.rng)
+        if op in self.failure_ops and self.failure_rate and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            await asyncio.sleep(delay * self.ttft_fraction)
+            status = self.rng.choice(self.failure_statuses)
+            raise FakeBackendError(status, retry_after=self.retry_after if status == 429 else None)
+        if record is None:
+            await asyncio.sleep(delay)
+            return
+        await asyncio.sleep(delay * self.ttft_fraction)
+        record.mark_first_token()
+        await asyncio.sleep(delay * (1 - self.ttft_fraction))
+
+    async def create_assistant(self, name: str, instructions: str, tools: List[Dict[str, Any]]) -> str:
+        await self._simulate("assistant")
+        assistant_id = f"asst_fake_{next(self._ids)}"
+        self.assistants[assistant_id] = {"name": name, "instructions": instructions, "tools": tools}
+        return assistant_id
+
+    async def delete_assistant(self, assistant_id: str):
+        await self._simulate("assistant")
+        self.assistants.pop(assistant_id, None)
+
+    async def create_thread(self) -> str:
+        await self._simulate("thread")
+        thread_id = f"thread_fake_{next(self._ids)}"
+        self.threads[thread_id] = []
+        return thread_id
+
+    @traced()
+    async def run_thread(self, thread_id: str, assistant_id: str, prompt: str, record: CallRecord,
+                         tool_handler: Optional[ToolHandler] = None) -> str:
+        messages = self.threads.setdefault(thread_id, [])
+        messages.append({"role": "user", "content": prompt})
+        await self._simulate("run", record)
+        response = self.respond(prompt)
+        for pattern, calls in self.tool_scripts:
+            if pattern.search(prompt):
+                tool_calls = [{"id": f"call_fake_{next(self._ids)}", "name": name, "arguments": json.dumps(arguments)}
+                              for name, arguments in calls]
+                record.tool_calls += len(tool_calls)
+                outputs = await tool_handler(tool_calls) if tool_handler else []
+                response += "\n" + "\n".join(f"[{call['name']}] {output['output']}" for call, output in zip(tool_calls, outputs))
+                break
+        messages.append({"role": "assistant", "content": response})
+        record.set_usage(estimate_tokens(prompt), estimate_tokens(response))
+        return response
+
+    @traced()
+    async def generate_content(self, prompt: str, record: CallRecord) -> str:
+        await self._simulate("content", record)
+        response = self.respond(prompt)
+        record.set_usage(estimate_tokens(prompt), estimate_tokens(response))
+        return response
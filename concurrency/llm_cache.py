@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+class ResponseCache:
+    """Content-addressed LLM response cache: bounded in-memory LRU over an optional SQLite tier."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 24 * 3600, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.memory: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+            if ttl:
+                self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - ttl,))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, instructions: str, prompt: str) -> str:
+        return hashlib.sha256(json.dumps([model, instructions, prompt]).encode('utf-8')).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            if not self._expired(entry[0]):
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self.memory[key]
+            self.expirations += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._disk_get, key)
+            if row is not None and not self._expired(row[0]):
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return row[1]
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        created = time.time()
+        self._remember(key, created, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, created, value)
+
+    def _remember(self, key: str, created: float, value: str):
+        self.memory[key] = (created, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            return self._db.execute("SELECT created, value FROM responses WHERE key = ?", (key,)).fetchone()
+
+    def _disk_set(self, key: str, created: float, value: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)", (key, value, created))
+            self._db.commit()
+
+    def clear(self):
+        self.memory.clear()
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,11 +1,18 @@
 import os
-from openai import OpenAI
-from typing import Dict, Any, List, Callable
-import json
-import google.generativeai as genai
+import functools
+from typing import Dict, Any, List, Callable, Optional
 from dotenv import load_dotenv
 import asyncio
 import logging
+from concurrency.backends import LLMBackend, create_backend
+from concurrency.metrics import CallRecord, LatencyRecorder
+from concurrency.usage import UsageTracker
+from concurrency.tracing import tracer, traced
+from concurrency.llm_cache import ResponseCache
+from concurrency.single_flight import SingleFlight
+from concurrency.assistant_pool import AssistantPool
+from concurrency.tool_executor import ToolExecutor
+from concurrency.rate_limit import RateLimiter, DEFAULT_COMPLETION_TOKENS, estimate_tokens, error_status, is_retryable
 
 load_dotenv()  # Load environment variables from .env file
 
@@ -16,87 +23,263 @@ load_dotenv()  # Load environment variables from .env file
 logging.getLogger("openai").disabled = True
 logging.getLogger("httpx").disabled = True
 
+DEFAULT_CACHE_PATH = os.path.join(".llm_cache", "responses.sqlite3")
+DEFAULT_ASSISTANT_POOL_PATH = os.path.join(".llm_cache", "assistants.json")
+DEFAULT_MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
 class LLMCore:
-    def __init__(self):
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
-        
-        if not self.openai_api_key:
-            raise ValueError("OpenAI API key not found in environment variables")
-        if not self.gemini_api_key:
-            raise ValueError("Gemini API key not found in environment variables")
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        # The backend is chosen with LLM_BACKEND ("openai" or "fake") unless one is passed in,
+        # and built on first use so importing this module needs no provider SDK or API key
+        self._backend = backend
+        self.latency = LatencyRecorder()
+        # Tokens and estimated cost per call, grouped by agent/task/phase/iteration on query
+        self.usage = UsageTracker.from_env()
+        # Opt-in response cache for stateless calls; LLM_CACHE=1 enables it from the environment
+        self.cache: Optional[ResponseCache] = None
+        if os.getenv("LLM_CACHE", "").lower() in ("1", "true", "yes"):
+            self.enable_cache(
+                max_entries=int(os.getenv("LLM_CACHE_SIZE", 1024)),
+                ttl=float(os.getenv("LLM_CACHE_TTL", 24 * 3600)),
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+            )
         
-        self.openai_client = OpenAI(api_key=self.openai_api_key)
-        genai.configure(api_key=self.gemini_api_key)
-        self.gemini_model = genai.GenerativeModel('gemini-pro')
+        # Identical stateless requests already in flight share one upstream call
+        self.coalesce_requests = os.getenv("LLM_COALESCE", "1").lower() not in ("0", "false", "no")
+        self.single_flight = SingleFlight()
+        # Token buckets (requests/min, tokens/min) per provider and model behind an AIMD concurrency window
+        self.rate_limiter = RateLimiter.from_env()
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+        self._assistant_pool: Optional[AssistantPool] = None
         
         self.assistants = {}
         self.threads = {}
         self.tool_functions = {}
+        # Per-assistant tools (e.g. bound to one swarm's RAG), consulted before tool_functions
+        self.assistant_tools: Dict[str, Dict[str, Callable]] = {}
+        self.tool_executor = ToolExecutor(self.tool_functions)
+
+    @property
+    def backend(self) -> LLMBackend:
+        if self._backend is None:
+            self._backend = create_backend()
+        return self._backend
+
+    @property
+    def assistant_pool(self) -> AssistantPool:
+        if self._assistant_pool is None:
+            self._assistant_pool = self._create_assistant_pool()
+        return self._assistant_pool
+
+    def set_backend(self, backend: LLMBackend):
+        # Assistant ids belong to the backend that created them
+        self._backend = backend
+        self.assistants.clear()
+        self.threads.clear()
+        self.assistant_tools.clear()
+        self._assistant_pool = None
+
+    def _create_assistant_pool(self) -> AssistantPool:
+        # Only ids that outlive the process are worth remembering across runs
+        path = os.getenv("LLM_ASSISTANT_POOL_PATH", DEFAULT_ASSISTANT_POOL_PATH) if self.backend.persistent_ids else None
+        return AssistantPool(path=path or None)
+
+    def enable_cache(self, max_entries: int = 1024, ttl: Optional[float] = 24 * 3600, path: Optional[str] = DEFAULT_CACHE_PATH):
+        if self.cache:
+            self.cache.close()
+        self.cache = ResponseCache(max_entries=max_entries, ttl=ttl, path=path)
+
+    def disable_cache(self):
+        if self.cache:
+            self.cache.close()
+        self.cache = None
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats() if self.cache else {}
+
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        return self.single_flight.stats()
+
+    async def _stateless_call(self, key: str, use_cache: bool, call: Callable[[], Any]) -> str:
+        if use_cache and self.cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+        if not self.coalesce_requests:
+            return await self._call_and_store(key, use_cache, call)
+        return await self.single_flight.do(key, lambda: self._call_and_store(key, use_cache, call))
+
+    async def _call_and_store(self, key: str, use_cache: bool, call: Callable[[], Any]) -> str:
+        response, record = await call()
+        if use_cache and self.cache and not record.error:
+            await self.cache.set(key, response)
+        return response
+
+    def get_rate_limit_state(self) -> Dict[str, Any]:
+        return self.rate_limiter.state()
+
+    async def _limited(self, provider: str, model: str, make_call: Callable[[], Any], tokens: int = 0,
+                       retry: bool = True, record: Optional[CallRecord] = None):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.rate_limiter.slot(provider, model, tokens) as slot:
+                    if record:
+                        record.queue_wait += slot.wait
+                        record.attempts = attempt
+                    return await make_call()
+            except Exception as e:
+                status, retry_after = error_status(e)
+                if not (retry and is_retryable(status)) or attempt > self.max_retries:
+                    raise
+                # A Retry-After pause is already applied to the provider's buckets
+                delay = 0 if retry_after else min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                logging.warning(f"{provider} call failed with status {status}, retrying ({attempt}/{self.max_retries}): {str(e)}")
+                await asyncio.sleep(delay)
+
+    @traced()
+    async def create_assistant(self, name: str, instructions: str, tools: List[Dict[str, Any]],
+                               key: Optional[str] = None):
+        """Provision an assistant and register it under key (the name by default).
+
+        Names are only unique within a swarm, so agents pass a key of their own;
+        registering a key again replaces that owner's previous assistant.
+        """
+        key = key or name
+        # Identical instructions and tools map to one pooled assistant
+        pool_key = AssistantPool.make_key(self.backend.assistant_model, instructions, tools)
+        assistant_id = await self.assistant_pool.acquire(pool_key, lambda: self._limited(
+            self.backend.assistant_provider, self.backend.assistant_model,
+            lambda: self.backend.create_assistant(name, instructions, tools)))
+        previous = self.assistants.get(key)
+        self.assistants[key] = {"id": assistant_id, "name": name, "instructions": instructions, "tools": tools,
+                                "pool_key": pool_key}
+        if previous:
+            self.assistant_pool.release(previous["pool_key"])
+        return assistant_id
 
-    async def create_assistant(self, name: str, instructions: str, tools: List[Dict[str, Any]]):
-        assistant = self.openai_client.beta.assistants.create(
-            name=name,
-            instructions=instructions,
-            tools=tools,
-            model="gpt-4-1106-preview"
-        )
-        self.assistants[name] = assistant
-        return assistant.id
+    async def attach_assistant(self, name: str, assistant_id: str, instructions: str, tools: List[Dict[str, Any]],
+                               key: Optional[str] = None) -> str:
+        # Binds a key to an existing assistant; the pool only calls the API if it has no entry
+        pool_key = AssistantPool.make_key(self.backend.assistant_model, instructions, tools)
+        self.assistant_pool.adopt(pool_key, assistant_id)
+        return await self.create_assistant(name, instructions, tools, key)
 
     async def create_thread(self):
-        thread = self.openai_client.beta.threads.create()
-        return thread.id
+        return await self._limited(self.backend.assistant_provider, self.backend.assistant_model,
+                                   self.backend.create_thread)
 
-    async def generate_response(self, assistant_name: str, prompt: str, thread_id: str = None) -> str:
+    @traced()
+    async def generate_response(self, assistant_key: str, prompt: str, thread_id: str = None, use_cache: bool = True) -> str:
+        # Only calls on a fresh thread are stateless, so only those are cacheable
         if thread_id is None:
-            thread_id = await self.create_thread()
-        
+            assistant = self.assistants[assistant_key]
+            key = ResponseCache.make_key(self.backend.assistant_model, assistant["instructions"], prompt)
+            return await self._stateless_call(key, use_cache, lambda: self._run_on_new_thread(assistant_key, prompt))
+        response, _ = await self._run(assistant_key, prompt, thread_id)
+        return response
+
+    async def _run_on_new_thread(self, assistant_key: str, prompt: str):
+        thread_id = await self.create_thread()
+        return await self._run(assistant_key, prompt, thread_id)
+
+    async def _run(self, assistant_key: str, prompt: str, thread_id: str):
+        assistant = self.assistants[assistant_key]
+        assistant_name = assistant["name"]
         logging.info(f"Generating response for {assistant_name} with prompt: {prompt[:50]}...")
-        
-        message = self.openai_client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user",
-            content=prompt
-        )
 
-        run = self.openai_client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=self.assistants[assistant_name].id
-        )
+        record = CallRecord(self.backend.assistant_provider, self.backend.assistant_model, assistant_name,
+                            self.backend.completion_mode)
+        # Calls made outside an agent's own task (e.g. swarm maintenance) are charged to the assistant
+        record.agent = record.agent or assistant_name
+        tool_handler = functools.partial(self.tool_executor.execute, functions=self.assistant_tools.get(assistant_key))
+        # Runs append to the thread, so a retry could duplicate the prompt; only throttle them
+        with tracer.span("LLMCore.run", assistant=assistant_name, mode=record.mode):
+            response = await self._record_call(record, self._limited(
+                record.provider, record.model, lambda: self.backend.run_thread(thread_id, assistant["id"], prompt, record, tool_handler),
+                tokens=estimate_tokens(prompt) + DEFAULT_COMPLETION_TOKENS, retry=False, record=record), prompt)
 
-        while True:
-            run_status = self.openai_client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
-            if run_status.status == 'completed':
-                break
-            elif run_status.status == 'failed':
-                logging.error(f"Run failed: {run_status.last_error}")
-                return f"Error: {run_status.last_error}"
-            await asyncio.sleep(1)
-
-        messages = self.openai_client.beta.threads.messages.list(thread_id=thread_id)
-        response = messages.data[0].content[0].text.value
-        logging.info(f"Response generated for {assistant_name}: {response[:50]}...")
-        return response
+        logging.info(f"Response generated for {assistant_name} in {record.total_latency:.2f}s "
+                     f"(ttft {record.time_to_first_token:.2f}s, mode {record.mode}): {response[:50]}...")
+        return response, record
+
+    async def _record_call(self, record: CallRecord, call, prompt: str) -> str:
+        response = ""
+        try:
+            response = await call
+            return response
+        except Exception as e:
+            record.finish(error=str(e))
+            raise
+        finally:
+            if record.finished_at is None:
+                record.finish()
+            if record.prompt_tokens is None:
+                # The provider didn't report usage; fall back to the same estimate the rate limiter uses
+                record.set_usage(estimate_tokens(prompt), estimate_tokens(response) if response else 0)
+                record.tokens_estimated = True
+            self.latency.record(record)
+            self.usage.record(record)
 
-    def register_tool_function(self, function_name: str, function: Callable):
+    def get_latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.latency.summary()
+
+    def get_usage_stats(self, group_by: Optional[str] = None, **where) -> Dict[Any, Dict[str, Any]]:
+        return self.usage.query(group_by, **where)
+
+    def register_tool_function(self, function_name: str, function: Callable, timeout: Optional[float] = None):
         self.tool_functions[function_name] = function
+        if timeout:
+            self.tool_executor.timeouts[function_name] = timeout
+
+    def bind_tools(self, assistant_key: str, functions: Dict[str, Callable]):
+        # Tools whose state belongs to one owner, so runs of other assistants never see them
+        self.assistant_tools[assistant_key] = functions
+
+    def get_tool_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.tool_executor.summary()
+
+    async def delete_assistant(self, assistant_key: str, force: bool = False):
+        # Releases the pooled assistant; it stays available for reuse unless forced
+        # out, and is only deleted upstream once nothing else references it
+        if assistant_key in self.assistants:
+            pool_key = self.assistants.pop(assistant_key)["pool_key"]
+            self.threads.pop(assistant_key, None)
+            self.assistant_tools.pop(assistant_key, None)
+            self.assistant_pool.release(pool_key)
+            if force and pool_key in self.assistant_pool.idle():
+                await self._delete_pooled(pool_key)
 
-    async def delete_assistant(self, assistant_name: str):
-        if assistant_name in self.assistants:
-            self.openai_client.beta.assistants.delete(self.assistants[assistant_name].id)
-            del self.assistants[assistant_name]
-            if assistant_name in self.threads:
-                del self.threads[assistant_name]
+    async def prune_assistants(self, max_idle: Optional[float] = None) -> int:
+        idle = self.assistant_pool.idle(max_idle)
+        await asyncio.gather(*[self._delete_pooled(key) for key in idle])
+        return len(idle)
 
-    async def gemini_generate_content(self, prompt: str) -> str:
-        response = await asyncio.to_thread(self.gemini_model.generate_content, prompt)
-        return response.text
+    async def _delete_pooled(self, key: str):
+        assistant_id = self.assistant_pool.forget(key)
+        if assistant_id:
+            await self._limited(self.backend.assistant_provider, self.backend.assistant_model,
+                                lambda: self.backend.delete_assistant(assistant_id))
 
-    async def get_relevant_context(self, query: str, project_overview: str, context: List[Dict[str, Any]]) -> str:
+    def get_assistant_pool_stats(self) -> Dict[str, int]:
+        return self.assistant_pool.stats()
+
+    async def gemini_generate_content(self, prompt: str, use_cache: bool = True) -> str:
+        key = ResponseCache.make_key(self.backend.content_model, "", prompt)
+        return await self._stateless_call(key, use_cache, lambda: self._generate_content(prompt))
+
+    @traced("LLMCore.generate_content")
+    async def _generate_content(self, prompt: str):
+        record = CallRecord(self.backend.content_provider, self.backend.content_model, "content", "content")
+        response = await self._record_call(record, self._limited(
+            record.provider, record.model, lambda: self.backend.generate_content(prompt, record),
+            tokens=estimate_tokens(prompt) + DEFAULT_COMPLETION_TOKENS, record=record), prompt)
+        return response, record
+
+    async def get_relevant_context(self, query: str, project_overview: str, context: List[Dict[str, Any]], use_cache: bool = True) -> str:
         prompt = f"""Project Overview: {project_overview}
 
 Given the following query: "{query}"
@@ -104,9 +287,9 @@ And this context: {context}
 Provide a concise summary of the most relevant information from the context that relates to the query.
 Include only the most important details and limit the response to 2000 words."""
 
-        return await self.gemini_generate_content(prompt)
+        return await self.gemini_generate_content(prompt, use_cache=use_cache)
 
-    async def summarize_for_new_agent(self, agent_role: str, task_description: str, project_overview: str, context: List[Dict[str, Any]]) -> str:
+    async def summarize_for_new_agent(self, agent_role: str, task_description: str, project_overview: str, context: List[Dict[str, Any]], use_cache: bool = True) -> str:
         prompt = f"""Project Overview: {project_overview}
 
 New Agent Role: {agent_role}
@@ -119,6 +302,19 @@ Provide a concise summary of the most relevant information that this new agent s
 Include key points from the project overview, relevant previous agent interactions, and any crucial information related to the task.
 Limit the response to 2000 words."""
 
-        return await self.gemini_generate_content(prompt)
+        return await self.gemini_generate_content(prompt, use_cache=use_cache)
+
+    async def aclose(self):
+        self.disable_cache()
+        self.tool_executor.shutdown()
+        # Its locks and conditions belong to the closing event loop; a later asyncio.run needs fresh ones
+        self.rate_limiter = RateLimiter.from_env()
+        if self._backend is None:
+            return
+        # Pooled assistants are only worth keeping if a later run can find them again
+        if not self.assistant_pool.path:
+            await self.prune_assistants()
+        backend, self._backend = self._backend, None
+        await backend.aclose()
 
 llm_core = LLMCore()
\ No newline at end of file
@@ -0,0 +1,138 @@
+import time
+import contextlib
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Any, List, Optional
+
+# Who is calling the LLM (agent, task_id, phase, iteration); copied into asyncio tasks automatically
+_call_context: ContextVar[Dict[str, Any]] = ContextVar("llm_call_context", default={})
+
+@contextlib.contextmanager
+def call_scope(**fields):
+    token = _call_context.set({**_call_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+def current_call_context() -> Dict[str, Any]:
+    return _call_context.get()
+
+class CallRecord:
+    def __init__(self, provider: str, model: str, name: str, mode: str):
+        self.provider = provider
+        self.model = model
+        self.name = name
+        self.mode = mode
+        self.started_at = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.polls = 0
+        self.queue_wait = 0.0
+        self.attempts = 0
+        self.tool_calls = 0
+        self.error: Optional[str] = None
+        context = current_call_context()
+        self.agent: Optional[str] = context.get("agent")
+        self.task_id: Optional[str] = context.get("task_id")
+        self.phase: Optional[str] = context.get("phase")
+        self.iteration: Optional[int] = context.get("iteration")
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.tokens_estimated = False
+        self.cost = 0.0
+
+    def set_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def mark_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self, error: Optional[str] = None):
+        self.finished_at = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = self.finished_at
+        if error:
+            self.error = error
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total_latency(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def network_latency(self) -> Optional[float]:
+        # Time spent on the provider, excluding waiting for a rate-limit slot
+        if self.finished_at is None:
+            return None
+        return max(0.0, self.total_latency - self.queue_wait)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "name": self.name,
+            "mode": self.mode,
+            "agent": self.agent,
+            "task_id": self.task_id,
+            "phase": self.phase,
+            "iteration": self.iteration,
+            "time_to_first_token": self.time_to_first_token,
+            "total_latency": self.total_latency,
+            "network_latency": self.network_latency,
+            "polls": self.polls,
+            "queue_wait": self.queue_wait,
+            "attempts": self.attempts,
+            "tool_calls": self.tool_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "cost": self.cost,
+            "error": self.error,
+        }
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+class LatencyRecorder:
+    def __init__(self, max_records: int = 1000):
+        self.records: Deque[CallRecord] = deque(maxlen=max_records)
+
+    def record(self, call: CallRecord):
+        self.records.append(call)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        # Grouped by completion mode so stream and poll runs can be compared side by side
+        by_mode: Dict[str, List[CallRecord]] = {}
+        for call in self.records:
+            by_mode.setdefault(call.mode, []).append(call)
+
+        summary = {}
+        for mode, calls in by_mode.items():
+            ttft = [c.time_to_first_token for c in calls if c.time_to_first_token is not None]
+            total = [c.total_latency for c in calls if c.total_latency is not None]
+            summary[mode] = {
+                "calls": len(calls),
+                "errors": sum(1 for c in calls if c.error),
+                "polls": sum(c.polls for c in calls),
+                "ttft_mean": sum(ttft) / len(ttft) if ttft else None,
+                "ttft_p50": percentile(ttft, 50),
+                "ttft_p95": percentile(ttft, 95),
+                "total_mean": sum(total) / len(total) if total else None,
+                "total_p50": percentile(total, 50),
+                "total_p95": percentile(total, 95),
+            }
+        return summary
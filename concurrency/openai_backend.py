@@ -0,0 +1,232 @@
+import os
+import httpx
+import openai
+from openai import AsyncOpenAI
+from typing import Dict, Any, List, Optional
+import google.generativeai as genai
+import asyncio
+import logging
+from concurrency.backends import LLMBackend, ToolHandler
+from concurrency.metrics import CallRecord
+from concurrency.tracing import traced
+
+logging.getLogger("openai").disabled = True
+logging.getLogger("httpx").disabled = True
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_COMPLETION_MODE = "stream"
+DEFAULT_POLL_FLOOR = 0.1
+DEFAULT_POLL_CEILING = 2.0
+DEFAULT_POLL_MULTIPLIER = 1.5
+ASSISTANT_MODEL = "gpt-4-1106-preview"
+CONTENT_MODEL = "gemini-pro"
+
+RUN_FAILURE_STATUSES = ('failed', 'cancelled', 'expired', 'incomplete')
+
+class OpenAIGeminiBackend(LLMBackend):
+    assistant_provider = "openai"
+    assistant_model = ASSISTANT_MODEL
+    content_provider = "gemini"
+    content_model = CONTENT_MODEL
+    persistent_ids = True
+
+    def __init__(self, max_connections: Optional[int] = None, max_keepalive_connections: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None, timeout: Optional[float] = None,
+                 completion_mode: Optional[str] = None, poll_floor: Optional[float] = None,
+                 poll_ceiling: Optional[float] = None, poll_multiplier: Optional[float] = None):
+        self.openai_api_key = os.getenv("OPENAI_API_KEY")
+        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
+
+        if not self.openai_api_key:
+            raise ValueError("OpenAI API key not found in environment variables")
+        if not self.gemini_api_key:
+            raise ValueError("Gemini API key not found in environment variables")
+
+        # One bounded keep-alive pool shared by every OpenAI call so concurrent
+        # agents reuse connections instead of opening a socket per request.
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        self.max_keepalive_connections = max_keepalive_connections or int(
+            os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", min(DEFAULT_MAX_KEEPALIVE_CONNECTIONS, self.max_connections)))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("LLM_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY))
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout or float(os.getenv("LLM_TIMEOUT", DEFAULT_TIMEOUT))),
+        )
+
+        # "stream" follows the run event stream; "poll" uses adaptive backoff polling.
+        # Streaming falls back to polling if the stream cannot be opened or breaks.
+        self.completion_mode = completion_mode or os.getenv("LLM_COMPLETION_MODE", DEFAULT_COMPLETION_MODE)
+        if self.completion_mode not in ("stream", "poll"):
+            raise ValueError(f"Unknown completion mode: {self.completion_mode}")
+        self.poll_floor = poll_floor or float(os.getenv("LLM_POLL_FLOOR", DEFAULT_POLL_FLOOR))
+        self.poll_ceiling = poll_ceiling or float(os.getenv("LLM_POLL_CEILING", DEFAULT_POLL_CEILING))
+        self.poll_multiplier = poll_multiplier or float(os.getenv("LLM_POLL_MULTIPLIER", DEFAULT_POLL_MULTIPLIER))
+        if self.poll_floor > self.poll_ceiling:
+            raise ValueError("poll_floor must not exceed poll_ceiling")
+
+        self.openai_client = AsyncOpenAI(api_key=self.openai_api_key, http_client=self.http_client)
+        genai.configure(api_key=self.gemini_api_key)
+        self.gemini_model = genai.GenerativeModel(CONTENT_MODEL)
+
+    async def create_assistant(self, name: str, instructions: str, tools: List[Dict[str, Any]]) -> str:
+        assistant = await self.openai_client.beta.assistants.create(
+            name=name,
+            instructions=instructions,
+            tools=tools,
+            model=ASSISTANT_MODEL
+        )
+        return assistant.id
+
+    async def delete_assistant(self, assistant_id: str):
+        await self.openai_client.beta.assistants.delete(assistant_id)
+
+    async def create_thread(self) -> str:
+        thread = await self.openai_client.beta.threads.create()
+        return thread.id
+
+    async def run_thread(self, thread_id: str, assistant_id: str, prompt: str, record: CallRecord,
+                         tool_handler: Optional[ToolHandler] = None) -> str:
+        await self.openai_client.beta.threads.messages.create(
+            thread_id=thread_id,
+            role="user",
+            content=prompt
+        )
+        if self.completion_mode == "stream":
+            return await self._stream_run(thread_id, assistant_id, record, tool_handler)
+        return await self._poll_new_run(thread_id, assistant_id, record, tool_handler)
+
+    @traced()
+    async def _stream_run(self, thread_id: str, assistant_id: str, record: CallRecord,
+                          tool_handler: Optional[ToolHandler]) -> str:
+        run_id = None
+        response = ""
+        try:
+            stream = await self.openai_client.beta.threads.runs.create(
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                stream=True
+            )
+        except (openai.APIConnectionError, openai.BadRequestError, openai.NotFoundError) as e:
+            logging.warning(f"Run streaming unavailable, falling back to polling: {str(e)}")
+            record.mode = "poll"
+            return await self._poll_new_run(thread_id, assistant_id, record, tool_handler)
+
+        try:
+            # Submitting tool outputs continues the run on a new stream
+            while stream is not None:
+                next_stream = None
+                async with stream:
+                    async for event in stream:
+                        if event.event == "thread.run.created":
+                            run_id = event.data.id
+                        elif event.event == "thread.message.delta":
+                            record.mark_first_token()
+                        elif event.event == "thread.message.completed":
+                            response = event.data.content[0].text.value
+                        elif event.event == "thread.run.requires_action":
+                            tool_outputs = await self._tool_outputs(event.data, record, tool_handler)
+                            next_stream = await self.openai_client.beta.threads.runs.submit_tool_outputs(
+                                thread_id=thread_id,
+                                run_id=event.data.id,
+                                tool_outputs=tool_outputs,
+                                stream=True
+                            )
+                            break
+                        elif event.event == "thread.run.completed":
+                            self._record_usage(record, event.data.usage)
+                            return response
+                        elif event.event in ("thread.run.failed", "thread.run.cancelled", "thread.run.expired", "thread.run.incomplete"):
+                            return self._run_error(event.data, record)
+                stream = next_stream
+        except (openai.APIConnectionError, httpx.HTTPError) as e:
+            if run_id is None:
+                raise
+            logging.warning(f"Run stream interrupted, polling run {run_id}: {str(e)}")
+
+        if run_id is None:
+            raise RuntimeError("Run stream ended before the run was created")
+        # The stream closed without a terminal event; finish the run by polling.
+        record.mode = "stream+poll"
+        return await self._poll_run(thread_id, run_id, record, tool_handler)
+
+    async def _poll_new_run(self, thread_id: str, assistant_id: str, record: CallRecord,
+                            tool_handler: Optional[ToolHandler]) -> str:
+        run = await self.openai_client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=assistant_id
+        )
+        return await self._poll_run(thread_id, run.id, record, tool_handler)
+
+    @traced()
+    async def _poll_run(self, thread_id: str, run_id: str, record: CallRecord,
+                        tool_handler: Optional[ToolHandler]) -> str:
+        # Exponential backoff between the floor and ceiling: short runs are noticed
+        # almost immediately while long runs are not hammered with requests.
+        delay = self.poll_floor
+        while True:
+            run_status = await self.openai_client.beta.threads.runs.retrieve(
+                thread_id=thread_id,
+                run_id=run_id
+            )
+            record.polls += 1
+            if run_status.status == 'completed':
+                self._record_usage(record, run_status.usage)
+                break
+            elif run_status.status == 'requires_action':
+                await self.openai_client.beta.threads.runs.submit_tool_outputs(
+                    thread_id=thread_id,
+                    run_id=run_id,
+                    tool_outputs=await self._tool_outputs(run_status, record, tool_handler)
+                )
+                delay = self.poll_floor
+                continue
+            elif run_status.status in RUN_FAILURE_STATUSES:
+                return self._run_error(run_status, record)
+            await asyncio.sleep(delay)
+            delay = min(delay * self.poll_multiplier, self.poll_ceiling)
+
+        messages = await self.openai_client.beta.threads.messages.list(thread_id=thread_id, limit=1)
+        record.mark_first_token()
+        return messages.data[0].content[0].text.value
+
+    @staticmethod
+    def _record_usage(record: CallRecord, usage):
+        # Run usage covers every model step of the run, tool-call rounds included
+        if usage is not None:
+            record.set_usage(usage.prompt_tokens, usage.completion_tokens)
+
+    async def _tool_outputs(self, run, record: CallRecord, tool_handler: Optional[ToolHandler]) -> List[Dict[str, str]]:
+        tool_calls = [
+            {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            for call in run.required_action.submit_tool_outputs.tool_calls
+        ]
+        record.tool_calls += len(tool_calls)
+        if tool_handler is None:
+            return [{"tool_call_id": call["id"], "output": "Error: tools are not available"} for call in tool_calls]
+        return await tool_handler(tool_calls)
+
+    def _run_error(self, run, record: CallRecord) -> str:
+        error = run.last_error or run.status
+        logging.error(f"Run {run.status}: {error}")
+        record.finish(error=str(error))
+        return f"Error: {error}"
+
+    @traced()
+    async def generate_content(self, prompt: str, record: CallRecord) -> str:
+        response = await self.gemini_model.generate_content_async(prompt)
+        record.mark_first_token()
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            record.set_usage(usage.prompt_token_count, usage.candidates_token_count)
+        return response.text
+
+    async def aclose(self):
+        await self.openai_client.close()
+        await self.http_client.aclose()
\ No newline at end of file
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, Optional, Tuple
+
+# Requests and tokens per minute; "provider:model" entries override "provider" entries
+DEFAULT_RATE_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 150000},
+    "gemini": {"rpm": 60, "tpm": 32000},
+}
+DEFAULT_COMPLETION_TOKENS = 512
+THROTTLE_STATUSES = (429,)
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+def error_status(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+    """Return (HTTP status, Retry-After seconds) for provider errors where known."""
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code  # google.api_core exceptions
+    retry_after = getattr(error, "retry_after", None)
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if retry_after is None and headers is not None:
+        try:
+            if headers.get("retry-after-ms"):
+                retry_after = float(headers["retry-after-ms"]) / 1000
+            elif headers.get("retry-after"):
+                retry_after = float(headers["retry-after"])
+        except (TypeError, ValueError):
+            retry_after = None
+    return status, retry_after
+
+def is_retryable(status: Optional[int]) -> bool:
+    return status is not None and (status in THROTTLE_STATUSES or status >= 500)
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        # The lock keeps waiters FIFO; returns seconds spent waiting
+        amount = min(amount, self.capacity)
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - start
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def state(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            "per_minute": round(self.rate * 60, 2),
+            "available": round(self.tokens, 2),
+            "blocked_for": max(0.0, round(self.blocked_until - time.monotonic(), 3)),
+        }
+
+class AIMDController:
+    """Concurrency window that grows by `increase` per window of successes and
+    shrinks by `decrease_factor` on throttling or server errors."""
+
+    def __init__(self, initial: float = 4, minimum: float = 1, maximum: float = 64,
+                 increase: float = 1.0, decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.window = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.successes = 0
+        self.backoffs = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.inflight < int(self.window))
+            self.inflight += 1
+
+    async def release(self, throttled: bool = False):
+        async with self._condition:
+            self.inflight -= 1
+            if throttled:
+                now = time.monotonic()
+                # Calls already in flight fail together; count them as one congestion event
+                if now - self._last_decrease >= self.cooldown:
+                    self.window = max(self.minimum, self.window * self.decrease_factor)
+                    self._last_decrease = now
+                    self.backoffs += 1
+            else:
+                self.successes += 1
+                self.window = min(self.maximum, self.window + self.increase / self.window)
+            self._condition.notify_all()
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "window": round(self.window, 2),
+            "inflight": self.inflight,
+            "successes": self.successes,
+            "backoffs": self.backoffs,
+        }
+
+class _Slot:
+    def __init__(self, limiter: 'RateLimiter', provider: str, model: str, tokens: int):
+        self.limiter = limiter
+        self.provider = provider
+        self.model = model
+        self.tokens = tokens
+        self.wait = 0.0
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    async def __aenter__(self) -> '_Slot':
+        start = time.monotonic()
+        controller = self.limiter.controller(self.provider)
+        await controller.acquire()
+        try:
+            requests, tokens = self.limiter.buckets(self.provider, self.model)
+            await requests.acquire(1)
+            if self.tokens:
+                await tokens.acquire(self.tokens)
+        except BaseException:
+            await controller.release()
+            raise
+        self.wait = time.monotonic() - start
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        throttled = False
+        if exc is not None and not isinstance(exc, asyncio.CancelledError):
+            self.status, self.retry_after = error_status(exc)
+            throttled = is_retryable(self.status)
+            if throttled:
+                self.limiter.throttled += 1
+                if self.retry_after:
+                    for bucket in self.limiter.buckets(self.provider, self.model):
+                        bucket.block_for(self.retry_after)
+        await self.limiter.controller(self.provider).release(throttled=throttled)
+        return False
+
+class RateLimiter:
+    """Per provider/model request and token buckets behind a per-provider AIMD window."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, initial_window: float = 4,
+                 max_window: float = 64):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.limits.update(limits or {})
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._controllers: Dict[str, AIMDController] = {}
+        self.throttled = 0
+
+    @classmethod
+    def from_env(cls) -> 'RateLimiter':
+        # LLM_RATE_LIMITS='{"openai": {"rpm": 500, "tpm": 150000}, "openai:gpt-4o": {"rpm": 100}}'
+        limits = json.loads(os.getenv("LLM_RATE_LIMITS", "{}"))
+        return cls(limits, initial_window=float(os.getenv("LLM_AIMD_INITIAL_WINDOW", 4)),
+                   max_window=float(os.getenv("LLM_AIMD_MAX_WINDOW", 64)))
+
+    def _limit(self, provider: str, model: str) -> Dict[str, float]:
+        limit = dict(self.limits.get(provider, {"rpm": 60, "tpm": 60000}))
+        limit.update(self.limits.get(f"{provider}:{model}", {}))
+        return limit
+
+    def buckets(self, provider: str, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        key = f"{provider}:{model}"
+        if key not in self._buckets:
+            limit = self._limit(provider, model)
+            self._buckets[key] = (TokenBucket(limit["rpm"]), TokenBucket(limit["tpm"]))
+        return self._buckets[key]
+
+    def controller(self, provider: str) -> AIMDController:
+        if provider not in self._controllers:
+            self._controllers[provider] = AIMDController(initial=self.initial_window, maximum=self.max_window)
+        return self._controllers[provider]
+
+    def slot(self, provider: str, model: str, tokens: int = 0) -> _Slot:
+        return _Slot(self, provider, model, tokens)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "throttled": self.throttled,
+            "controllers": {provider: c.state() for provider, c in self._controllers.items()},
+            "buckets": {
+                key: {"requests": requests.state(), "tokens": tokens.state()}
+                for key, (requests, tokens) in self._buckets.items()
+            },
+        }
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Dict, Any, Awaitable, Callable
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key into one upstream call.
+
+    Every waiter gets the leader's result or exception. A cancelled waiter only
+    detaches itself; the upstream call is cancelled once no waiters remain.
+    """
+
+    def __init__(self):
+        self.inflight: Dict[str, _Flight] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.cancelled_upstream = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self.inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self.inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.upstream_calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Last waiter gave up: drop the flight so later callers start a fresh one
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.cancelled_upstream += 1
+
+    def _forget(self, key: str, flight: _Flight):
+        if self.inflight.get(key) is flight:
+            del self.inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "inflight": len(self.inflight),
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": self.coalesced,
+            "cancelled_upstream": self.cancelled_upstream,
+        }
@@ -0,0 +1,89 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
+from concurrency.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOOL_TIMEOUT = 30.0
+
+class ToolExecutor:
+    """Runs the tool calls requested by a run concurrently.
+
+    Async tools are awaited on the event loop; blocking tools (file I/O etc.) go to
+    a thread pool. Each call has its own timeout and failures become tool outputs,
+    so one bad tool never stalls the batch.
+    """
+
+    def __init__(self, functions: Dict[str, Callable], timeout: Optional[float] = None, max_workers: Optional[int] = None):
+        self.functions = functions
+        self.timeout = timeout or float(os.getenv("LLM_TOOL_TIMEOUT", DEFAULT_TOOL_TIMEOUT))
+        self.timeouts: Dict[str, float] = {}
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    @traced()
+    async def execute(self, tool_calls: List[Dict[str, Any]],
+                      functions: Optional[Dict[str, Callable]] = None) -> List[Dict[str, str]]:
+        """Run tool_calls, looking tools up in functions before the shared table."""
+        return list(await asyncio.gather(*[self._execute_one(call, functions or {}) for call in tool_calls]))
+
+    async def _execute_one(self, call: Dict[str, Any], functions: Dict[str, Callable]) -> Dict[str, str]:
+        name = call["name"]
+        timeout = self.timeouts.get(name, self.timeout)
+        stats = self.stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_time": 0.0, "max_time": 0.0})
+        stats["calls"] += 1
+        start = time.perf_counter()
+        try:
+            function = functions.get(name) or self.functions.get(name)
+            if function is None:
+                raise KeyError(f"Unknown tool: {name}")
+            arguments = json.loads(call.get("arguments") or "{}")
+            result = await asyncio.wait_for(self._invoke(function, arguments), timeout)
+            if result is None:
+                output = "Success"
+            else:
+                output = result if isinstance(result, str) else json.dumps(result, default=str)
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            output = f"Error: tool {name} timed out after {timeout}s"
+            logger.warning(output)
+        except Exception as e:
+            stats["errors"] += 1
+            output = f"Error: {str(e)}"
+            logger.error(f"Tool {name} failed: {str(e)}")
+        finally:
+            elapsed = time.perf_counter() - start
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+        return {"tool_call_id": call["id"], "output": output}
+
+    async def _invoke(self, function: Callable, arguments: Dict[str, Any]) -> Any:
+        if inspect.iscoroutinefunction(function):
+            return await function(**arguments)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, functools.partial(function, **arguments))
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {**stats, "mean_time": stats["total_time"] / stats["calls"] if stats["calls"] else 0.0}
+            for name, stats in self.stats.items()
+        }
+
+    def shutdown(self):
+        # The pool is rebuilt if tools run again later
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
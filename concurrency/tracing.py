@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import asyncio
+import functools
+import threading
+import weakref
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Any, List, Optional, Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SPANS = 200000
+DEFAULT_MAX_TRACKS = 10000
+
+class Span:
+    __slots__ = ("span_id", "name", "args", "start", "end", "parent_id", "track")
+
+    def __init__(self, span_id: int, name: str, args: Dict[str, Any], parent_id: Optional[int], track: int):
+        self.span_id = span_id
+        self.name = name
+        self.args = args
+        self.start = time.perf_counter_ns()
+        self.end: Optional[int] = None
+        self.parent_id = parent_id
+        self.track = track
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class _ActiveSpan:
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: 'Tracer', span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.span.args["error"] = exc_type.__name__
+        _current_span.reset(self.token)
+        self.tracer.spans.append(self.span)
+        return False
+
+class Tracer:
+    """Nested timing spans propagated through asyncio tasks via a contextvar.
+
+    Each asyncio task gets its own track (a Chrome trace "thread"), so spans on a
+    track nest properly while concurrent agents show up side by side. When
+    disabled, span() returns a shared no-op context manager. Tracks are held
+    weakly by their task, and only the last max_tracks keep a name in exports.
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = DEFAULT_MAX_SPANS, max_tracks: int = DEFAULT_MAX_TRACKS):
+        self.enabled = enabled
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.max_tracks = max_tracks
+        self._next_id = 0
+        self._next_track = 0
+        # Dropped with their task, so a long run doesn't keep one entry per task it ever traced
+        self._task_tracks: 'weakref.WeakKeyDictionary[asyncio.Task, int]' = weakref.WeakKeyDictionary()
+        self._thread_tracks: Dict[int, int] = {}
+        self._track_names: 'OrderedDict[int, str]' = OrderedDict()
+        self._origin = time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.spans.clear()
+        self._task_tracks.clear()
+        self._thread_tracks.clear()
+        self._track_names.clear()
+
+    def _track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            tracks, key = self._task_tracks, task
+        else:
+            tracks, key = self._thread_tracks, threading.get_ident()
+        track = tracks.get(key)
+        if track is None:
+            self._next_track += 1
+            track = tracks[key] = self._next_track
+            self._track_names[track] = task.get_name() if task is not None else threading.current_thread().name
+            while len(self._track_names) > self.max_tracks:
+                self._track_names.popitem(last=False)
+        return track
+
+    def span(self, name: str, **args):
+        if not self.enabled:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        self._next_id += 1
+        return _ActiveSpan(self, Span(self._next_id, name, args, parent.span_id if parent else None, self._track()))
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": track, "args": {"name": name}}
+            for track, name in self._track_names.items()
+        ]
+        for span in self.spans:
+            args = {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                    for key, value in span.args.items()}
+            if span.parent_id is not None:
+                args["parent_id"] = span.parent_id
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "pid": pid,
+                "tid": span.track,
+                "ts": (span.start - self._origin) / 1000,
+                "dur": (span.end - span.start) / 1000,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        logger.info(f"Wrote {len(self.spans)} spans to {path}")
+
+# TRACE_PATH enables tracing and is where run_swarm writes the trace
+tracer = Tracer(enabled=bool(os.getenv("TRACE_PATH")))
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Wrap an async function in a span named after it (or `name`)."""
+    def decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return await fn(*args, **kwargs)
+            with tracer.span(span_name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
\ No newline at end of file
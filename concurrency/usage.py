@@ -0,0 +1,130 @@
+import os
+import json
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
+from concurrency.metrics import CallRecord
+
+# USD per million (prompt, completion) tokens; LLM_PRICING='{"model": [in, out]}' overrides
+DEFAULT_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4-1106-preview": (10.0, 30.0),
+    "gpt-4o": (5.0, 15.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gemini-pro": (0.5, 1.5),
+}
+
+GROUP_FIELDS = ("provider", "model", "agent", "task_id", "phase", "iteration", "mode")
+PROMETHEUS_LABELS = ("provider", "model", "agent", "phase")
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated_calls": 0,
+            "cost_usd": 0.0, "latency_s": 0.0, "network_s": 0.0, "queue_wait_s": 0.0}
+
+def _add(totals: Dict[str, Any], call: CallRecord):
+    totals["calls"] += 1
+    totals["errors"] += 1 if call.error else 0
+    totals["prompt_tokens"] += call.prompt_tokens or 0
+    totals["completion_tokens"] += call.completion_tokens or 0
+    totals["estimated_calls"] += 1 if call.tokens_estimated else 0
+    totals["cost_usd"] += call.cost
+    totals["latency_s"] += call.total_latency or 0.0
+    totals["network_s"] += call.network_latency or 0.0
+    totals["queue_wait_s"] += call.queue_wait
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class UsageTracker:
+    """Per-call token, latency and cost accounting with grouping and export."""
+
+    def __init__(self, pricing: Optional[Dict[str, Tuple[float, float]]] = None, max_records: int = 100000):
+        self.pricing = dict(DEFAULT_PRICING)
+        if pricing:
+            self.pricing.update(pricing)
+        # Bounded, for grouping and per-call export; running totals are kept separately
+        self.records: Deque[CallRecord] = deque(maxlen=max_records)
+        self.totals = _empty_totals()
+        # Prometheus counters must never go down, so they outlive records rolling over
+        self.series: Dict[Tuple, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_env(cls) -> 'UsageTracker':
+        pricing = json.loads(os.getenv("LLM_PRICING", "{}"))
+        return cls(pricing={model: tuple(prices) for model, prices in pricing.items()})
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = self.pricing.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record(self, call: CallRecord):
+        call.cost = self.cost(call.model, call.prompt_tokens or 0, call.completion_tokens or 0)
+        self.records.append(call)
+        _add(self.totals, call)
+        labels = tuple(getattr(call, label) or "" for label in PROMETHEUS_LABELS)
+        _add(self.series.setdefault(labels, _empty_totals()), call)
+
+    def query(self, group_by: Optional[str] = None, **where) -> Dict[Any, Dict[str, Any]]:
+        """Totals for the calls matching every where-field, optionally grouped by one field.
+
+        e.g. query("agent", phase="execute") or query("task_id", iteration=3).
+        """
+        if group_by is not None and group_by not in GROUP_FIELDS:
+            raise ValueError(f"Cannot group by {group_by}; expected one of {GROUP_FIELDS}")
+        groups: Dict[Any, Dict[str, Any]] = {}
+        for call in self.records:
+            if any(getattr(call, field) != value for field, value in where.items()):
+                continue
+            key = getattr(call, group_by) if group_by else "all"
+            _add(groups.setdefault(key, _empty_totals()), call)
+        return groups
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "totals": dict(self.totals),
+            "by_agent": self.query("agent"),
+            "by_task": self.query("task_id"),
+            "by_iteration": self.query("iteration"),
+            "by_phase": self.query("phase"),
+            "by_model": self.query("model"),
+        }
+
+    def export_json(self, path: str, include_calls: bool = True):
+        report = self.summary()
+        for name, groups in report.items():
+            if name != "totals":
+                report[name] = {str(key): totals for key, totals in groups.items()}
+        if include_calls:
+            report["calls"] = [call.to_dict() for call in self.records]
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def prometheus_text(self) -> str:
+        metrics = [
+            ("llm_calls_total", "counter", "LLM calls", "calls"),
+            ("llm_errors_total", "counter", "LLM calls that failed", "errors"),
+            ("llm_prompt_tokens_total", "counter", "Prompt tokens sent", "prompt_tokens"),
+            ("llm_completion_tokens_total", "counter", "Completion tokens received", "completion_tokens"),
+            ("llm_cost_usd_total", "counter", "Estimated cost in USD", "cost_usd"),
+            ("llm_latency_seconds_total", "counter", "Wall time of LLM calls", "latency_s"),
+            ("llm_network_seconds_total", "counter", "LLM call time excluding rate-limit queueing", "network_s"),
+            ("llm_queue_wait_seconds_total", "counter", "Time spent waiting for a rate-limit slot", "queue_wait_s"),
+        ]
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, totals in self.series.items():
+                label_text = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(PROMETHEUS_LABELS, labels))
+                lines.append(f"{name}{{{label_text}}} {totals[field]}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str):
+        with open(path, 'w') as f:
+            f.write(self.prometheus_text())
+
+    def export(self, directory: str) -> List[str]:
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, "llm_usage.json")
+        prom_path = os.path.join(directory, "llm_usage.prom")
+        self.export_json(json_path)
+        self.export_prometheus(prom_path)
+        return [json_path, prom_path]
\ No newline at end of file
@@ -0,0 +1,215 @@
+import os
+import json
+import asyncio
+from typing import List, Dict, Any, TYPE_CHECKING
+from agents.agent_init import Agent
+from concurrency.llm_core import llm_core
+import logging
+
+if TYPE_CHECKING:
+    from ensemble.swarmify import Swarm
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 2
+DEFAULT_CHECKPOINT_PATH = os.path.join(".swarm", "checkpoint.jsonl")
+DEFAULT_COMPACT_ENTRIES = 1000
+
+class SwarmCheckpoint:
+    """Append-only JSON-lines journal of a swarm: tasks, agents with their assistant/thread ids, and chat history.
+
+    State is split into keyed entries (one per setting, agent and task) and a
+    save appends only the entries that changed since the previous one, plus
+    new chat messages; on load the last line for each key wins. A durable task
+    store already persists its tasks, so they are left out of the journal.
+    After compact_entries appended lines, and on the first save of a process,
+    the journal is rewritten as a snapshot to a temporary file that is fsynced
+    and renamed over it, so a crash mid-write never leaves a truncated file
+    behind. File I/O runs in a worker thread, off the event loop.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, compact_entries: int = 0):
+        self.path = path
+        self.compact_entries = compact_entries or int(os.getenv("SWARM_CHECKPOINT_COMPACT_ENTRIES", DEFAULT_COMPACT_ENTRIES))
+        self.saves = 0
+        self.compactions = 0
+        # Last line journaled per key; a key is written again only when its line changes
+        self._written: Dict[str, str] = {}
+        self._chat_seq = -1
+        self._appended = 0
+        self._compacted = False
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def entries(swarm: 'Swarm') -> Dict[str, Any]:
+        entries: Dict[str, Any] = {
+            "version": CHECKPOINT_VERSION,
+            "backend": type(llm_core.backend).__name__,
+            "goal": swarm.goal,
+            "project_overview": swarm.project_overview,
+            "iteration": swarm.iteration,
+        }
+        for agent in swarm.agents:
+            assistant = llm_core.assistants.get(agent.assistant_key, {})
+            entries[f"agent:{agent.name}"] = {
+                "name": agent.name,
+                "role": agent.role,
+                "specialties": agent.specialties,
+                "assistant_id": agent.assistant_id,
+                "thread_id": agent.thread_id,
+                "instructions": assistant.get("instructions"),
+                "task_description": agent.task_description,
+                "activated": agent.activated,
+                "current_task_id": agent.current_task['id'] if agent.current_task else None,
+                "completed_task_ids": [task['id'] for task in agent.completed_tasks],
+            }
+        if not swarm.scheduler.durable:
+            for task in swarm.scheduler.iter_tasks("completed"):
+                entries[f"task:{task['id']}"] = {"task": task, "completed": True}
+            for task in swarm.scheduler.iter_tasks("pending"):
+                entries[f"task:{task['id']}"] = {"task": task, "completed": False}
+        return entries
+
+    @staticmethod
+    def _line(key: str, value: Any) -> str:
+        return json.dumps({"key": key, "value": value})
+
+    def _changes(self, entries: Dict[str, str], chat: List[Any]) -> List[str]:
+        lines = [line for key, line in entries.items() if self._written.get(key) != line]
+        lines.extend(self._line(key, None) for key in self._written if key not in entries)
+        lines.extend(self._line("chat", record.to_dict()) for record in chat if record.seq > self._chat_seq)
+        return lines
+
+    async def save(self, swarm: 'Swarm'):
+        # Serialised, and diffed on the loop where the swarm is consistent
+        async with self._lock:
+            entries = {key: self._line(key, value) for key, value in self.entries(swarm).items()}
+            chat = list(swarm.chat_env.chat_history) if swarm.chat_env else []
+            if not self._compacted or self._appended >= self.compact_entries:
+                lines = list(entries.values()) + [self._line("chat", record.to_dict()) for record in chat]
+                await asyncio.to_thread(self._rewrite, lines)
+                self._appended = 0
+                self.compactions += 1
+            else:
+                lines = self._changes(entries, chat)
+                if lines:
+                    try:
+                        await asyncio.to_thread(self._append, lines)
+                    except BaseException:
+                        # A torn append could swallow the next line, so start over from a snapshot
+                        self._compacted = False
+                        raise
+                    self._appended += len(lines)
+            # Only once written, so a failed save is retried in full by the next one
+            self._compacted = True
+            self._written = entries
+            if chat:
+                self._chat_seq = chat[-1].seq
+        self.saves += 1
+
+    def _rewrite(self, lines: List[str]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, lines: List[str]):
+        # Not fsynced: the journal is rebuilt from the swarm at the next compaction
+        with open(self.path, 'a') as f:
+            f.write("".join(line + "\n" for line in lines))
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        chat_history = []
+        with open(self.path) as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves at most a torn last line
+                    logger.warning(f"Skipping unreadable line {number} of checkpoint {self.path}")
+                    continue
+                if entry["key"] == "chat":
+                    chat_history.append(entry["value"])
+                elif entry["value"] is None:
+                    values.pop(entry["key"], None)
+                else:
+                    values[entry["key"]] = entry["value"]
+        if values.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {values.get('version')} in {self.path}")
+        tasks = [value for key, value in values.items() if key.startswith("task:")]
+        return {
+            "backend": values.get("backend"),
+            "goal": values.get("goal", ""),
+            "project_overview": values.get("project_overview", ""),
+            "iteration": values.get("iteration", 0),
+            "agents": [value for key, value in values.items() if key.startswith("agent:")],
+            "tasks": [entry["task"] for entry in tasks if not entry["completed"]],
+            "completed_tasks": [entry["task"] for entry in tasks if entry["completed"]],
+            "chat_history": chat_history,
+        }
+
+async def resume_swarm(path: str = DEFAULT_CHECKPOINT_PATH, **swarm_options) -> 'Swarm':
+    """Rebuild a swarm from its checkpoint, reattaching to the saved assistants and threads.
+
+    No planning runs and, on backends whose ids outlive the process, no assistants
+    or threads are created. Tasks that were in flight at the time of the
+    checkpoint go back to pending.
+    """
+    from ensemble.swarmify import Swarm
+
+    checkpoint = SwarmCheckpoint(path)
+    state = checkpoint.load()
+    swarm = Swarm(checkpoint_path=path, **swarm_options)
+    swarm.goal = state.get("goal", "")
+    swarm.project_overview = state["project_overview"]
+    swarm.iteration = state.get("iteration", 0)
+
+    # Completed tasks first so pending tasks see their dependencies as satisfied.
+    # A durable task store may already hold them, possibly ahead of the checkpoint.
+    for task in state["completed_tasks"]:
+        if task['id'] not in swarm.scheduler:
+            await swarm.scheduler.aadd(task)
+        await swarm.scheduler.acomplete(task['id'])
+    for task in state["tasks"]:
+        if task['id'] not in swarm.scheduler:
+            await swarm.scheduler.aadd(task)
+        await swarm.scheduler.arelease(task['id'])
+    # A durable store keeps its own tasks; release just the ones this swarm's agents held
+    for saved in state["agents"]:
+        if saved.get("current_task_id"):
+            await swarm.scheduler.arelease(saved["current_task_id"])
+    await swarm.scheduler.aresolve_missing_dependencies()
+    completed = {task['id']: task for task in swarm.completed_tasks}
+
+    reattach = llm_core.backend.persistent_ids and state.get("backend") == type(llm_core.backend).__name__
+    agents = []
+    for saved in state["agents"]:
+        agent = Agent(saved["name"], saved["role"], saved["specialties"])
+        agent.activated = saved.get("activated", False)
+        agent.completed_tasks = [completed[task_id] for task_id in saved.get("completed_task_ids", []) if task_id in completed]
+        agents.append((agent, saved))
+
+    if reattach:
+        for agent, saved in agents:
+            await agent.reattach(saved["assistant_id"], saved["thread_id"], saved["instructions"], saved.get("task_description"))
+            swarm._register_agent(agent)
+    else:
+        # Ids from a backend that doesn't persist them are meaningless in a new process
+        logger.warning("Checkpoint ids cannot be reused with this backend; provisioning new assistants")
+        await swarm.add_agents([(agent, saved.get("task_description") or "") for agent, saved in agents])
+
+    await swarm.initialize_chat_environment()
+    for message in state.get("chat_history", []):
+        swarm.chat_env.chat_history.append(message["sender"], message["receiver"], message["message"])
+
+    logger.info(f"Resumed swarm from {path}: {len(swarm.agents)} agents, {len(swarm.scheduler)} pending and "
+                f"{swarm.scheduler.counts()['completed']} completed tasks (iteration {swarm.iteration})")
+    return swarm
\ No newline at end of file
@@ -0,0 +1,193 @@
+import heapq
+import itertools
+import logging
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+class DuplicateTaskError(ValueError):
+    """A task with this id is already in the store."""
+
+class TaskScheduler:
+    """Id-indexed task table with dependency counters and per-role ready heaps.
+
+    Only tasks whose dependencies are all completed sit in a role heap, ordered by
+    (priority, insertion order) with 1 as the highest priority. Completing a task
+    touches just its dependents, so scheduling cost does not grow with plan size.
+    """
+
+    # Tasks live only in this process; a checkpoint has to record them
+    durable = False
+
+    def __init__(self):
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self.unmet: Dict[str, int] = {}
+        self.dependents: Dict[str, List[str]] = {}
+        self.ready: Dict[str, List[Tuple[Any, int, str]]] = {}
+        self.claimed: Set[str] = set()
+        self._queued: Set[str] = set()
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self.pending or task_id in self.completed
+
+    def add(self, task: Dict[str, Any]):
+        task_id = task['id']
+        if task_id in self:
+            raise DuplicateTaskError(f"Duplicate task ID: {task_id}")
+        task['assigned'] = False
+        self.pending[task_id] = task
+        unmet = 0
+        for dep in set(task.get('dependencies') or []):
+            if dep == task_id or dep in self.completed:
+                continue
+            self.dependents.setdefault(dep, []).append(task_id)
+            unmet += 1
+        self.unmet[task_id] = unmet
+        if unmet == 0:
+            self._push(task_id)
+
+    def update(self, *tasks: Dict[str, Any]):
+        # Task dicts are held by reference, so changes callers make are already visible
+        pass
+
+    def _push(self, task_id: str):
+        if task_id in self._queued:
+            return
+        task = self.pending[task_id]
+        heapq.heappush(self.ready.setdefault(task['role'], []), (task['priority'], next(self._seq), task_id))
+        self._queued.add(task_id)
+
+    def _is_claimable(self, task_id: str) -> bool:
+        return task_id in self.pending and task_id not in self.claimed and self.unmet.get(task_id) == 0
+
+    def claim(self, role: str) -> Optional[Dict[str, Any]]:
+        heap = self.ready.get(role)
+        while heap:
+            _, _, task_id = heapq.heappop(heap)
+            self._queued.discard(task_id)
+            # Entries for tasks claimed out of band are skipped lazily
+            if self._is_claimable(task_id):
+                return self._mark_claimed(task_id)
+        return None
+
+    def claim_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        if not self._is_claimable(task_id):
+            return None
+        return self._mark_claimed(task_id)
+
+    def _mark_claimed(self, task_id: str) -> Dict[str, Any]:
+        self.claimed.add(task_id)
+        task = self.pending[task_id]
+        task['assigned'] = True
+        return task
+
+    def release(self, task_id: str):
+        if task_id not in self.claimed:
+            return
+        self.claimed.discard(task_id)
+        self.pending[task_id]['assigned'] = False
+        self._push(task_id)
+
+    def complete(self, task_id: str) -> List[Dict[str, Any]]:
+        task = self.pending.pop(task_id, None)
+        if task is None:
+            return []
+        self.claimed.discard(task_id)
+        self._queued.discard(task_id)
+        self.unmet.pop(task_id, None)
+        self.completed[task_id] = task
+
+        newly_ready = []
+        for dependent in self.dependents.pop(task_id, []):
+            if dependent not in self.pending:
+                continue
+            self.unmet[dependent] -= 1
+            if self.unmet[dependent] == 0 and dependent not in self.claimed:
+                self._push(dependent)
+                newly_ready.append(self.pending[dependent])
+        return newly_ready
+
+    def resolve_missing_dependencies(self) -> List[str]:
+        # Planners sometimes reference IDs they never emit; treat those as satisfied
+        missing = [dep for dep in self.dependents if dep not in self.pending and dep not in self.completed]
+        for dep in missing:
+            logger.warning(f"Ignoring dependency on unknown task {dep}")
+            for dependent in self.dependents.pop(dep):
+                if dependent not in self.pending:
+                    continue
+                self.unmet[dependent] -= 1
+                if self.unmet[dependent] == 0 and dependent not in self.claimed:
+                    self._push(dependent)
+        return missing
+
+    def is_completed(self, task_id: str) -> bool:
+        return task_id in self.completed
+
+    def unmet_count(self, task_id: str) -> int:
+        return self.unmet.get(task_id, 0)
+
+    def ready_tasks(self) -> List[Dict[str, Any]]:
+        return [self.pending[task_id] for task_id in self._queued if self._is_claimable(task_id)]
+
+    def pending_tasks(self) -> List[Dict[str, Any]]:
+        return list(self.pending.values())
+
+    def completed_tasks(self) -> List[Dict[str, Any]]:
+        return list(self.completed.values())
+
+
+    def iter_tasks(self, status: Optional[str] = None, role: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        if status == "pending":
+            tasks = self.pending.values()
+        elif status == "ready":
+            tasks = self.ready_tasks()
+        elif status == "completed":
+            tasks = self.completed.values()
+        elif status is None:
+            tasks = itertools.chain(self.completed.values(), self.pending.values())
+        else:
+            raise ValueError(f"Unknown task status filter: {status}")
+        for task in tasks:
+            if role is None or task['role'] == role:
+                yield task
+
+    def counts(self) -> Dict[str, int]:
+        claimed = len(self.claimed)
+        return {"pending": len(self.pending) - claimed, "claimed": claimed, "completed": len(self.completed)}
+
+    def clear(self):
+        for table in (self.pending, self.completed, self.unmet, self.dependents, self.ready, self.claimed, self._queued):
+            table.clear()
+
+    # Awaitable forms of the writes, matching SQLiteTaskStore; in memory they never block
+    async def aadd(self, task: Dict[str, Any]):
+        self.add(task)
+
+    async def aupdate(self, *tasks: Dict[str, Any]):
+        self.update(*tasks)
+
+    async def aclaim(self, role: str) -> Optional[Dict[str, Any]]:
+        return self.claim(role)
+
+    async def aclaim_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.claim_task(task_id)
+
+    async def arelease(self, task_id: str):
+        self.release(task_id)
+
+    async def acomplete(self, task_id: str) -> List[Dict[str, Any]]:
+        return self.complete(task_id)
+
+    async def aresolve_missing_dependencies(self) -> List[str]:
+        return self.resolve_missing_dependencies()
+
+    async def aclear(self):
+        self.clear()
+
+    def close(self):
+        pass
\ No newline at end of file
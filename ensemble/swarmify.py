@@ -1,8 +1,18 @@
 import asyncio
-from typing import List, Dict, Any, Tuple, Optional
-from agents.agent_init import Agent
-from tools.rag_utils import RAG
+import functools
+import os
+from typing import List, Dict, Any, Tuple, Optional, Callable, Set
+from agents.agent_init import Agent, close_shared_tools, shared_web_search
+from tools.rag_utils import RAG, get_knowledge, store_information
+from tools.search_ingest import SearchIngestor
+from ensemble.scheduler import DuplicateTaskError
+from ensemble.task_store import create_task_store
+from ensemble.checkpoint import SwarmCheckpoint
+from tools.context_manager import context_manager
+from tools.context_selection import context_selector
 from concurrency.llm_core import llm_core
+from concurrency.metrics import call_scope
+from concurrency.tracing import tracer, traced
 import re
 from tools.file_operations import FileOperations
 from interaction.chat_environment import ChatEnvironment, initialize_chat_environment
@@ -12,6 +22,8 @@ logger = logging.getLogger(__name__)
 logging.getLogger("openai").disabled = True
 logging.getLogger("httpx").disabled = True
 
+DEFAULT_PROVIDER_CONCURRENCY = 8
+
 class TaskGenerator:
     @staticmethod
     async def generate_tasks(goal: str, project_overview: str) -> List[Dict[str, Any]]:
@@ -38,26 +50,71 @@ Format the output as a JSON list of task objects."""
             return []
 
 class Swarm:
-    def __init__(self):
+    def __init__(self, use_rag: bool = True, provider_concurrency: Optional[Dict[str, int]] = None,
+                 checkpoint_path: Optional[str] = None, task_store: Optional[str] = None,
+                 task_store_path: Optional[str] = None):
         self.agents: List[Agent] = []
-        self.tasks: List[Dict[str, Any]] = []
-        self.completed_tasks: List[Dict[str, Any]] = []
+        # In-memory by default; SWARM_TASK_STORE=sqlite keeps tasks in a shared, durable database
+        self.scheduler = create_task_store(task_store, task_store_path)
+        self.goal: str = ""
         self.project_overview: str = ""
+        # What changed is journaled after every completed task and iteration when a path is given
+        self.checkpoint = SwarmCheckpoint(checkpoint_path) if checkpoint_path else None
         self.file_ops = FileOperations()
-        try:
-            self.shared_rag = RAG()
-        except Exception as e:
-            logger.error(f"Error initializing RAG: {str(e)}")
-            self.shared_rag = None
+        self.shared_rag = None
+        self.search_ingestor: Optional[SearchIngestor] = None
+        if use_rag:
+            try:
+                self.shared_rag = RAG()
+            except Exception as e:
+                logger.error(f"Error initializing RAG: {str(e)}")
+        # Tools bound to this swarm's RAG; bound to each agent's assistant, since llm_core serves every swarm
+        self.tool_functions: Dict[str, Callable] = {}
+        if self.shared_rag:
+            # Pages behind search results are streamed into the shared RAG, not just returned
+            self.search_ingestor = SearchIngestor(self.shared_rag, shared_web_search)
+            self.tool_functions = {
+                "get_knowledge": functools.partial(get_knowledge, self.shared_rag, consistent=True),
+                "store_information": functools.partial(store_information, self.shared_rag, wait=False),
+                "web_search_and_learn": self.search_ingestor.search_and_learn,
+            }
         self.chat_env: Optional['ChatEnvironment'] = None
+        self.collaboration_groups: List[List[Agent]] = []
+        # Max agents executing at once per LLM provider; SWARM_PROVIDER_CONCURRENCY sets the default
+        self.provider_concurrency = provider_concurrency or {}
+        self._provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Agents executing a task right now; never removed from under their run
+        self._running: Set[Agent] = set()
+        self.iteration = 0
+
+    @property
+    def tasks(self) -> List[Dict[str, Any]]:
+        return self.scheduler.pending_tasks()
+
+    @property
+    def completed_tasks(self) -> List[Dict[str, Any]]:
+        return self.scheduler.completed_tasks()
 
     async def add_agent(self, agent: Agent, task_description: str):
         await agent.initialize_with_context(task_description, self.project_overview)
+        self._register_agent(agent)
+
+    @traced()
+    async def add_agents(self, agents: List[Tuple[Agent, str]]):
+        # Provision concurrently, then register in the given order
+        await asyncio.gather(*[agent.initialize_with_context(task_description, self.project_overview)
+                               for agent, task_description in agents])
+        for agent, _ in agents:
+            self._register_agent(agent)
+
+    def _register_agent(self, agent: Agent):
         self.agents.append(agent)
+        llm_core.bind_tools(agent.assistant_key, self.tool_functions)
         if self.shared_rag:
             agent.rag = self.shared_rag  # Use the shared RAG for all agents
         logger.info(f"Added agent: {agent.name} ({agent.role})")
 
+    @traced()
     async def generate_tasks_and_agents(self, goal: str):
         project_manager = self.get_agent_by_role("Project Manager")
         if project_manager:
@@ -91,7 +148,7 @@ class Swarm:
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    response = await llm_core.generate_response(project_manager.name, prompt)
+                    response = await llm_core.generate_response(project_manager.assistant_key, prompt)
                     
                     tasks_section = re.search(r"Tasks:(.*?)(?:Agents:|$)", response, re.DOTALL)
                     agents_section = re.search(r"Agents:(.*?)$", response, re.DOTALL)
@@ -99,22 +156,28 @@ class Swarm:
                     if tasks_section:
                         tasks_text = tasks_section.group(1).strip()
                         tasks = self._parse_tasks(tasks_text)
-                        for task in tasks:
-                            await self.add_task(task)
-                    
+                        task_uploads = [self.add_task(task) for task in tasks]
+                    else:
+                        task_uploads = []
+
+                    new_agents = []
                     if agents_section:
                         agents_text = agents_section.group(1).strip()
                         agents = self._parse_agents(agents_text)
                         for agent_info in agents:
                             agent = Agent(agent_info['name'], agent_info['role'], agent_info['specialties'])
-                            await self.add_agent(agent, f"You are responsible for tasks related to {agent_info['role']}")
+                            new_agents.append((agent, f"You are responsible for tasks related to {agent_info['role']}"))
+
+                    # Task uploads and agent provisioning are independent round-trips
+                    await asyncio.gather(*task_uploads, self.add_agents(new_agents))
+                    await self.scheduler.aresolve_missing_dependencies()
                     
                     print("Planning complete. Created agents:")
                     for agent in self.agents:
                         print(f"- {agent.name} ({agent.role})")
                     
                     print("\nTasks:")
-                    for task in self.tasks:
+                    for task in self.scheduler.iter_tasks("pending"):
                         print(f"- {task['description']} (Priority: {task['priority']}, Role: {task['role']}, ID: {task['id']}, Dependencies: {task['dependencies']})")
                     break  # If successful, break out of the retry loop
                 
@@ -128,13 +191,21 @@ class Swarm:
             print("Error: Project Manager not found.")
 
     async def add_task(self, task: Dict[str, Any]):
-        self.tasks.append(task)
+        # Checked inside the store's add, since planning adds tasks concurrently
+        try:
+            await self.scheduler.aadd(task)
+        except DuplicateTaskError:
+            logger.warning(f"Skipping task with duplicate ID {task['id']}: {task['description']}")
+            return
         logger.info(f"Added task: {task['description']} (Role: {task['role']}, Priority: {task['priority']})")
         if self.shared_rag:
-            await self.shared_rag.upload_data([f"New task: {task['description']}"])
+            self.shared_rag.enqueue([f"New task: {task['description']}"],
+                                    [{"type": "task", "role": task['role'], "task_id": task['id']}])
 
+    @traced()
     async def dynamic_task_prioritization(self):
-        for task in self.tasks:
+        updated = []
+        for task in self.scheduler.iter_tasks("pending"):
             if not task.get('dynamic_priority'):
                 task['dynamic_priority'] = task['priority']
             
@@ -142,13 +213,17 @@ class Swarm:
             task['dynamic_priority'] += 0.1
             
             # Decrease priority for tasks with many dependencies not yet completed
-            incomplete_dependencies = sum(1 for dep in task['dependencies'] if not self.is_task_completed(dep))
+            incomplete_dependencies = self.scheduler.unmet_count(task['id'])
             task['dynamic_priority'] -= 0.05 * incomplete_dependencies
+            updated.append(task)
+        await self.scheduler.aupdate(*updated)
 
     async def collaborative_task_solving(self, task: Dict[str, Any]):
         suitable_agents = [a for a in self.agents if not a.current_task and task['role'] in a.specialties]
         if len(suitable_agents) >= 2:
             collaboration_group = suitable_agents[:2]  # Select two agents for collaboration
+            if not await self.scheduler.aclaim_task(task['id']):
+                return
             self.collaboration_groups.append(collaboration_group)
             
             for agent in collaboration_group:
@@ -159,6 +234,7 @@ class Swarm:
             
             # Update task with collaborative solution
             task['collaborative_solution'] = solution
+            await self.scheduler.aupdate(task)
 
     async def collaborative_problem_solving(self, agents: List[Agent], task: Dict[str, Any]) -> str:
         prompt = f"Collaborate on solving the task: {task['description']}. Each agent should contribute their expertise."
@@ -169,6 +245,7 @@ class Swarm:
         
         return combined_solution
 
+    @traced()
     async def agent_specialization_evolution(self):
         for agent in self.agents:
             if agent.completed_tasks:
@@ -180,17 +257,19 @@ class Swarm:
     async def determine_new_specialty(self, agent: Agent) -> str:
         task_descriptions = [task['description'] for task in agent.completed_tasks]
         prompt = f"Based on these completed tasks: {task_descriptions}, suggest a new specialty for the agent."
-        return await llm_core.generate_response(agent.name, prompt)
+        return await llm_core.generate_response(agent.assistant_key, prompt)
 
+    @traced()
     async def inter_agent_knowledge_sharing(self):
         for agent in self.agents:
             knowledge_to_share = agent.get_shareable_knowledge()
             if knowledge_to_share and self.shared_rag:
-                await self.shared_rag.upload_data([knowledge_to_share])
+                self.shared_rag.enqueue([knowledge_to_share], [{"type": "knowledge", "agent": agent.name}])
                 print(f"{agent.name} shared knowledge with the swarm.")
 
+    @traced()
     async def adaptive_swarm_sizing(self):
-        workload = len(self.tasks)
+        workload = len(self.scheduler)
         current_agents = len(self.agents)
         
         if workload > current_agents * 2:  # If there are more than twice as many tasks as agents
@@ -199,9 +278,19 @@ class Swarm:
             print(f"New agent {new_agent.name} added to the swarm due to high workload.")
         elif workload < current_agents // 2:  # If there are less than half as many tasks as agents
             agent_to_remove = self.select_agent_to_remove()
-            self.agents.remove(agent_to_remove)
+            if agent_to_remove is None:
+                return
+            await self.remove_agent(agent_to_remove)
             print(f"Agent {agent_to_remove.name} removed from the swarm due to low workload.")
 
+    async def remove_agent(self, agent: Agent):
+        # Its claimed task goes back to the queue and its assistant back to the pool
+        if agent.current_task:
+            await self.scheduler.arelease(agent.current_task['id'])
+            agent.current_task = None
+        await llm_core.delete_assistant(agent.assistant_key)
+        self.agents.remove(agent)
+
     async def create_new_agent(self) -> Agent:
         # Logic to create a new agent based on current needs
         new_role = await self.determine_needed_role()
@@ -211,17 +300,19 @@ class Swarm:
     async def determine_needed_role(self) -> str:
         # Analyze current tasks and agent roles to determine the most needed role
         current_roles = [agent.role for agent in self.agents]
-        task_roles = [task['role'] for task in self.tasks]
+        task_roles = [task['role'] for task in self.scheduler.iter_tasks("pending")]
         prompt = f"Given the current roles {current_roles} and required task roles {task_roles}, what new role is most needed?"
         return await llm_core.generate_response("Swarm", prompt)
 
-    def select_agent_to_remove(self) -> Agent:
-        # Select the agent with the least completed tasks
-        return min(self.agents, key=lambda a: len(a.completed_tasks))
+    def select_agent_to_remove(self) -> Optional[Agent]:
+        # Select the agent with the least completed tasks among those not executing one
+        idle = [agent for agent in self.agents if agent not in self._running]
+        return min(idle, key=lambda a: len(a.completed_tasks), default=None)
 
+    @traced()
     async def allocate_tasks(self):
         await self.dynamic_task_prioritization()
-        sorted_tasks = sorted(self.tasks, key=lambda x: x['dynamic_priority'], reverse=True)
+        sorted_tasks = sorted(self.scheduler.ready_tasks(), key=lambda x: x['dynamic_priority'], reverse=True)
         
         for task in sorted_tasks:
             if not task.get('assigned'):
@@ -230,9 +321,9 @@ class Swarm:
                 else:
                     suitable_agents = [a for a in self.agents if not a.current_task and task['role'] in a.specialties]
                     if suitable_agents:
-                        agent = min(suitable_agents, key=lambda a: len(a.memory))
-                        await agent.assign_task(task)
-                        task['assigned'] = True
+                        agent = min(suitable_agents, key=lambda a: len(a.completed_tasks))
+                        if await self.scheduler.aclaim_task(task['id']):
+                            await agent.assign_task(task)
 
         await self.agent_specialization_evolution()
         await self.inter_agent_knowledge_sharing()
@@ -320,7 +411,7 @@ class Swarm:
         return agents
 
     def is_task_completed(self, task_id: str) -> bool:
-        return any(task['id'] == task_id for task in self.completed_tasks)
+        return self.scheduler.is_completed(task_id)
 
     async def start_chat(self):
         if self.chat_env:
@@ -329,42 +420,88 @@ class Swarm:
             print("Chat environment not initialized. Please call initialize_chat_environment() first.")
 
     async def run_iteration(self):
+        self.iteration += 1
+        with tracer.span("Swarm.run_iteration", iteration=self.iteration), call_scope(iteration=self.iteration):
+            results = await self._run_iteration()
+        await self.save_checkpoint()
+        return results
+
+    async def _run_iteration(self):
         results = []
+        busy_agents = []
         for agent in self.agents:
             if not agent.current_task:
-                task = self.get_next_task_for_agent(agent)
+                task = await self.get_next_task_for_agent(agent)
                 if task:
-                    agent.current_task = task
+                    await agent.assign_task(task)
                     logger.info(f"Assigned task to {agent.name}: {task['description']}")
 
             if agent.current_task:
-                try:
-                    result = await agent.execute_task(agent.current_task)
-                    results.append(result)
-                    logger.info(f"Task completed by {agent.name}: {agent.current_task['description']}")
-                    self.completed_tasks.append(agent.current_task)
-                    self.tasks.remove(agent.current_task)
-                    agent.current_task = None
-                except Exception as e:
-                    logger.error(f"Error executing task for {agent.name}: {str(e)}")
-                finally:
-                    agent.current_task = None
+                busy_agents.append(agent)
             else:
                 logger.debug(f"{agent.name} has no current task")
 
-        await self.dynamic_task_prioritization()
-        await self.allocate_tasks()
-        await self.agent_specialization_evolution()
-        await self.inter_agent_knowledge_sharing()
-        await self.adaptive_swarm_sizing()
+        semaphore = self._provider_semaphore(llm_core.backend.assistant_provider)
+
+        async def run_agent(agent: Agent):
+            task = agent.current_task
+            self._running.add(agent)
+            try:
+                async with semaphore:
+                    with call_scope(phase="execute", agent=agent.name, task_id=task['id']), \
+                            tracer.span("Swarm.run_agent", agent=agent.name, task_id=task['id']):
+                        result = await agent.execute_task(task)
+            except Exception as e:
+                logger.error(f"Error executing task for {agent.name}: {str(e)}")
+                # Hand the task back so it can be picked up again next iteration
+                await self.scheduler.arelease(task['id'])
+                agent.current_task = None
+                return
+            finally:
+                self._running.discard(agent)
+            results.append(result)
+            await self._complete_task(agent, task)
+
+        await asyncio.gather(*[run_agent(agent) for agent in busy_agents])
+
+        with call_scope(phase="prioritization"):
+            await self.dynamic_task_prioritization()
+        with call_scope(phase="allocation"):
+            await self.allocate_tasks()
+        with call_scope(phase="specialization"):
+            await self.agent_specialization_evolution()
+        with call_scope(phase="knowledge_sharing"):
+            await self.inter_agent_knowledge_sharing()
+        with call_scope(phase="sizing"):
+            await self.adaptive_swarm_sizing()
 
         return results
 
-    def get_next_task_for_agent(self, agent: Agent) -> Optional[Dict[str, Any]]:
-        available_tasks = [task for task in self.tasks if task['role'] == agent.role and not task.get('assigned', False)]
-        if available_tasks:
-            return min(available_tasks, key=lambda x: x['priority'])
-        return None
+    def _provider_semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._provider_semaphores:
+            default_limit = int(os.getenv("SWARM_PROVIDER_CONCURRENCY", DEFAULT_PROVIDER_CONCURRENCY))
+            self._provider_semaphores[provider] = asyncio.Semaphore(self.provider_concurrency.get(provider, default_limit))
+        return self._provider_semaphores[provider]
+
+    async def _complete_task(self, agent: Agent, task: Dict[str, Any]):
+        # Single place where a finished task leaves the queue, committed as soon as its agent is done
+        logger.info(f"Task completed by {agent.name}: {task['description']}")
+        await self.scheduler.acomplete(task['id'])
+        if agent.current_task is task:
+            agent.current_task = None
+        await self.save_checkpoint()
+
+    async def save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        try:
+            await self.checkpoint.save(self)
+        except Exception as e:
+            logger.error(f"Error saving swarm checkpoint: {str(e)}")
+
+    async def get_next_task_for_agent(self, agent: Agent) -> Optional[Dict[str, Any]]:
+        # Claims the highest-priority ready task for the agent's role
+        return await self.scheduler.aclaim(agent.role)
 
     async def initialize_chat_environment(self):
         self.chat_env = await initialize_chat_environment(self)
@@ -378,13 +515,48 @@ class Swarm:
         else:
             logger.warning("Chat environment not initialized.")
 
-async def initialize_swarm(goal: str, project_overview: str) -> Swarm:
-    swarm = Swarm()
+    async def shutdown(self):
+        # Only what this swarm owns; shared clients stay up for other swarms until close_shared_resources()
+        if self.chat_env:
+            self.chat_env.chat_history.close()
+        if self.shared_rag:
+            await self.shared_rag.aclose()
+            logger.info(f"RAG ingest queue drained: {self.shared_rag.ingest.stats()}")
+            logger.info(f"RAG retrieval stats: {self.shared_rag.retrieval_stats()}")
+        if self.search_ingestor:
+            logger.info(f"Search ingest stats: {self.search_ingestor.stats()}")
+        self.scheduler.close()
+
+async def close_shared_resources():
+    """Close what every swarm in the process shares. Call once, at process exit."""
+    # Usage covers every swarm and iteration, so it is exported once rather than per run_swarm call
+    metrics_dir = os.getenv("LLM_METRICS_DIR", "metrics")
+    if metrics_dir:
+        paths = llm_core.usage.export(metrics_dir)
+        totals = llm_core.usage.totals
+        logger.info(f"LLM usage: {totals['calls']} calls, {totals['prompt_tokens']} prompt / "
+                    f"{totals['completion_tokens']} completion tokens, ~${totals['cost_usd']:.4f}; "
+                    f"exported to {', '.join(paths)}")
+    logger.info(f"Context selection stats: {context_selector.stats()}")
+    logger.info(f"Rolling summary stats: {context_manager.summarizer.stats()}")
+    await context_manager.aclose()
+    await close_shared_tools()
+    await llm_core.aclose()
+
+async def initialize_swarm(goal: str, project_overview: str, clear_tasks: bool = False, **swarm_options) -> Swarm:
+    swarm = Swarm(**swarm_options)
+    swarm.goal = goal
     swarm.project_overview = project_overview
+    if clear_tasks:
+        # Only on request: other processes may be working from the same durable store
+        await swarm.scheduler.aclear()
     project_manager = Agent("ProjectManagerBot", "Project Manager", ["planning", "coordination"])
-    await swarm.add_agent(project_manager, "Planning and coordinating the project")
-    await swarm.generate_tasks_and_agents(goal)
+    with call_scope(phase="initialize"):
+        await swarm.add_agent(project_manager, "Planning and coordinating the project")
+    with call_scope(phase="planning"):
+        await swarm.generate_tasks_and_agents(goal)
     await swarm.initialize_chat_environment()
+    await swarm.save_checkpoint()
     logger.info("Swarm initialized")
     return swarm
 
@@ -396,10 +568,10 @@ async def run_swarm(swarm: Swarm, iterations: int = 1):
             print(result)
         
         print("\nRemaining tasks:")
-        for task in swarm.tasks:
+        for task in swarm.scheduler.iter_tasks("pending"):
             print(f"- {task['description']} (Role: {task['role']}, Priority: {task['priority']}, ID: {task['id']}, Dependencies: {task['dependencies']})")
         
-        if not swarm.tasks:
+        if not len(swarm.scheduler):
             logger.info("All tasks completed!")
             break
 
@@ -410,4 +582,7 @@ async def run_swarm(swarm: Swarm, iterations: int = 1):
         for file in files:
             logger.info(f"- {file}")
     else:
-        logger.info("No files were created during this run.")
\ No newline at end of file
+        logger.info("No files were created during this run.")
+
+    if tracer.enabled:
+        tracer.export_chrome(os.getenv("TRACE_PATH") or "trace.json")
\ No newline at end of file
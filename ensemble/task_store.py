@@ -0,0 +1,276 @@
+import os
+import json
+import asyncio
+import sqlite3
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator, Callable
+from ensemble.scheduler import TaskScheduler, DuplicateTaskError
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK_STORE_PATH = os.path.join(".swarm", "tasks.db")
+DEFAULT_PAGE_SIZE = 256
+# Seconds a write transaction waits for another process's lock; only ever spent on the writer thread
+DEFAULT_WRITE_TIMEOUT = 30.0
+# WAL readers don't wait on writers, so reads on the event loop only need to ride out checkpoints
+DEFAULT_READ_TIMEOUT = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    role TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    priority REAL,
+    seq INTEGER NOT NULL,
+    unmet INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (role, status, unmet, priority, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority);
+CREATE TABLE IF NOT EXISTS dependencies (
+    task_id TEXT NOT NULL,
+    dep_id TEXT NOT NULL,
+    PRIMARY KEY (dep_id, task_id)
+);
+"""
+
+class SQLiteTaskStore:
+    """Durable drop-in for TaskScheduler backed by a SQLite database in WAL mode.
+
+    Tasks are rows indexed by id, role, status and priority, with the task dict
+    kept as JSON. Claim and complete are single IMMEDIATE transactions, so
+    several processes can share one database without handing a task out twice.
+    Dicts returned are copies: callers that change a task write it back with
+    update().
+
+    Async code uses the a-prefixed writes (aclaim, acomplete, ...), which run on
+    a single writer thread, so waiting for another process's write lock never
+    blocks the event loop. Reads go through their own connection, which in WAL
+    mode doesn't wait on writers.
+    """
+
+    durable = True
+
+    def __init__(self, path: str = DEFAULT_TASK_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-store")
+        # Transactions are opened explicitly so claims can take the write lock up front
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                   timeout=float(os.getenv("SWARM_TASK_DB_WRITE_TIMEOUT", DEFAULT_WRITE_TIMEOUT)))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._reader = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=DEFAULT_READ_TIMEOUT)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            # Take the write lock before reading so concurrent claimers serialize
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _read(self, query: str, params: tuple = ()) -> List[tuple]:
+        with self._read_lock:
+            return self._reader.execute(query, params).fetchall()
+
+    async def _on_writer(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, functools.partial(function, *args))
+
+    @staticmethod
+    def _load(row) -> Dict[str, Any]:
+        task = json.loads(row[0])
+        task['assigned'] = row[1] != 'pending'
+        return task
+
+    def __len__(self) -> int:
+        return self._read("SELECT COUNT(*) FROM tasks WHERE status != 'completed'")[0][0]
+
+    def __contains__(self, task_id: str) -> bool:
+        return bool(self._read("SELECT 1 FROM tasks WHERE id = ?", (task_id,)))
+
+    def add(self, task: Dict[str, Any]):
+        task_id = task['id']
+        task['assigned'] = False
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone():
+                raise DuplicateTaskError(f"Duplicate task ID: {task_id}")
+            unmet = []
+            for dep in set(task.get('dependencies') or []):
+                if dep == task_id:
+                    continue
+                row = db.execute("SELECT status FROM tasks WHERE id = ?", (dep,)).fetchone()
+                if row is None or row[0] != 'completed':
+                    unmet.append(dep)
+            seq = db.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks").fetchone()[0]
+            db.execute("INSERT INTO tasks (id, role, status, priority, seq, unmet, data) VALUES (?, ?, 'pending', ?, ?, ?, ?)",
+                       (task_id, task['role'], task['priority'], seq, len(unmet), json.dumps(task)))
+            db.executemany("INSERT INTO dependencies (task_id, dep_id) VALUES (?, ?)", [(task_id, dep) for dep in unmet])
+
+    def update(self, *tasks: Dict[str, Any]):
+        """Write changed task dicts back; status and dependencies are left alone."""
+        if not tasks:
+            return
+        with self._transaction() as db:
+            db.executemany("UPDATE tasks SET role = ?, priority = ?, data = ? WHERE id = ?",
+                           [(task['role'], task['priority'], json.dumps(task), task['id']) for task in tasks])
+
+    def claim(self, role: str) -> Optional[Dict[str, Any]]:
+        with self._transaction() as db:
+            row = db.execute("SELECT id, data FROM tasks WHERE role = ? AND status = 'pending' AND unmet = 0 "
+                             "ORDER BY priority, seq LIMIT 1", (role,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE tasks SET status = 'claimed' WHERE id = ?", (row[0],))
+        return self._load((row[1], 'claimed'))
+
+    def claim_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._transaction() as db:
+            cursor = db.execute("UPDATE tasks SET status = 'claimed' WHERE id = ? AND status = 'pending' AND unmet = 0", (task_id,))
+            if cursor.rowcount == 0:
+                return None
+            row = db.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._load((row[0], 'claimed'))
+
+    def release(self, task_id: str):
+        with self._transaction() as db:
+            db.execute("UPDATE tasks SET status = 'pending' WHERE id = ? AND status = 'claimed'", (task_id,))
+
+    def complete(self, task_id: str) -> List[Dict[str, Any]]:
+        with self._transaction() as db:
+            cursor = db.execute("UPDATE tasks SET status = 'completed', unmet = 0 WHERE id = ? AND status != 'completed'", (task_id,))
+            if cursor.rowcount == 0:
+                return []
+            rows = self._satisfy(db, task_id)
+        return [self._load((data, 'pending')) for data in rows]
+
+    @staticmethod
+    def _satisfy(db: sqlite3.Connection, dep_id: str) -> List[str]:
+        # Dependents of dep_id lose one unmet dependency; returns the data of those now ready
+        db.execute("UPDATE tasks SET unmet = unmet - 1 WHERE status != 'completed' AND id IN "
+                   "(SELECT task_id FROM dependencies WHERE dep_id = ?)", (dep_id,))
+        rows = db.execute("SELECT data FROM tasks WHERE status = 'pending' AND unmet = 0 AND id IN "
+                          "(SELECT task_id FROM dependencies WHERE dep_id = ?) ORDER BY seq", (dep_id,)).fetchall()
+        db.execute("DELETE FROM dependencies WHERE dep_id = ?", (dep_id,))
+        return [row[0] for row in rows]
+
+    def resolve_missing_dependencies(self) -> List[str]:
+        # Planners sometimes reference IDs they never emit; treat those as satisfied
+        with self._transaction() as db:
+            missing = [row[0] for row in db.execute(
+                "SELECT DISTINCT dep_id FROM dependencies WHERE dep_id NOT IN (SELECT id FROM tasks)").fetchall()]
+            for dep in missing:
+                logger.warning(f"Ignoring dependency on unknown task {dep}")
+                self._satisfy(db, dep)
+        return missing
+
+    def is_completed(self, task_id: str) -> bool:
+        rows = self._read("SELECT status FROM tasks WHERE id = ?", (task_id,))
+        return bool(rows) and rows[0][0] == 'completed'
+
+    def unmet_count(self, task_id: str) -> int:
+        rows = self._read("SELECT unmet FROM tasks WHERE id = ?", (task_id,))
+        return rows[0][0] if rows else 0
+
+    def iter_tasks(self, status: Optional[str] = None, role: Optional[str] = None,
+                   page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Stream tasks in insertion order, one page per query.
+
+        status is "pending" (not yet completed, claimed or not), "ready",
+        "completed" or None for all. Pages are keyed on seq, so no cursor or lock
+        is held between pages and the store may be modified while iterating.
+        """
+        clauses = {
+            None: "1",
+            "pending": "status != 'completed'",
+            "ready": "status = 'pending' AND unmet = 0",
+            "completed": "status = 'completed'",
+        }
+        if status not in clauses:
+            raise ValueError(f"Unknown task status filter: {status}")
+        query = f"SELECT data, status, seq FROM tasks WHERE {clauses[status]} AND seq > ?"
+        params: List[Any] = []
+        if role is not None:
+            query += " AND role = ?"
+            params.append(role)
+        query += " ORDER BY seq LIMIT ?"
+        last_seq = 0
+        while True:
+            rows = self._read(query, (last_seq, *params, page_size))
+            for row in rows:
+                yield self._load(row)
+            if len(rows) < page_size:
+                return
+            last_seq = rows[-1][2]
+
+    def ready_tasks(self) -> List[Dict[str, Any]]:
+        return list(self.iter_tasks("ready"))
+
+    def pending_tasks(self) -> List[Dict[str, Any]]:
+        return list(self.iter_tasks("pending"))
+
+    def completed_tasks(self) -> List[Dict[str, Any]]:
+        return list(self.iter_tasks("completed"))
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"pending": 0, "claimed": 0, "completed": 0}
+        counts.update(self._read("SELECT status, COUNT(*) FROM tasks GROUP BY status"))
+        return counts
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM tasks")
+            db.execute("DELETE FROM dependencies")
+
+    async def aadd(self, task: Dict[str, Any]):
+        await self._on_writer(self.add, task)
+
+    async def aupdate(self, *tasks: Dict[str, Any]):
+        await self._on_writer(self.update, *tasks)
+
+    async def aclaim(self, role: str) -> Optional[Dict[str, Any]]:
+        return await self._on_writer(self.claim, role)
+
+    async def aclaim_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await self._on_writer(self.claim_task, task_id)
+
+    async def arelease(self, task_id: str):
+        await self._on_writer(self.release, task_id)
+
+    async def acomplete(self, task_id: str) -> List[Dict[str, Any]]:
+        return await self._on_writer(self.complete, task_id)
+
+    async def aresolve_missing_dependencies(self) -> List[str]:
+        return await self._on_writer(self.resolve_missing_dependencies)
+
+    async def aclear(self):
+        await self._on_writer(self.clear)
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._db.close()
+        with self._read_lock:
+            self._reader.close()
+
+def create_task_store(name: Optional[str] = None, path: Optional[str] = None):
+    """Build the scheduler a Swarm keeps its tasks in: "memory" (default) or "sqlite"."""
+    name = (name or os.getenv("SWARM_TASK_STORE", "memory")).lower()
+    if name == "memory":
+        return TaskScheduler()
+    if name == "sqlite":
+        return SQLiteTaskStore(path or os.getenv("SWARM_TASK_DB", DEFAULT_TASK_STORE_PATH))
+    raise ValueError(f"Unknown task store: {name}")
\ No newline at end of file
@@ -1,9 +1,13 @@
 import asyncio
+import os
 from typing import List, Dict, Any, TYPE_CHECKING
 
 from concurrency.llm_core import llm_core
+from concurrency.tracing import traced
 from tools.rag_utils import RAG, store_information
 from tools.context_manager import context_manager
+from tools.context_selection import context_selector
+from tools.message_store import MessageStore
 
 if TYPE_CHECKING:
     from agents.agent_init import Agent
@@ -12,8 +16,10 @@ if TYPE_CHECKING:
 class ChatEnvironment:
     def __init__(self, swarm: 'Swarm'):
         self.swarm = swarm
-        self.chat_history: List[Dict[str, Any]] = []
-        self.rag = RAG()
+        self.chat_history = MessageStore(capacity=int(os.getenv("CHAT_HISTORY_CAPACITY", 1000)),
+                                         spill_path=os.getenv("CHAT_HISTORY_SPILL_PATH"))
+        # Share the swarm's store rather than opening a second client on the same directory
+        self.rag = swarm.shared_rag
 
     async def start_chat(self):
         print("Welcome to the Agent Chat Environment!")
@@ -41,30 +47,32 @@ class ChatEnvironment:
             # Broadcast message to all agents
             await self.broadcast_message("User", user_input)
 
+    @traced()
     async def send_message_to_agent(self, agent_name: str, message: str):
         agent = self.swarm.get_agent_by_name(agent_name)
         if agent:
             response = await agent.ask_question(message)
-            self.chat_history.append({"sender": "User", "receiver": agent_name, "message": message})
-            self.chat_history.append({"sender": agent_name, "receiver": "User", "message": response})
+            self.chat_history.append("User", agent_name, message)
+            self.chat_history.append(agent_name, "User", response)
             print(f"{agent_name}: {response}")
         else:
             print(f"Agent {agent_name} not found.")
 
+    @traced()
     async def broadcast_message(self, sender: str, message: str):
-        self.chat_history.append({"sender": sender, "receiver": "All", "message": message})
+        self.chat_history.append(sender, "All", message)
         print(f"{sender} (to all): {message}")
         
         responses = await asyncio.gather(*[agent.ask_question(message) for agent in self.swarm.agents if agent.activated])
         
         for agent, response in zip(self.swarm.agents, responses):
             if agent.activated:
-                self.chat_history.append({"sender": agent.name, "receiver": "All", "message": response})
+                self.chat_history.append(agent.name, "All", response)
                 print(f"{agent.name}: {response}")
 
     async def agent_message(self, sender: 'Agent', message: str, receiver: 'Agent' = None):
         if receiver:
-            self.chat_history.append({"sender": sender.name, "receiver": receiver.name, "message": message})
+            self.chat_history.append(sender.name, receiver.name, message)
             await self.store_message_in_rag(sender.name, receiver.name, message)
             await context_manager.add_to_context({"sender": sender.name, "receiver": receiver.name, "message": message})
             await receiver.process_incoming_message(sender, message)
@@ -72,18 +80,22 @@ class ChatEnvironment:
             await self.broadcast_message(sender.name, message)
 
     async def store_message_in_rag(self, sender: str, receiver: str, message: str):
+        if not self.rag:
+            return
         context = f"Message from {sender} to {receiver}: {message}"
-        await store_information(self.rag, context)
+        await store_information(self.rag, context, wait=False,
+                                metadata={"type": "message", "sender": sender, "receiver": receiver})
 
     async def get_relevant_context(self, query: str) -> str:
-        return await llm_core.get_relevant_context(query, self.swarm.project_overview, self.chat_history)
+        selection = context_selector.select(query, list(self.chat_history))
+        return await llm_core.get_relevant_context(query, self.swarm.project_overview, selection.entries)
 
     def display_chat_history(self):
-        for entry in self.chat_history:
-            if entry["receiver"] == "All":
-                print(f"{entry['sender']} (to all): {entry['message']}")
+        for entry in self.chat_history.history():
+            if entry.receiver == "All":
+                print(f"{entry.sender} (to all): {entry.message}")
             else:
-                print(f"{entry['sender']} to {entry['receiver']}: {entry['message']}")
+                print(f"{entry.sender} to {entry.receiver}: {entry.message}")
 
 async def initialize_chat_environment(swarm: 'Swarm') -> ChatEnvironment:
     chat_env = ChatEnvironment(swarm)
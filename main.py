@@ -1,7 +1,9 @@
 import os
+import argparse
 import asyncio
 from typing import List, Dict, Any
-from ensemble.swarmify import initialize_swarm, run_swarm
+from ensemble.swarmify import Swarm, initialize_swarm, run_swarm, close_shared_resources
+from ensemble.checkpoint import DEFAULT_CHECKPOINT_PATH, SwarmCheckpoint, resume_swarm
 from tools.file_operations import FileOperations
 import logging
 
@@ -9,28 +11,55 @@ import logging
 logging.getLogger("openai").disabled = True
 logging.getLogger("httpx").disabled = True
 
-async def main():
-    project_goal = input("Enter the project goal: ")
-    project_overview = input("Enter a brief project overview: ")
-    
+def parse_args():
+    parser = argparse.ArgumentParser(description="Plan and run an agent swarm for a project goal.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the checkpoint, reusing its assistants and threads, instead of planning anew")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Where swarm state is checkpointed")
+    parser.add_argument("--clear-tasks", action="store_true",
+                        help="Empty the task store before planning; a SQLite store may be shared with other processes")
+    parser.add_argument("--max-iterations", type=int, default=10, help="Stop after this many iterations")
+    return parser.parse_args()
+
+async def main(args):
+    if args.resume:
+        if not SwarmCheckpoint(args.checkpoint).exists():
+            logging.error(f"No checkpoint found at {args.checkpoint}")
+            return
+        try:
+            swarm = await resume_swarm(args.checkpoint)
+        except Exception as e:
+            logging.error(f"Error resuming swarm: {str(e)}")
+            return
+    else:
+        project_goal = input("Enter the project goal: ")
+        project_overview = input("Enter a brief project overview: ")
+
+        try:
+            swarm = await initialize_swarm(project_goal, project_overview, clear_tasks=args.clear_tasks,
+                                           checkpoint_path=args.checkpoint)
+        except Exception as e:
+            logging.error(f"Error initializing swarm: {str(e)}")
+            return
+
     try:
-        swarm = await initialize_swarm(project_goal, project_overview)
-    except Exception as e:
-        logging.error(f"Error initializing swarm: {str(e)}")
-        return
+        await run_session(swarm, args.max_iterations)
+    finally:
+        # Drains the swarm's queues and closes its stores on errors and Ctrl-C too
+        await swarm.shutdown()
 
+async def run_session(swarm: Swarm, max_iterations: int):
     print("\nCreated agents:")
     for agent in swarm.agents:
         print(f"- {agent.name} ({agent.role})")
     
     print("\nInitial tasks:")
-    for task in swarm.tasks:
+    for task in swarm.scheduler.iter_tasks("pending"):
         print(f"- {task['description']} (Role: {task['role']}, Priority: {task['priority']}, ID: {task['id']}, Dependencies: {task['dependencies']})")
 
     file_ops = FileOperations()
 
     iteration_count = 0
-    max_iterations = 10  # Set a maximum number of iterations to prevent endless loops
 
     while iteration_count < max_iterations:
         iteration_count += 1
@@ -53,15 +82,15 @@ async def main():
             logging.info("No files were created in this iteration.")
 
         # Check if all tasks are completed
-        if not swarm.tasks:
+        if not len(swarm.scheduler):
             logging.info("All tasks completed!")
             break
 
         print("\nCurrent tasks:")
-        for task in swarm.tasks:
+        for task in swarm.scheduler.iter_tasks("pending"):
             print(f"- {task['description']} (Role: {task['role']}, Priority: {task['priority']}, ID: {task['id']}, Dependencies: {task['dependencies']})")
         print("\nCompleted tasks:")
-        for task in swarm.completed_tasks:
+        for task in swarm.scheduler.iter_tasks("completed"):
             print(f"- {task['description']} (Role: {task['role']}, ID: {task['id']})")
 
         user_input = input("\nPress Enter to continue to the next iteration, or 'q' to quit: ")
@@ -73,10 +102,10 @@ async def main():
 
     print("\nFinal state:")
     print("Remaining tasks:")
-    for task in swarm.tasks:
+    for task in swarm.scheduler.iter_tasks("pending"):
         print(f"- {task['description']} (Role: {task['role']}, Priority: {task['priority']}, ID: {task['id']}, Dependencies: {task['dependencies']})")
     print("\nCompleted tasks:")
-    for task in swarm.completed_tasks:
+    for task in swarm.scheduler.iter_tasks("completed"):
         print(f"- {task['description']} (Role: {task['role']}, ID: {task['id']})")
 
     files = file_ops.list_files()
@@ -89,5 +118,15 @@ async def main():
     else:
         print("\nNo files were created during the entire run.")
 
+async def run(args):
+    try:
+        await main(args)
+    finally:
+        # Process-wide clients and caches are shared by every swarm, so they close once, at exit
+        await close_shared_resources()
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parse_args()
+    # Configured here rather than on import, so library users keep control of logging
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args))
\ No newline at end of file
@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from concurrency.backends import LLMBackend, create_backend
+from concurrency.fake_backend import FakeBackend
+from concurrency.metrics import CallRecord
+
+def test_incomplete_backend_fails_on_instantiation():
+    class ContentOnly(LLMBackend):
+        async def generate_content(self, prompt, record):
+            return ""
+
+    with pytest.raises(TypeError):
+        ContentOnly()
+
+def test_create_backend():
+    assert isinstance(create_backend("fake"), FakeBackend)
+    with pytest.raises(ValueError):
+        create_backend("nope")
+
+
+def _event(name, **data):
+    return SimpleNamespace(event=name, data=SimpleNamespace(**data))
+
+class StubStream:
+    def __init__(self, events, error=None):
+        self.events = events
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield event
+        if self.error is not None:
+            raise self.error
+
+class StubRuns:
+    """Assistants run API: create() returns the next stream (or raises it), retrieve() walks statuses."""
+
+    def __init__(self, streams=(), statuses=()):
+        self.streams = list(streams)
+        self.statuses = list(statuses)
+
+    async def create(self, thread_id, assistant_id, stream=False):
+        if not stream:
+            return SimpleNamespace(id="run_1")
+        result = self.streams.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def retrieve(self, thread_id, run_id):
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+        return SimpleNamespace(id=run_id, status=self.statuses.pop(0), usage=usage, last_error=None)
+
+    async def submit_tool_outputs(self, thread_id, run_id, tool_outputs, stream=False):
+        return self.streams.pop(0) if stream else None
+
+@pytest.fixture
+def openai_backend(monkeypatch):
+    from concurrency.openai_backend import OpenAIGeminiBackend
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    backend = OpenAIGeminiBackend(poll_floor=0.01, poll_ceiling=0.03, poll_multiplier=2)
+
+    def install(runs):
+        async def create_message(**kwargs):
+            pass
+
+        async def list_messages(thread_id, limit):
+            return SimpleNamespace(data=[SimpleNamespace(content=[SimpleNamespace(text=SimpleNamespace(value="polled"))])])
+
+        messages = SimpleNamespace(create=create_message, list=list_messages)
+        backend.openai_client = SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=runs, messages=messages)))
+        return backend
+
+    yield install
+    asyncio.run(backend.http_client.aclose())
+
+def _run(backend):
+    record = CallRecord("openai", "model", "run_thread", backend.completion_mode)
+    return asyncio.run(backend.run_thread("thread_1", "asst_1", "prompt", record)), record
+
+def test_stream_returns_the_completed_message(openai_backend):
+    usage = SimpleNamespace(prompt_tokens=7, completion_tokens=3)
+    backend = openai_backend(StubRuns(streams=[StubStream([
+        _event("thread.run.created", id="run_1"),
+        _event("thread.message.delta"),
+        _event("thread.message.completed", content=[SimpleNamespace(text=SimpleNamespace(value="streamed"))]),
+        _event("thread.run.completed", usage=usage),
+    ])]))
+    response, record = _run(backend)
+    assert response == "streamed"
+    assert record.mode == "stream" and record.polls == 0
+    assert (record.prompt_tokens, record.completion_tokens) == (7, 3)
+    assert record.first_token_at is not None
+
+def test_stream_unavailable_falls_back_to_polling(openai_backend, monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    async def recording_sleep(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr("concurrency.openai_backend.asyncio.sleep", recording_sleep)
+    error = openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+    backend = openai_backend(StubRuns(streams=[error], statuses=["queued"] * 4 + ["completed"]))
+    response, record = _run(backend)
+    assert response == "polled"
+    assert record.mode == "poll" and record.polls == 5
+    # Backoff doubles from the floor and stops at the ceiling
+    assert delays == pytest.approx([0.01, 0.02, 0.03, 0.03])
+
+def test_broken_stream_finishes_the_run_by_polling(openai_backend):
+    stream = StubStream([_event("thread.run.created", id="run_1")], error=httpx.ReadError("connection reset"))
+    backend = openai_backend(StubRuns(streams=[stream], statuses=["in_progress", "completed"]))
+    response, record = _run(backend)
+    assert response == "polled"
+    assert record.mode == "stream+poll" and record.polls == 2
@@ -0,0 +1,42 @@
+from tools.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+def make_index():
+    index = BM25Index()
+    index.add("auth", "Implement login and session handling in src/auth.py", {"kind": "code"})
+    index.add("db", "Create the database schema and migrations", {"kind": "code"})
+    index.add("docs", "Write user documentation for login", {"kind": "docs"})
+    return index
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("Fix task-12 in src/main.py") == [
+        "fix", "task-12", "task", "12", "in", "src/main.py", "src", "main", "py"]
+
+def test_search_ranks_by_term_rarity():
+    index = make_index()
+    hits = index.search("login session", k=3)
+    assert [doc_id for doc_id, _ in hits] == ["auth", "docs"]
+    assert hits[0][1] > hits[1][1] > 0
+    assert [doc_id for doc_id, _ in index.search("login", filter={"kind": "docs"})] == ["docs"]
+
+def test_add_is_incremental_and_ignores_duplicate_ids():
+    index = make_index()
+    assert index.idf("login") < index.idf("schema")
+    total = index.total_length
+    index.add("db", "something else entirely")
+    assert len(index) == 3 and index.total_length == total
+    index.add("cache", "Cache database query results")
+    assert "cache" in index
+    assert [doc_id for doc_id, _ in index.search("database", k=2)] in (["db", "cache"], ["cache", "db"])
+
+def test_is_confident_needs_every_term_and_a_clear_margin():
+    index = make_index()
+    assert index.is_confident("src/auth.py", index.search("src/auth.py"))
+    assert not index.is_confident("login", index.search("login"))
+    assert not index.is_confident("login schema", index.search("login schema"))
+    assert not index.is_confident("anything", [])
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"], ["b", "a"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c"}
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,96 @@
+import asyncio
+
+from concurrency.fake_backend import FakeBackend
+from concurrency.llm_core import llm_core
+from ensemble.checkpoint import SwarmCheckpoint
+from ensemble.swarmify import Swarm
+
+def _task(task_id: str, dependencies=()):
+    return {"id": task_id, "description": f"Task {task_id}", "role": "Developer", "priority": 1,
+            "dependencies": list(dependencies)}
+
+def _lines(path) -> int:
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+def test_save_appends_only_changes(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+
+    async def scenario():
+        llm_core.set_backend(FakeBackend())
+        swarm = Swarm(use_rag=False, checkpoint_path=path)
+        swarm.goal = "Build it"
+        for number in range(20):
+            swarm.scheduler.add(_task(f"t{number}"))
+        await swarm.save_checkpoint()
+        snapshot_lines = _lines(path)
+
+        swarm.scheduler.complete("t0")
+        await swarm.save_checkpoint()
+        # Only the completed task's entry is journaled, not the other 19
+        assert _lines(path) == snapshot_lines + 1
+        await swarm.save_checkpoint()
+        assert _lines(path) == snapshot_lines + 1
+
+        state = SwarmCheckpoint(path).load()
+        assert state["goal"] == "Build it"
+        assert [task["id"] for task in state["completed_tasks"]] == ["t0"]
+        assert len(state["tasks"]) == 19
+        await swarm.shutdown()
+        await llm_core.aclose()
+
+    asyncio.run(scenario())
+
+def test_journal_is_compacted(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+
+    async def scenario():
+        llm_core.set_backend(FakeBackend())
+        swarm = Swarm(use_rag=False)
+        swarm.checkpoint = SwarmCheckpoint(path, compact_entries=3)
+        for number in range(5):
+            swarm.scheduler.add(_task(f"t{number}"))
+        await swarm.save_checkpoint()
+        for number in range(5):
+            swarm.iteration += 1
+            swarm.scheduler.complete(f"t{number}")
+            await swarm.save_checkpoint()
+
+        assert swarm.checkpoint.compactions > 1
+        # A torn last append is skipped rather than failing the resume
+        with open(path, 'a') as f:
+            f.write('{"key": "iteration", "val')
+        state = SwarmCheckpoint(path).load()
+        assert state["iteration"] == 5
+        assert len(state["completed_tasks"]) == 5 and not state["tasks"]
+        await swarm.shutdown()
+        await llm_core.aclose()
+
+    asyncio.run(scenario())
+
+def test_failed_write_is_retried_by_the_next_save(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+
+    async def scenario():
+        llm_core.set_backend(FakeBackend())
+        swarm = Swarm(use_rag=False, checkpoint_path=path)
+        swarm.scheduler.add(_task("t1"))
+        await swarm.save_checkpoint()
+
+        append = swarm.checkpoint._append
+
+        def full_disk(lines):
+            raise OSError("No space left on device")
+
+        swarm.checkpoint._append = full_disk
+        swarm.scheduler.complete("t1")
+        await swarm.save_checkpoint()
+        swarm.checkpoint._append = append
+        await swarm.save_checkpoint()
+
+        state = SwarmCheckpoint(path).load()
+        assert [task["id"] for task in state["completed_tasks"]] == ["t1"]
+        await swarm.shutdown()
+        await llm_core.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+from tools.context_selection import ContextSelector
+from tools.embeddings import HashingEmbeddings
+
+ENTRIES = [
+    {"task": "Set up the database schema", "result": "Created tables for users and orders " * 5},
+    {"task": "Write the login page", "result": "Added a login form with session cookies " * 5},
+    {"task": "Tune the database indexes", "result": "Indexed orders by user and date " * 5},
+    {"task": "Draft release notes", "result": "Summarised the changes for the release " * 5},
+]
+
+def cost(entries):
+    return sum(len(str(entry)) // 4 + 1 for entry in entries)
+
+# Room for any single entry but never two
+ONE_ENTRY = max(cost([entry]) for entry in ENTRIES)
+
+def test_everything_fits_under_the_budget():
+    selector = ContextSelector(token_budget=10000)
+    result = selector.select("database", ENTRIES)
+    assert result.entries == ENTRIES
+    assert result.tokens_saved == 0
+
+def test_budget_keeps_relevant_entries_in_original_order():
+    selector = ContextSelector(token_budget=cost(ENTRIES[:2]), recency_weight=0.1)
+    result = selector.select("database schema indexes", ENTRIES)
+    assert result.entries == [ENTRIES[0], ENTRIES[2]]
+    assert result.tokens_after <= selector.token_budget
+    assert result.tokens_before == cost(ENTRIES)
+    assert selector.stats()["tokens_saved"] == result.tokens_saved > 0
+
+def test_recency_breaks_ties_without_relevance():
+    selector = ContextSelector(token_budget=ONE_ENTRY)
+    result = selector.select("unrelated query", ENTRIES)
+    assert result.entries == [ENTRIES[-1]]
+
+def test_max_entries_caps_the_selection():
+    selector = ContextSelector(token_budget=10000, max_entries=2)
+    result = selector.select("login", ENTRIES)
+    assert len(result.entries) == 2
+    assert ENTRIES[1] in result.entries
+
+def test_embedding_scorer_respects_the_budget():
+    selector = ContextSelector(token_budget=ONE_ENTRY, recency_weight=0.0, embeddings=HashingEmbeddings())
+    result = selector.select("login form session cookies", ENTRIES)
+    assert result.entries == [ENTRIES[1]]
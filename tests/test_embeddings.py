@@ -0,0 +1,15 @@
+import numpy as np
+
+from tools.embeddings import HashingEmbeddings, FEATURE_CACHE_SIZE, _hashed_feature
+
+def test_vectors_are_normalised_and_deterministic():
+    embeddings = HashingEmbeddings(dim=64)
+    first, second, empty = embeddings.encode(["the quick brown fox", "the quick brown fox", ""])
+    assert np.allclose(first, second)
+    assert np.isclose(np.linalg.norm(first), 1.0)
+    assert not empty.any()
+
+def test_feature_cache_is_bounded():
+    embeddings = HashingEmbeddings(dim=64)
+    embeddings.encode([" ".join(f"word{i}" for i in range(FEATURE_CACHE_SIZE + 1000))])
+    assert _hashed_feature.cache_info().currsize <= FEATURE_CACHE_SIZE
@@ -0,0 +1,97 @@
+import asyncio
+
+from tools import rag_utils
+from tools.rag_utils import IngestQueue
+
+class FlakyRAG:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.uploads = []
+
+    async def upload_data(self, texts, metadatas=None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("store unavailable")
+        self.uploads.append(list(texts))
+
+def test_failed_batch_stays_queued_and_is_retried(monkeypatch):
+    monkeypatch.setattr(rag_utils, "INGEST_RETRY_BASE_DELAY", 0.01)
+
+    async def scenario():
+        rag = FlakyRAG(failures=2)
+        queue = IngestQueue(rag, batch_size=2, flush_interval=0.01, max_attempts=5)
+        queue.submit(["a", "b", "c"])
+        await queue.flush()
+        assert queue.buffer == ["a", "b", "c"]
+        queue.submit(["d"])
+        await queue.aclose()
+        return rag, queue
+
+    rag, queue = asyncio.run(scenario())
+    assert rag.uploads == [["a", "b"], ["c", "d"]]
+    assert queue.stats()["failed_flushes"] == 2
+    assert queue.stats()["dropped_texts"] == 0
+    assert queue.buffer == []
+
+def test_batch_dropped_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(rag_utils, "INGEST_RETRY_BASE_DELAY", 0.01)
+
+    async def scenario():
+        rag = FlakyRAG(failures=3)
+        queue = IngestQueue(rag, batch_size=2, flush_interval=0.01, max_attempts=3)
+        queue.submit(["a", "b", "c"], [{"n": 1}, {"n": 2}, {"n": 3}])
+        await queue.aclose()
+        return rag, queue
+
+    rag, queue = asyncio.run(scenario())
+    assert rag.uploads == [["c"]]
+    assert queue.stats()["dropped_texts"] == 2
+    assert queue.metadatas == []
+
+def test_worker_retries_in_background(monkeypatch):
+    monkeypatch.setattr(rag_utils, "INGEST_RETRY_BASE_DELAY", 0.01)
+
+    async def scenario():
+        rag = FlakyRAG(failures=1)
+        queue = IngestQueue(rag, batch_size=1, flush_interval=0.01)
+        queue.submit(["a"])
+        for _ in range(100):
+            if rag.uploads:
+                break
+            await asyncio.sleep(0.01)
+        await queue.aclose()
+        return rag
+
+    assert asyncio.run(scenario()).uploads == [["a"]]
+
+def test_flush_during_backoff_keeps_attempts(monkeypatch):
+    monkeypatch.setattr(rag_utils, "INGEST_RETRY_BASE_DELAY", 60)
+
+    async def scenario():
+        rag = FlakyRAG(failures=10)
+        queue = IngestQueue(rag, batch_size=2, flush_interval=60, max_attempts=3)
+        queue.submit(["a", "b"])
+        # A burst of consistent reads while the store is down
+        for _ in range(5):
+            await queue.flush()
+        assert queue.stats()["failed_flushes"] == 1
+        assert queue.buffer == ["a", "b"]
+        await queue.aclose()
+
+    asyncio.run(scenario())
+
+def test_aclose_gives_up_at_its_deadline(monkeypatch):
+    monkeypatch.setattr(rag_utils, "INGEST_RETRY_BASE_DELAY", 0.05)
+
+    async def scenario():
+        rag = FlakyRAG(failures=1000)
+        queue = IngestQueue(rag, batch_size=2, flush_interval=0.01, max_attempts=1000, close_timeout=0.2)
+        queue.submit(["a", "b", "c"])
+        start = asyncio.get_running_loop().time()
+        await queue.aclose()
+        return queue, asyncio.get_running_loop().time() - start
+
+    queue, elapsed = asyncio.run(scenario())
+    assert elapsed < 1.0
+    assert queue.buffer == [] and queue.metadatas == []
+    assert queue.stats()["dropped_texts"] == 3
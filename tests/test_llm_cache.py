@@ -0,0 +1,61 @@
+import asyncio
+
+from concurrency.llm_cache import ResponseCache
+
+def test_memory_tier_evicts_least_recently_used():
+    async def scenario():
+        cache = ResponseCache(max_entries=2, ttl=None)
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        assert await cache.get("a") == "1"
+        await cache.set("c", "3")
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "1"
+        assert await cache.get("c") == "3"
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert (stats["hits"], stats["misses"]) == (3, 1)
+
+    asyncio.run(scenario())
+
+def test_expired_entries_are_misses(monkeypatch):
+    import concurrency.llm_cache as llm_cache
+
+    async def scenario():
+        now = [1000.0]
+        monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+        cache = ResponseCache(ttl=60)
+        await cache.set("key", "value")
+        now[0] += 30
+        assert await cache.get("key") == "value"
+        now[0] += 31
+        assert await cache.get("key") is None
+        assert cache.stats()["expirations"] == 1
+        assert "key" not in cache.memory
+
+    asyncio.run(scenario())
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    key = ResponseCache.make_key("model", "instructions", "prompt")
+
+    async def scenario():
+        cache = ResponseCache(path=path)
+        await cache.set(key, "answer")
+        cache.close()
+
+        reopened = ResponseCache(max_entries=1, path=path)
+        assert await reopened.get(key) == "answer"
+        assert reopened.stats()["disk_hits"] == 1
+        # Promoted into memory, so the second lookup skips the disk
+        assert await reopened.get(key) == "answer"
+        assert reopened.stats()["disk_hits"] == 1
+        reopened.close()
+
+    asyncio.run(scenario())
+
+def test_keys_depend_on_model_instructions_and_prompt():
+    key = ResponseCache.make_key("model", "instructions", "prompt")
+    assert key == ResponseCache.make_key("model", "instructions", "prompt")
+    assert key != ResponseCache.make_key("other", "instructions", "prompt")
+    assert key != ResponseCache.make_key("model", "instructions", "another prompt")
@@ -0,0 +1,78 @@
+import asyncio
+
+from concurrency.llm_core import LLMCore
+from concurrency.openai_backend import OpenAIGeminiBackend
+
+def test_aclose_releases_client_and_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_ASSISTANT_POOL_PATH", str(tmp_path / "assistants.json"))
+    backend = OpenAIGeminiBackend()
+    core = LLMCore(backend)
+    core.enable_cache(path=str(tmp_path / "responses.sqlite3"))
+    cache = core.cache
+
+    asyncio.run(core.aclose())
+
+    assert backend.http_client.is_closed
+    assert core.cache is None
+    assert cache._db is None
+    # A later call builds a fresh backend instead of reusing the closed client
+    assert core._backend is None
+
+def test_aclose_without_backend_is_noop():
+    core = LLMCore()
+    asyncio.run(core.aclose())
+    assert core._backend is None
+
+def test_same_named_agents_keep_their_own_assistants():
+    from concurrency.fake_backend import FakeBackend
+
+    async def scenario():
+        core = LLMCore(FakeBackend())
+        first = await core.create_assistant("DevBot", "Swarm one instructions", [], key="DevBot#1")
+        second = await core.create_assistant("DevBot", "Swarm two instructions", [], key="DevBot#2")
+        assert first != second
+        assert core.assistants["DevBot#1"]["id"] == first
+        assert core.assistant_pool.stats()["in_use"] == 2
+        # Forcing one owner out must not delete the assistant the other is still using
+        await core.delete_assistant("DevBot#1", force=True)
+        assert core.assistant_pool.stats()["in_use"] == 1
+        thread_id = await core.create_thread()
+        assert await core.generate_response("DevBot#2", "hello", thread_id)
+        await core.aclose()
+
+    asyncio.run(scenario())
+
+def test_bound_tools_are_per_assistant():
+    from concurrency.fake_backend import FakeBackend
+
+    async def scenario():
+        core = LLMCore(FakeBackend(tool_scripts=[("look it up", [("get_knowledge", {"query": "q"})])]))
+        core.register_tool_function("get_knowledge", lambda query: "shared")
+        for key, answer in (("DevBot#1", "swarm one"), ("DevBot#2", "swarm two")):
+            await core.create_assistant("DevBot", f"{key} instructions", [], key=key)
+            core.bind_tools(key, {"get_knowledge": lambda query, answer=answer: answer})
+        await core.create_assistant("Other", "unbound", [], key="Other#3")
+        thread_id = await core.create_thread()
+        assert "[get_knowledge] swarm one" in await core.generate_response("DevBot#1", "look it up", thread_id)
+        assert "[get_knowledge] swarm two" in await core.generate_response("DevBot#2", "look it up", thread_id)
+        assert "[get_knowledge] shared" in await core.generate_response("Other#3", "look it up", thread_id)
+        await core.aclose()
+
+    asyncio.run(scenario())
+
+def test_singleton_survives_a_second_event_loop():
+    from concurrency.fake_backend import FakeBackend, LatencyModel
+    from concurrency.llm_core import llm_core
+
+    async def burst():
+        llm_core.set_backend(FakeBackend(latency={"content": LatencyModel.parse("constant:0.01")}))
+        # More calls than the initial AIMD window, so waiters bind its condition to this loop
+        responses = await asyncio.gather(*[llm_core.gemini_generate_content(f"prompt {n}", use_cache=False)
+                                           for n in range(10)])
+        await llm_core.aclose()
+        return responses
+
+    assert all(asyncio.run(burst()))
+    assert all(asyncio.run(burst()))
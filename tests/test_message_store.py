@@ -0,0 +1,45 @@
+from tools.message_store import MessageStore
+
+def fill(store, count):
+    for i in range(count):
+        store.append(f"agent{i % 2}", "manager" if i % 3 else "agent0", f"message {i}")
+
+def test_ring_buffer_keeps_the_newest_messages():
+    store = MessageStore(capacity=4)
+    fill(store, 10)
+    assert len(store) == 4
+    assert store.oldest_seq == 6
+    assert [record.message for record in store] == ["message 6", "message 7", "message 8", "message 9"]
+    assert [record.seq for record in store.last(2)] == [8, 9]
+    assert len(store.last(100)) == 4
+
+def test_indexes_follow_evictions():
+    store = MessageStore(capacity=4)
+    fill(store, 10)
+    assert [record.seq for record in store.by_sender("agent0")] == [6, 8]
+    assert [record.seq for record in store.by_receiver("agent0")] == [6, 9]
+    assert [record.seq for record in store.by_receiver("manager")] == [7, 8]
+    assert store.by_sender("nobody") == []
+
+def test_records_read_like_the_old_dicts():
+    store = MessageStore(capacity=2)
+    record = store.append("agent0", "manager", "hello")
+    assert record["sender"] == "agent0"
+    assert repr(record) == repr({"sender": "agent0", "receiver": "manager", "message": "hello"})
+
+def test_evicted_messages_spill_and_stay_in_history(tmp_path):
+    store = MessageStore(capacity=3, spill_path=str(tmp_path / "spill" / "messages.jsonl"))
+    fill(store, 8)
+    assert store.spilled_count == 5
+    assert [record.seq for record in store.spilled()] == [0, 1, 2, 3, 4]
+    assert [record.message for record in store.history()] == [f"message {i}" for i in range(8)]
+    store.close()
+    # The log outlives the store
+    reopened = MessageStore(capacity=3, spill_path=str(tmp_path / "spill" / "messages.jsonl"))
+    assert len(list(reopened.spilled())) == 5
+
+def test_history_without_spill_is_the_window():
+    store = MessageStore(capacity=3)
+    fill(store, 5)
+    assert [record.seq for record in store.history()] == [2, 3, 4]
+    assert store.spilled_count == 0
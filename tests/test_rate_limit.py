@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+from concurrency.rate_limit import AIMDController, RateLimiter, TokenBucket, error_status
+
+class ThrottleError(Exception):
+    status_code = 429
+    retry_after = 0.2
+
+def test_token_bucket_spends_its_burst_then_waits_for_refill():
+    async def scenario():
+        bucket = TokenBucket(per_minute=600, capacity=2)  # 10 per second
+        assert await bucket.acquire() == pytest.approx(0, abs=0.01)
+        assert await bucket.acquire() == pytest.approx(0, abs=0.01)
+        waited = await bucket.acquire()
+        assert 0.07 <= waited <= 0.3
+
+    asyncio.run(scenario())
+
+def test_token_bucket_block_for_delays_acquire():
+    async def scenario():
+        bucket = TokenBucket(per_minute=6000)
+        bucket.block_for(0.1)
+        assert bucket.state()["blocked_for"] > 0
+        assert await bucket.acquire() >= 0.09
+
+    asyncio.run(scenario())
+
+def test_aimd_window_caps_concurrency_and_adapts():
+    async def scenario():
+        controller = AIMDController(initial=2, maximum=4, cooldown=10)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            await controller.acquire()
+            peak = max(peak, controller.inflight)
+            await asyncio.sleep(0.01)
+            await controller.release()
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        assert peak == 2
+        # Additive increase: 1/window per success
+        assert controller.window > 2 and controller.successes == 6
+
+        window = controller.window
+        for _ in range(3):
+            await controller.acquire()
+        for _ in range(3):
+            await controller.release(throttled=True)
+        # A burst of throttled calls inside the cooldown halves the window once
+        assert controller.window == pytest.approx(window / 2)
+        assert controller.backoffs == 1
+
+    asyncio.run(scenario())
+
+def test_throttled_slot_blocks_buckets_for_retry_after():
+    async def scenario():
+        limiter = RateLimiter({"fake": {"rpm": 6000, "tpm": 600000}}, initial_window=4)
+        with pytest.raises(ThrottleError):
+            async with limiter.slot("fake", "model", tokens=10):
+                raise ThrottleError()
+        state = limiter.state()
+        assert state["throttled"] == 1
+        assert state["controllers"]["fake"]["backoffs"] == 1
+        assert state["controllers"]["fake"]["inflight"] == 0
+        start = time.monotonic()
+        async with limiter.slot("fake", "model", tokens=10) as slot:
+            pass
+        assert time.monotonic() - start >= 0.15
+        assert slot.wait >= 0.15
+
+    asyncio.run(scenario())
+
+def test_error_status_reads_retry_after_headers():
+    class Response:
+        headers = {"retry-after-ms": "1500"}
+
+    class ProviderError(Exception):
+        status_code = 503
+        response = Response()
+
+    assert error_status(ProviderError()) == (503, 1.5)
+    assert error_status(ValueError()) == (None, None)
@@ -0,0 +1,107 @@
+import asyncio
+
+from tools.search_ingest import SearchIngestor
+
+PAGE = "<html><body><p>{}</p></body></html>"
+
+class _Splitter:
+    def split_text(self, text):
+        return text.split("\n\n")
+
+class _RAG:
+    """Stores chunks by content; uploaded also counts what other uploaders add."""
+
+    text_splitter = _Splitter()
+
+    def __init__(self):
+        self.ids = set()
+        self.uploaded = 0
+
+    @staticmethod
+    def document_id(text):
+        return text
+
+    async def upload_data(self, texts, metadatas=None):
+        new_ids = [text for text in dict.fromkeys(texts) if text not in self.ids]
+        self.ids.update(new_ids)
+        self.uploaded += len(new_ids)
+        return new_ids
+
+class _WebSearch:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    async def fetch(self, url, max_bytes=None):
+        self.fetched.append(url)
+        page = self.pages[url]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+def _result(url):
+    return {"url": url, "title": f"Title of {url}", "snippet": f"Snippet describing {url}"}
+
+def test_failed_fetch_is_retried_by_later_searches():
+    web = _WebSearch({"https://a": ConnectionError("reset"),
+                      "https://b": PAGE.format("A long enough paragraph about the second page.")})
+    ingestor = SearchIngestor(_RAG(), lambda: web)
+
+    async def scenario():
+        await ingestor.ingest([_result("https://a"), _result("https://b"), _result("https://b")], "q")
+        assert sorted(web.fetched) == ["https://a", "https://b"]
+        assert list(ingestor.seen_urls) == ["https://b"]
+
+        web.pages["https://a"] = PAGE.format("A long enough paragraph about the first page.")
+        await ingestor.ingest([_result("https://a"), _result("https://b")], "q")
+        assert web.fetched[2:] == ["https://a"]
+
+    asyncio.run(scenario())
+    assert ingestor.skipped_urls == 2
+
+def test_new_chunks_ignores_concurrent_uploads():
+    rag = _RAG()
+    web = _WebSearch({"https://a": PAGE.format("A long enough paragraph about the first page.")})
+    ingestor = SearchIngestor(rag, lambda: web)
+
+    async def scenario():
+        upload = rag.upload_data
+
+        async def busy_upload(texts, metadatas=None):
+            # Another swarm sharing the RAG uploads at the same time
+            await upload([f"unrelated chunk {n}" for n in range(5)])
+            return await upload(texts, metadatas)
+
+        rag.upload_data = busy_upload
+        return await ingestor.ingest([_result("https://a")], "q")
+
+    learned = asyncio.run(scenario())
+    assert learned["new_chunks"] == 1
+    assert rag.uploaded == 6
+
+def test_pages_of_a_failed_batch_are_retried():
+    rag = _RAG()
+    web = _WebSearch({"https://a": PAGE.format("A long enough paragraph about the first page."),
+                      "https://b": PAGE.format("A long enough paragraph about the second page.")})
+    ingestor = SearchIngestor(rag, lambda: web, batch_size=1, fetch_concurrency=1)
+    upload = rag.upload_data
+    failures = [RuntimeError("store unavailable")]
+
+    async def flaky_upload(texts, metadatas=None):
+        if failures:
+            raise failures.pop()
+        return await upload(texts, metadatas)
+
+    rag.upload_data = flaky_upload
+
+    async def scenario():
+        first = await ingestor.ingest([_result("https://a"), _result("https://b")], "q")
+        assert first["new_chunks"] == 1 and ingestor.failed_batches == 1
+        assert len(ingestor.seen_urls) == 1 and len(ingestor.seen_pages) == 1
+        return await ingestor.ingest([_result("https://a"), _result("https://b")], "q")
+
+    second = asyncio.run(scenario())
+    # Only the page whose batch failed is fetched and uploaded again
+    assert second["new_chunks"] == 1
+    assert len(web.fetched) == 3
+    assert len(rag.ids) == 2
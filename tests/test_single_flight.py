@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from concurrency.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_upstream_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def upstream():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(5)))
+        assert results == ["answer"] * 5
+        assert calls == 1
+        assert flight.stats() == {"inflight": 0, "upstream_calls": 1, "saved_calls": 4, "cancelled_upstream": 0}
+
+    asyncio.run(scenario())
+
+def test_every_waiter_gets_the_leader_exception():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not flight.inflight
+
+    asyncio.run(scenario())
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        upstream_cancelled = False
+
+        async def upstream():
+            nonlocal upstream_cancelled
+            try:
+                await asyncio.sleep(0.05)
+                return "answer"
+            except asyncio.CancelledError:
+                upstream_cancelled = True
+                raise
+
+        leader = asyncio.create_task(flight.do("key", upstream))
+        follower = asyncio.create_task(flight.do("key", upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "answer"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert not upstream_cancelled
+        assert flight.stats()["cancelled_upstream"] == 0
+
+    asyncio.run(scenario())
+
+def test_last_waiter_leaving_cancels_upstream_and_frees_the_key():
+    async def scenario():
+        flight = SingleFlight()
+        started = 0
+
+        async def upstream():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.05)
+            return started
+
+        waiters = [asyncio.create_task(flight.do("key", upstream)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert flight.stats()["cancelled_upstream"] == 1
+        assert not flight.inflight
+        # A later caller starts a fresh upstream call instead of joining the cancelled one
+        assert await flight.do("key", upstream) == 2
+
+    asyncio.run(scenario())
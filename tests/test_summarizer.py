@@ -0,0 +1,47 @@
+import asyncio
+
+from tools.message_store import MessageStore
+from tools.summarizer import RollingSummarizer
+
+def _summarizer():
+    calls = []
+
+    async def summarize(prompt):
+        calls.append(prompt)
+        return f"summary {len(calls)}"
+
+    return RollingSummarizer(summarize, chunk_size=2, fanout=2), calls
+
+def test_chunks_are_summarized_and_merged():
+    summarizer, calls = _summarizer()
+    store = MessageStore(capacity=16)
+
+    async def scenario():
+        for n in range(5):
+            summarizer.add(store.append("DevBot", "All", f"message {n}"))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        await summarizer.aclose()
+
+    asyncio.run(scenario())
+    assert summarizer.chunk_summaries == 2 and summarizer.merges == 1
+    assert summarizer.checkpoint == 3
+    assert len(calls) == 3
+    # The merged summary first, then the message after the checkpoint
+    assert summarizer.briefing_entries() == [{"summary": "summary 3"},
+                                             {"sender": "DevBot", "receiver": "All", "message": "message 4"}]
+
+def test_worker_restarts_in_a_new_event_loop():
+    summarizer, _ = _summarizer()
+    store = MessageStore(capacity=16)
+
+    async def add_chunk():
+        for n in range(2):
+            summarizer.add(store.append("DevBot", "All", f"message {n}"))
+        await asyncio.sleep(0.01)
+        await summarizer.aclose()
+
+    asyncio.run(add_chunk())
+    asyncio.run(add_chunk())
+    assert summarizer.chunk_summaries == 2
+    assert summarizer.failures == 0
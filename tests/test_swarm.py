@@ -0,0 +1,45 @@
+import asyncio
+
+from agents.agent_init import shared_web_search
+from ensemble.swarmify import Swarm
+
+def test_shutdown_leaves_shared_clients_open():
+    async def scenario():
+        first, second = Swarm(use_rag=False), Swarm(use_rag=False)
+        client = shared_web_search().client
+        await first.shutdown()
+        # The other swarm may still be searching
+        assert not client.is_closed
+        await second.shutdown()
+        await shared_web_search().aclose()
+
+    asyncio.run(scenario())
+
+def test_removed_agent_releases_its_task_and_assistant():
+    from agents.agent_init import Agent
+    from concurrency.fake_backend import FakeBackend
+    from concurrency.llm_core import llm_core
+
+    async def scenario():
+        llm_core.set_backend(FakeBackend())
+        swarm = Swarm(use_rag=False)
+        agents = [Agent(f"DevBot{n}", "Developer", ["Developer"]) for n in range(4)]
+        await swarm.add_agents([(agent, "Develop") for agent in agents])
+        await swarm.add_task({"id": "t1", "description": "Build", "role": "Developer", "priority": 1, "dependencies": []})
+        running, holder, *busy = agents
+        await holder.assign_task(await swarm.get_next_task_for_agent(holder))
+        swarm._running.add(running)
+        for agent in busy:
+            agent.completed_tasks.append({"id": "done"})
+        in_use = llm_core.assistant_pool.stats()["in_use"]
+
+        await swarm.adaptive_swarm_sizing()
+        # The running agent has as few completed tasks but is left alone
+        assert holder not in swarm.agents and running in swarm.agents
+        assert holder.assistant_key not in llm_core.assistants
+        assert llm_core.assistant_pool.stats()["in_use"] == in_use - 1
+        assert (await swarm.scheduler.aclaim("Developer"))["id"] == "t1"
+        await swarm.shutdown()
+        await llm_core.aclose()
+
+    asyncio.run(scenario())
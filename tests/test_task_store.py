@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from ensemble.scheduler import DuplicateTaskError, TaskScheduler
+from ensemble.task_store import SQLiteTaskStore
+
+def _task(task_id: str, priority: int = 1, dependencies=(), role: str = "Developer"):
+    return {"id": task_id, "description": f"Task {task_id}", "role": role, "priority": priority,
+            "dependencies": list(dependencies)}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = TaskScheduler() if request.param == "memory" else SQLiteTaskStore(str(tmp_path / "tasks.db"))
+    yield store
+    store.close()
+
+def test_claim_follows_priority_and_dependencies(store):
+    store.add(_task("low", priority=3))
+    store.add(_task("high", priority=1))
+    store.add(_task("blocked", priority=0, dependencies=["high"]))
+
+    assert store.claim("Tester") is None
+    assert store.claim("Developer")["id"] == "high"
+    assert store.claim("Developer")["id"] == "low"
+    # Its dependency is claimed, not completed
+    assert store.claim("Developer") is None
+
+    ready = store.complete("high")
+    assert [task["id"] for task in ready] == ["blocked"]
+    assert store.claim("Developer")["id"] == "blocked"
+    assert store.counts() == {"pending": 0, "claimed": 2, "completed": 1}
+
+def test_release_requeues_claimed_task(store):
+    store.add(_task("t1"))
+    assert store.claim("Developer")["assigned"]
+    assert store.claim_task("t1") is None
+
+    store.release("t1")
+    task = store.claim_task("t1")
+    assert task["id"] == "t1" and task["assigned"]
+
+def test_complete_is_idempotent(store):
+    store.add(_task("t1"))
+    store.add(_task("t2", dependencies=["t1"]))
+    store.claim("Developer")
+    assert len(store.complete("t1")) == 1
+    assert store.complete("t1") == []
+    assert store.is_completed("t1")
+    assert store.unmet_count("t2") == 0
+    assert len(store) == 1
+
+def test_equal_priorities_keep_insertion_order(store):
+    for number in range(5):
+        store.add(_task(f"t{number}", priority=2))
+    store.add(_task("tester", role="Tester"))
+    assert [store.claim("Developer")["id"] for _ in range(5)] == [f"t{number}" for number in range(5)]
+    assert store.claim("Tester")["id"] == "tester"
+
+def test_task_waits_for_every_dependency(store):
+    store.add(_task("a"))
+    store.add(_task("b"))
+    store.add(_task("joined", dependencies=["a", "b", "a"]))
+    assert store.unmet_count("joined") == 2
+    assert store.complete("a") == []
+    assert [task["id"] for task in store.complete("b")] == ["joined"]
+    # Dependencies completed before the add count as met
+    store.add(_task("late", dependencies=["a"]))
+    assert store.unmet_count("late") == 0
+    assert {task["id"] for task in store.ready_tasks()} == {"joined", "late"}
+
+def test_claim_skips_tasks_claimed_by_id(store):
+    store.add(_task("first"))
+    store.add(_task("second", priority=2))
+    assert store.claim_task("first")["id"] == "first"
+    assert store.claim("Developer")["id"] == "second"
+    assert store.claim("Developer") is None
+
+def test_iter_tasks_filters_by_status_and_role(store):
+    store.add(_task("dev"))
+    store.add(_task("test", role="Tester", dependencies=["dev"]))
+    store.claim("Developer")
+    store.complete("dev")
+    assert [task["id"] for task in store.iter_tasks(status="completed")] == ["dev"]
+    assert [task["id"] for task in store.iter_tasks(status="ready", role="Tester")] == ["test"]
+    assert [task["id"] for task in store.iter_tasks(role="Developer")] == ["dev"]
+    with pytest.raises(ValueError):
+        list(store.iter_tasks(status="unknown"))
+
+def test_duplicate_id_is_rejected(store):
+    store.add(_task("t1"))
+    with pytest.raises(DuplicateTaskError):
+        store.add(_task("t1", priority=2))
+
+def test_async_writes_match_sync_ones(store):
+    async def scenario():
+        await store.aadd(_task("t1"))
+        await store.aadd(_task("t2", dependencies=["t1", "missing"]))
+        assert await store.aresolve_missing_dependencies() == ["missing"]
+        assert (await store.aclaim("Developer"))["id"] == "t1"
+        await store.arelease("t1")
+        assert (await store.aclaim_task("t1"))["id"] == "t1"
+        assert [task["id"] for task in await store.acomplete("t1")] == ["t2"]
+        await store.aclear()
+        assert len(store) == 0
+
+    asyncio.run(scenario())
+
+def test_shared_database_hands_each_task_out_once(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    first, second = SQLiteTaskStore(path), SQLiteTaskStore(path)
+    for number in range(20):
+        first.add(_task(f"t{number}"))
+
+    async def drain(store):
+        claimed = []
+        while (task := await store.aclaim("Developer")) is not None:
+            claimed.append(task["id"])
+        return claimed
+
+    async def scenario():
+        return await asyncio.gather(drain(first), drain(second))
+
+    one, two = asyncio.run(scenario())
+    assert sorted(one + two, key=lambda task_id: int(task_id[1:])) == [f"t{number}" for number in range(20)]
+    first.close()
+    second.close()
+
+def test_concurrent_duplicate_adds_keep_the_first(tmp_path):
+    from ensemble.swarmify import Swarm
+
+    async def scenario():
+        swarm = Swarm(use_rag=False, task_store="sqlite", task_store_path=str(tmp_path / "tasks.db"))
+        await asyncio.gather(*[swarm.add_task(_task("t1", priority=n)) for n in range(1, 5)])
+        assert [task["priority"] for task in swarm.scheduler.iter_tasks()] == [1]
+        await swarm.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,68 @@
+import asyncio
+import gc
+import json
+
+from concurrency.tracing import Tracer
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    with tracer.span("work") as span:
+        assert span is None
+    assert not tracer.spans
+
+def test_spans_nest_within_a_task_and_split_across_tasks():
+    tracer = Tracer(enabled=True)
+
+    async def agent(name):
+        with tracer.span("run_agent", agent=name):
+            await asyncio.sleep(0.01)
+            with tracer.span("call"):
+                await asyncio.sleep(0)
+
+    async def scenario():
+        with tracer.span("iteration"):
+            await asyncio.gather(agent("a"), agent("b"))
+
+    asyncio.run(scenario())
+    spans = {(span.name, span.args.get("agent")): span for span in tracer.spans}
+    iteration = spans[("iteration", None)]
+    run_a, run_b = spans[("run_agent", "a")], spans[("run_agent", "b")]
+    # The parent carries over into gathered tasks, but each task is its own track
+    assert run_a.parent_id == run_b.parent_id == iteration.span_id
+    assert len({iteration.track, run_a.track, run_b.track}) == 3
+    calls = [span for span in tracer.spans if span.name == "call"]
+    assert {span.parent_id for span in calls} == {run_a.span_id, run_b.span_id}
+    assert all(span.end >= span.start for span in tracer.spans)
+
+def test_chrome_trace_export(tmp_path):
+    tracer = Tracer(enabled=True)
+    try:
+        with tracer.span("outer", task_id="T1", count=2):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    path = tmp_path / "trace.json"
+    tracer.export_chrome(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    metadata = [event for event in events if event["ph"] == "M"]
+    (complete,) = [event for event in events if event["ph"] == "X"]
+    assert complete["name"] == "outer" and complete["dur"] >= 0
+    assert complete["args"] == {"task_id": "T1", "count": 2, "error": "ValueError"}
+    assert metadata[0]["tid"] == complete["tid"]
+
+def test_tracks_do_not_grow_with_finished_tasks():
+    tracer = Tracer(enabled=True, max_spans=10, max_tracks=5)
+
+    async def step():
+        with tracer.span("step"):
+            pass
+
+    async def scenario():
+        for _ in range(50):
+            await asyncio.create_task(step())
+
+    asyncio.run(scenario())
+    gc.collect()
+    assert len(tracer._task_tracks) == 0
+    assert len(tracer._track_names) == 5
+    assert len(tracer.spans) == 10
@@ -0,0 +1,18 @@
+from concurrency.metrics import CallRecord
+from concurrency.usage import UsageTracker
+
+def _call(tokens: int) -> CallRecord:
+    call = CallRecord("openai", "gpt-4o", "assistant", "run")
+    call.set_usage(tokens, tokens)
+    call.finish()
+    return call
+
+def test_prometheus_counters_survive_record_rollover():
+    usage = UsageTracker(max_records=2)
+    for _ in range(5):
+        usage.record(_call(10))
+
+    assert len(usage.records) == 2
+    text = usage.prometheus_text()
+    assert 'llm_calls_total{provider="openai",model="gpt-4o",agent="",phase=""} 5' in text
+    assert 'llm_prompt_tokens_total{provider="openai",model="gpt-4o",agent="",phase=""} 50' in text
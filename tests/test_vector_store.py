@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from tools.embeddings import HashingEmbeddings
+from tools.vector_store import NumpyVectorStore, RECORDS_FILE, VECTORS_FILE
+
+TEXTS = ["apples and pears", "zebra zoo", "quantum physics lecture"]
+METADATAS = [{"type": "fruit", "tags": "food"}, {"type": "animal"}, {"type": "science"}]
+
+@pytest.fixture
+def embedding():
+    return HashingEmbeddings(dim=64)
+
+def top(store, query, **kwargs):
+    doc, score = store.similarity_search_with_score(query, k=1, **kwargs)[0]
+    return doc.page_content, score
+
+def test_persist_and_reload(tmp_path, embedding):
+    store = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    store.add_texts(TEXTS, METADATAS, ids=["a", "z", "q"])
+
+    reloaded = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    assert len(reloaded) == 3
+    assert reloaded.get_by_ids(["z"])[0].metadata == {"type": "animal"}
+    text, score = top(reloaded, "zebra zoo")
+    assert text == "zebra zoo" and score == pytest.approx(1.0, abs=1e-5)
+
+    # Appends after a reload land behind the memory-mapped rows and survive another reload
+    reloaded.add_texts(["river boat"], ids=["r"])
+    again = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    assert top(again, "river boat")[0] == "river boat"
+    assert top(again, "apples and pears")[0] == "apples and pears"
+
+def test_duplicate_ids_are_skipped(tmp_path, embedding):
+    store = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    store.add_texts(TEXTS, METADATAS, ids=["a", "z", "q"])
+    store.add_texts(["zebra zoo", "river boat"], ids=["z", "r"])
+    assert len(store) == 4
+    assert len(NumpyVectorStore(embedding, persist_directory=str(tmp_path))) == 4
+
+def test_filtered_search(embedding):
+    store = NumpyVectorStore(embedding)
+    store.add_texts(TEXTS, METADATAS, ids=["a", "z", "q"])
+    assert top(store, "zebra zoo", filter={"type": "science"})[0] == "quantum physics lecture"
+    assert top(store, "zebra zoo", filter={"type": ["fruit", "animal"]})[0] == "zebra zoo"
+    assert store.similarity_search("zebra", filter={"type": "missing"}) == []
+    assert store.similarity_search("zebra", filter={"type": "fruit", "tags": "other"}) == []
+
+def test_orphaned_vectors_are_truncated_on_load(tmp_path, embedding):
+    store = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    store.add_texts(TEXTS[:1], ids=["a"])
+    # A crash between the vector and record writes leaves vector bytes without a record
+    with open(tmp_path / VECTORS_FILE, 'ab') as f:
+        f.write(b"\0" * 64 * 4 * 2)
+
+    reloaded = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    assert os.path.getsize(tmp_path / VECTORS_FILE) == 64 * 4
+    reloaded.add_texts(TEXTS[1:], ids=["z", "q"])
+    again = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    text, score = top(again, "zebra zoo")
+    assert text == "zebra zoo" and score == pytest.approx(1.0, abs=1e-5)
+
+def test_torn_record_is_truncated_on_load(tmp_path, embedding):
+    store = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    store.add_texts(TEXTS[:2], ids=["a", "z"])
+    # The second record is cut short mid-line
+    with open(tmp_path / RECORDS_FILE, 'rb+') as f:
+        f.truncate(os.path.getsize(tmp_path / RECORDS_FILE) - 5)
+
+    reloaded = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    assert reloaded.ids == ["a"]
+    reloaded.add_texts(TEXTS[1:], ids=["z", "q"])
+    again = NumpyVectorStore(embedding, persist_directory=str(tmp_path))
+    assert again.ids == ["a", "z", "q"]
+    for text in TEXTS:
+        assert top(again, text) == (text, pytest.approx(1.0, abs=1e-5))
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from benchmarks.bench_web_search import StandInSearchServer, render_results
+from tools.web_search import WebSearch, parse_duckduckgo
+
+@pytest.fixture
+def server():
+    with StandInSearchServer(delay=0.05, results_per_page=5) as server:
+        yield server
+
+def _search(server, **options) -> WebSearch:
+    return WebSearch(url_template=server.url_template, parser=parse_duckduckgo, host_interval=0.0, **options)
+
+def test_parse_duckduckgo():
+    html = render_results("graph databases", 2).replace(
+        'href="https://example.com/1', 'href="//duckduckgo.com/l/?uddg=https%3A%2F%2Ftarget.example%2Fpage&rut=x')
+    results = parse_duckduckgo(html, "https://html.duckduckgo.com/html/")
+    assert results[0] == {"title": "graph databases result 0", "url": "https://example.com/0?q=graph databases",
+                          "snippet": "About graph databases, part 0."}
+    # Redirect links resolve to their uddg target
+    assert results[1]["url"] == "https://target.example/page"
+    assert parse_duckduckgo("", "https://html.duckduckgo.com/html/") == []
+
+def test_normalized_queries_hit_the_cache(server):
+    search = _search(server)
+
+    async def scenario():
+        try:
+            first = await search.search("Vector  Search")
+            again = await asyncio.gather(search.search("  vector search "), search.search("VECTOR SEARCH", max_results=2))
+            return first, again
+        finally:
+            await search.aclose()
+
+    first, (again, fewer) = asyncio.run(scenario())
+    assert len(first) == 5 and first[0]["title"] == "vector search result 0"
+    assert again == first and fewer == first[:2]
+    assert server.requests == 1
+    assert search.stats()["cache_hits"] == 2
+
+def test_per_host_limit_caps_concurrent_requests(server):
+    search = _search(server, per_host_limit=3)
+
+    async def scenario():
+        try:
+            return await search.search_many([f"topic {n}" for n in range(12)])
+        finally:
+            await search.aclose()
+
+    results = asyncio.run(scenario())
+    assert all(len(r) == 5 for r in results.values())
+    assert server.requests == 12
+    assert server.max_active == 3
+
+def test_fetch_truncates_at_max_bytes(server):
+    search = _search(server)
+
+    async def scenario():
+        try:
+            full = await search.fetch(f"http://127.0.0.1:{server.port}/page?q=long")
+            cut = await search.fetch(f"http://127.0.0.1:{server.port}/page?q=long", max_bytes=64)
+            return full, cut
+        finally:
+            await search.aclose()
+
+    full, cut = asyncio.run(scenario())
+    assert len(full) > 64
+    assert cut == full[:64]
@@ -0,0 +1,97 @@
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+# Keeps identifiers such as task-12, main.py or src/app intact as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[./\-][a-z0-9_]+)*")
+SUBTOKEN_PATTERN = re.compile(r"[./\-]")
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = SUBTOKEN_PATTERN.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    if not filter:
+        return True
+    for key, wanted in filter.items():
+        values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        if metadata.get(key) not in values:
+            return False
+    return True
+
+class BM25Index:
+    """Incrementally updated Okapi BM25 inverted index.
+
+    Postings map term -> {doc_id: term frequency}; document lengths and the
+    running total are kept so adding a document never rescans the corpus.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.texts: Dict[str, str] = {}
+        self.metadatas: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        if doc_id in self.doc_lengths:
+            return
+        terms = tokenize(text)
+        for term, count in Counter(terms).items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        self.doc_lengths[doc_id] = len(terms)
+        self.texts[doc_id] = text
+        self.metadatas[doc_id] = metadata or {}
+        self.total_length += len(terms)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        if not self.doc_lengths:
+            return []
+        avg_length = self.total_length / len(self.doc_lengths) or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        if filter:
+            scores = {doc_id: score for doc_id, score in scores.items() if matches_filter(self.metadatas[doc_id], filter)}
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def is_confident(self, query: str, hits: List[Tuple[str, float]], margin: float = 1.5) -> bool:
+        """True when the best hit contains every query term and clearly beats the runner-up."""
+        if not hits:
+            return False
+        terms = set(tokenize(query))
+        best_id, best_score = hits[0]
+        if not terms or any(best_id not in self.postings.get(term, ()) for term in terms):
+            return False
+        return len(hits) == 1 or best_score >= margin * hits[1][1]
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
\ No newline at end of file
@@ -1,19 +1,35 @@
+import os
 from typing import List, Dict, Any
 from concurrency.llm_core import llm_core
+from tools.message_store import MessageStore
+from tools.context_selection import context_selector
+from tools.summarizer import RollingSummarizer, DEFAULT_CHUNK_SIZE, DEFAULT_FANOUT
 
 class ContextManager:
     def __init__(self):
-        self.context: List[Dict[str, Any]] = []
+        # Keeps the last 1000 entries in memory; older ones spill to disk if configured
+        self.context = MessageStore(capacity=1000, spill_path=os.getenv("CONTEXT_SPILL_PATH"))
+        self.summarizer = RollingSummarizer(
+            lambda prompt: llm_core.gemini_generate_content(prompt),
+            chunk_size=int(os.getenv("CONTEXT_SUMMARY_CHUNK", DEFAULT_CHUNK_SIZE)),
+            fanout=int(os.getenv("CONTEXT_SUMMARY_FANOUT", DEFAULT_FANOUT)),
+        )
 
     async def add_to_context(self, entry: Dict[str, Any]):
-        self.context.append(entry)
-        if len(self.context) > 1000:  # Limit to last 1000 entries to manage memory
-            self.context = self.context[-1000:]
+        record = self.context.append(entry.get("sender", ""), entry.get("receiver", ""), entry.get("message", ""))
+        self.summarizer.add(record)
 
     async def get_relevant_context(self, query: str, project_overview: str) -> str:
-        return await llm_core.get_relevant_context(query, project_overview, self.context)
+        selection = context_selector.select(query, list(self.context))
+        return await llm_core.get_relevant_context(query, project_overview, selection.entries)
 
     async def summarize_for_new_agent(self, agent_role: str, task_description: str, project_overview: str) -> str:
-        return await llm_core.summarize_for_new_agent(agent_role, task_description, project_overview, self.context)
+        # Rolling summaries cover everything up to the checkpoint; only newer messages go in raw
+        selection = context_selector.select(f"{agent_role} {task_description}", self.summarizer.briefing_entries())
+        return await llm_core.summarize_for_new_agent(agent_role, task_description, project_overview, selection.entries)
+
+    async def aclose(self):
+        await self.summarizer.aclose()
+        self.context.close()
 
 context_manager = ContextManager()
\ No newline at end of file
@@ -0,0 +1,120 @@
+import os
+import numpy as np
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+from concurrency.rate_limit import estimate_tokens
+from tools.bm25 import BM25Index
+import logging
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 2000
+DEFAULT_RECENCY_WEIGHT = 0.3
+
+class SelectionResult:
+    def __init__(self, entries: List[Dict[str, Any]], tokens_before: int, tokens_after: int, total_entries: int):
+        self.entries = entries
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+        self.total_entries = total_entries
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+class ContextSelector:
+    """Picks the context entries worth sending to the LLM under a token budget.
+
+    Each entry is scored by a blend of relevance to the query (BM25 over the
+    candidate entries, or embedding cosine when an embedder is given) and
+    recency. Entries are taken greedily by score until the budget is spent, then
+    returned in their original order so the prompt still reads chronologically.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET, recency_weight: float = DEFAULT_RECENCY_WEIGHT,
+                 max_entries: Optional[int] = None, embeddings: Optional['Embeddings'] = None):
+        self.token_budget = token_budget
+        self.recency_weight = recency_weight
+        self.max_entries = max_entries
+        self.embeddings = embeddings
+        self.calls = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @classmethod
+    def from_env(cls) -> 'ContextSelector':
+        embeddings = None
+        if os.getenv("CONTEXT_SCORER", "lexical").lower() == "embedding":
+            from tools.embeddings import HashingEmbeddings
+            embeddings = HashingEmbeddings()
+        max_entries = os.getenv("CONTEXT_MAX_ENTRIES")
+        return cls(
+            token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)),
+            recency_weight=float(os.getenv("CONTEXT_RECENCY_WEIGHT", DEFAULT_RECENCY_WEIGHT)),
+            max_entries=int(max_entries) if max_entries else None,
+            embeddings=embeddings,
+        )
+
+    @staticmethod
+    def entry_text(entry: Any) -> str:
+        if hasattr(entry, "to_dict"):
+            entry = entry.to_dict()
+        if isinstance(entry, dict):
+            return " ".join(str(value) for value in entry.values())
+        return str(entry)
+
+    def _relevance(self, query: str, texts: List[str]) -> np.ndarray:
+        if self.embeddings is not None:
+            vectors = np.asarray(self.embeddings.embed_documents(texts + [query]), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1)
+            norms[norms == 0] = 1.0
+            scores = vectors[:-1] @ vectors[-1] / (norms[:-1] * norms[-1])
+            return np.clip(scores, 0.0, None)
+        index = BM25Index()
+        for i, text in enumerate(texts):
+            index.add(str(i), text)
+        scores = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, score in index.search(query, k=len(texts)):
+            scores[int(doc_id)] = score
+        top = scores.max() if len(scores) else 0.0
+        return scores / top if top > 0 else scores
+
+    def select(self, query: str, entries: List[Any]) -> SelectionResult:
+        # Tokens are estimated on the repr, which is how entries end up in the prompt
+        costs = [estimate_tokens(str(entry)) for entry in entries]
+        tokens_before = sum(costs)
+        if tokens_before <= self.token_budget and (self.max_entries is None or len(entries) <= self.max_entries):
+            result = SelectionResult(list(entries), tokens_before, tokens_before, len(entries))
+        else:
+            relevance = self._relevance(query, [self.entry_text(entry) for entry in entries])
+            recency = np.arange(1, len(entries) + 1, dtype=np.float32) / len(entries)
+            scores = (1 - self.recency_weight) * relevance + self.recency_weight * recency
+            chosen, spent = [], 0
+            for i in np.argsort(-scores, kind='stable'):
+                if self.max_entries is not None and len(chosen) >= self.max_entries:
+                    break
+                if spent + costs[i] > self.token_budget:
+                    continue
+                chosen.append(int(i))
+                spent += costs[i]
+            chosen.sort()
+            result = SelectionResult([entries[i] for i in chosen], tokens_before, spent, len(entries))
+
+        self.calls += 1
+        self.tokens_before += result.tokens_before
+        self.tokens_after += result.tokens_after
+        logger.info(f"Context selection kept {len(result.entries)}/{result.total_entries} entries, "
+                    f"{result.tokens_after}/{result.tokens_before} tokens ({result.tokens_saved} saved)")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_before - self.tokens_after,
+        }
+
+context_selector = ContextSelector.from_env()
\ No newline at end of file
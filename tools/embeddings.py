@@ -0,0 +1,84 @@
+import os
+import re
+import zlib
+import functools
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from typing import List, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HASHING_DIM = 1024
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+# Bounded, since ingested web pages bring an open-ended vocabulary
+FEATURE_CACHE_SIZE = 1 << 16
+
+# A backend name ("openai", "hashing") or a ready Embeddings instance
+EmbeddingsSpec = Union[str, Embeddings, None]
+
+@functools.lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def _hashed_feature(token: str, dim: int) -> Tuple[int, float]:
+    # (column, sign); crc32 is stable across runs unlike hash()
+    h = zlib.crc32(token.encode('utf-8'))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+class HashingEmbeddings(Embeddings):
+    """CPU-only embedder: signed feature hashing of word unigrams and bigrams.
+
+    Vectors are sublinear term frequencies, L2-normalised so that inner product is
+    cosine similarity. No fitting or network access is needed, and the same text
+    always maps to the same vector across processes.
+    """
+
+    is_local = True
+
+    def __init__(self, dim: int = DEFAULT_HASHING_DIM, ngram_range: Tuple[int, int] = (1, 2)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.model = f"hashing-{dim}"
+
+    def _tokens(self, text: str) -> List[str]:
+        words = TOKEN_PATTERN.findall(text.lower())
+        low, high = self.ngram_range
+        tokens = []
+        for n in range(low, high + 1):
+            if n == 1:
+                tokens.extend(words)
+            else:
+                tokens.extend(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        return tokens
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch into a (len(texts), dim) float32 matrix in one scatter-add."""
+        rows, cols, signs = [], [], []
+        dim = self.dim
+        for row, text in enumerate(texts):
+            for token in self._tokens(text):
+                col, sign = _hashed_feature(token, dim)
+                rows.append(row)
+                cols.append(col)
+                signs.append(sign)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+        np.copyto(matrix, np.sign(matrix) * np.log1p(np.abs(matrix)))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+def create_embeddings(name: str = None) -> Embeddings:
+    name = (name or os.getenv("RAG_EMBEDDINGS", "openai")).lower()
+    if name == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings()
+    if name in ("hashing", "local"):
+        return HashingEmbeddings(dim=int(os.getenv("RAG_HASHING_DIM", DEFAULT_HASHING_DIM)))
+    raise ValueError(f"Unknown embedding backend: {name}")
\ No newline at end of file
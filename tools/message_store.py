@@ -0,0 +1,122 @@
+import os
+import json
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Iterator, Deque
+
+class MessageRecord:
+    __slots__ = ("seq", "sender", "receiver", "message", "timestamp")
+
+    def __init__(self, seq: int, sender: str, receiver: str, message: str, timestamp: Optional[float] = None):
+        self.seq = seq
+        self.sender = sender
+        self.receiver = receiver
+        self.message = message
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def __getitem__(self, key: str) -> Any:
+        # Dict-style access for callers written against the old list-of-dicts history
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"sender": self.sender, "receiver": self.receiver, "message": self.message}
+
+    def __repr__(self) -> str:
+        # Matches the old dict entries so prompts that embed history are unchanged
+        return repr(self.to_dict())
+
+class MessageStore:
+    """Fixed-capacity ring buffer of messages with sender/receiver indexes.
+
+    Appends are O(1): the record lands in slot seq % capacity, overwriting the
+    oldest one, whose seq is then also the oldest in its sender and receiver
+    index deques. With spill_path set, evicted records are appended to a JSONL
+    log and remain reachable through history().
+    """
+
+    def __init__(self, capacity: int = 1000, spill_path: Optional[str] = None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self._slots: List[Optional[MessageRecord]] = [None] * capacity
+        self._next_seq = 0
+        self._by_sender: Dict[str, Deque[int]] = {}
+        self._by_receiver: Dict[str, Deque[int]] = {}
+        self._spill_file = None
+        self.spilled_count = 0
+        if spill_path:
+            directory = os.path.dirname(spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return min(self._next_seq, self.capacity)
+
+    @property
+    def oldest_seq(self) -> int:
+        return self._next_seq - len(self)
+
+    def append(self, sender: str, receiver: str, message: str) -> MessageRecord:
+        seq = self._next_seq
+        slot = seq % self.capacity
+        evicted = self._slots[slot]
+        if evicted is not None:
+            self._evict(evicted)
+        record = MessageRecord(seq, sender, receiver, message)
+        self._slots[slot] = record
+        self._by_sender.setdefault(sender, deque()).append(seq)
+        self._by_receiver.setdefault(receiver, deque()).append(seq)
+        self._next_seq += 1
+        return record
+
+    def _evict(self, record: MessageRecord):
+        for index, key in ((self._by_sender, record.sender), (self._by_receiver, record.receiver)):
+            seqs = index[key]
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+        if self.spill_path:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+            entry = record.to_dict()
+            entry.update(seq=record.seq, timestamp=record.timestamp)
+            self._spill_file.write(json.dumps(entry) + "\n")
+            self.spilled_count += 1
+
+    def _get(self, seq: int) -> MessageRecord:
+        return self._slots[seq % self.capacity]
+
+    def __iter__(self) -> Iterator[MessageRecord]:
+        for seq in range(self.oldest_seq, self._next_seq):
+            yield self._get(seq)
+
+    def last(self, n: int) -> List[MessageRecord]:
+        start = max(self.oldest_seq, self._next_seq - n)
+        return [self._get(seq) for seq in range(start, self._next_seq)]
+
+    def by_sender(self, sender: str) -> List[MessageRecord]:
+        return [self._get(seq) for seq in self._by_sender.get(sender, ())]
+
+    def by_receiver(self, receiver: str) -> List[MessageRecord]:
+        return [self._get(seq) for seq in self._by_receiver.get(receiver, ())]
+
+    def spilled(self) -> Iterator[MessageRecord]:
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        with open(self.spill_path, encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                yield MessageRecord(entry["seq"], entry["sender"], entry["receiver"], entry["message"], entry["timestamp"])
+
+    def history(self) -> Iterator[MessageRecord]:
+        """Every message still reachable: spilled ones first, then the in-memory window."""
+        yield from self.spilled()
+        yield from self
+
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
\ No newline at end of file
@@ -1,44 +1,372 @@
 import os
-from langchain_community.document_loaders import TextLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
-from langchain.chains import RetrievalQA
-from langchain_community.llms import OpenAI
-from typing import List, Optional
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Set, TYPE_CHECKING
+from tools.bm25 import BM25Index, reciprocal_rank_fusion
+from concurrency.metrics import percentile
+from concurrency.tracing import traced
 import logging
 
-logging.basicConfig(level=logging.INFO)
+# LangChain, the embedders and the vector stores are imported when a RAG is built,
+# so importing this module (and everything that registers its tools) stays cheap
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from tools.embeddings import EmbeddingsSpec
+
 logger = logging.getLogger(__name__)
 logging.getLogger("openai").disabled = True
 logging.getLogger("httpx").disabled = True
 
+DEFAULT_INGEST_BATCH_SIZE = 32
+DEFAULT_INGEST_FLUSH_INTERVAL = 0.5
+DEFAULT_INGEST_MAX_ATTEMPTS = 5
+INGEST_RETRY_BASE_DELAY = 0.5
+INGEST_RETRY_MAX_DELAY = 30.0
+DEFAULT_INGEST_CLOSE_TIMEOUT = 10.0
+RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
+QUERY_EMBEDDING_CACHE_SIZE = 256
+
+class IngestQueue:
+    """Write-behind buffer for RAG uploads, flushed in batches by size or age.
+
+    Flushes are serialised and write the buffer in batch_size batches from the
+    head. A batch is only removed once it is written: on failure it stays at the
+    head and is retried with capped exponential backoff, and is dropped (and
+    counted) only after max_attempts failures in a row. So once flush() returns,
+    every text enqueued before the call has been written or is queued for retry.
+    A flush during a backoff returns at once rather than spending an attempt, and
+    aclose() gives up on what is still queued after close_timeout seconds.
+    """
+
+    def __init__(self, rag: 'RAG', batch_size: int = DEFAULT_INGEST_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_INGEST_FLUSH_INTERVAL,
+                 max_attempts: int = DEFAULT_INGEST_MAX_ATTEMPTS,
+                 close_timeout: float = DEFAULT_INGEST_CLOSE_TIMEOUT):
+        self.rag = rag
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.close_timeout = close_timeout
+        self.buffer: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.flushes = 0
+        self.flushed_texts = 0
+        self.failed_flushes = 0
+        self.dropped_texts = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+        self._attempts = 0
+        self._retry_at = 0.0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+    def submit(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        self.buffer.extend(texts)
+        self.metadatas.extend(metadatas or [{} for _ in texts])
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        if len(self.buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(self.flush_interval, self._retry_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # A full buffer doesn't cut a backoff short; the store is what's failing
+            if self.buffer and time.monotonic() >= self._retry_at:
+                await self.flush()
+
+    @traced()
+    async def flush(self):
+        async with self._flush_lock:
+            while self.buffer:
+                # Consistent reads flush too; they must not use up the head batch's attempts while the store is down
+                if time.monotonic() < self._retry_at:
+                    return
+                batch = self.buffer[:self.batch_size]
+                metadatas = self.metadatas[:len(batch)]
+                start = time.perf_counter()
+                try:
+                    await self.rag.upload_data(batch, metadatas)
+                except Exception as e:
+                    if not self._failed(len(batch), e):
+                        return
+                else:
+                    self.flushed_texts += len(batch)
+                    self._attempts = 0
+                    self._retry_at = 0.0
+                finally:
+                    self.last_flush_latency = time.perf_counter() - start
+                    self.total_flush_latency += self.last_flush_latency
+                    self.flushes += 1
+                # Texts submitted during the upload were appended behind the batch
+                del self.buffer[:len(batch)]
+                del self.metadatas[:len(batch)]
+
+    def _failed(self, size: int, error: Exception) -> bool:
+        """Count a failed upload of the head batch; True if it's now to be dropped."""
+        self.failed_flushes += 1
+        self._attempts += 1
+        if self._attempts >= self.max_attempts:
+            logger.error(f"Dropping {size} queued RAG texts after {self._attempts} failed flushes: {str(error)}")
+            self.dropped_texts += size
+            self._attempts = 0
+            self._retry_at = 0.0
+            return True
+        delay = min(INGEST_RETRY_MAX_DELAY, INGEST_RETRY_BASE_DELAY * 2 ** (self._attempts - 1))
+        self._retry_at = time.monotonic() + delay
+        logger.warning(f"RAG flush of {size} texts failed ({self._attempts}/{self.max_attempts}), "
+                       f"retrying in {delay:.1f}s: {str(error)}")
+        return False
+
+    async def aclose(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # Retries run until the deadline; whatever is left then is dropped so shutdown can't hang
+        deadline = time.monotonic() + self.close_timeout
+        while self.buffer:
+            remaining = deadline - time.monotonic()
+            if self._retry_at - time.monotonic() >= remaining:
+                break
+            await asyncio.sleep(max(0.0, self._retry_at - time.monotonic()))
+            try:
+                await asyncio.wait_for(self.flush(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                break
+        if self.buffer:
+            logger.error(f"Dropping {len(self.buffer)} queued RAG texts still unwritten after {self.close_timeout:.1f}s")
+            self.dropped_texts += len(self.buffer)
+            self.buffer.clear()
+            self.metadatas.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self.buffer),
+            "flushes": self.flushes,
+            "flushed_texts": self.flushed_texts,
+            "failed_flushes": self.failed_flushes,
+            "dropped_texts": self.dropped_texts,
+            "last_flush_latency": self.last_flush_latency,
+            "mean_flush_latency": self.total_flush_latency / self.flushes if self.flushes else 0.0,
+        }
+
 class RAG:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings()
-        persist_directory = os.path.join(os.getcwd(), 'chroma_db')
-        self.vectorstore = Chroma(persist_directory=persist_directory, embedding_function=self.embeddings)
+    def __init__(self, embeddings: 'EmbeddingsSpec' = None, vector_store: Optional[str] = None):
+        from langchain.embeddings import CacheBackedEmbeddings
+        from langchain.storage import LocalFileStore
+        from langchain.text_splitter import CharacterTextSplitter
+        from langchain_core.embeddings import Embeddings
+        from tools.embeddings import create_embeddings
+
+        base_embeddings = embeddings if isinstance(embeddings, Embeddings) else create_embeddings(embeddings)
+        self.embedding_model = getattr(base_embeddings, "model", type(base_embeddings).__name__)
+        local = getattr(base_embeddings, "is_local", False)
+        if local:
+            # Local embedders are cheaper to recompute than to read back from disk
+            self.embeddings = base_embeddings
+        else:
+            # Embeddings are cached on disk by content hash, namespaced by model, so
+            # re-uploading known text never calls the embedding API again
+            cache_directory = os.getenv("RAG_EMBEDDING_CACHE_DIR", os.path.join(os.getcwd(), 'embedding_cache'))
+            self.embeddings = CacheBackedEmbeddings.from_bytes_store(
+                base_embeddings, LocalFileStore(cache_directory), namespace=self.embedding_model
+            )
+        # Vectors of different models/dimensions can't share a collection
+        collection_name = f"langchain_{self.embedding_model}" if local else "langchain"
+        self.vector_store_type = (vector_store or os.getenv("RAG_VECTOR_STORE", "chroma")).lower()
+        if self.vector_store_type == "numpy":
+            from tools.vector_store import NumpyVectorStore
+            persist_directory = os.path.join(os.getcwd(), 'vector_index', collection_name)
+            self.vectorstore = NumpyVectorStore(self.embeddings, persist_directory=persist_directory)
+        elif self.vector_store_type == "chroma":
+            from langchain_chroma import Chroma
+            persist_directory = os.path.join(os.getcwd(), 'chroma_db')
+            self.vectorstore = Chroma(collection_name=collection_name, persist_directory=persist_directory,
+                                      embedding_function=self.embeddings)
+        else:
+            raise ValueError(f"Unknown vector store: {self.vector_store_type}")
         self.text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
+        self._known_ids: Set[str] = set()
+        self.uploaded = 0
+        self.skipped_duplicates = 0
+        self.ingest = IngestQueue(
+            self,
+            batch_size=int(os.getenv("RAG_INGEST_BATCH_SIZE", DEFAULT_INGEST_BATCH_SIZE)),
+            flush_interval=float(os.getenv("RAG_INGEST_FLUSH_INTERVAL", DEFAULT_INGEST_FLUSH_INTERVAL)),
+            max_attempts=int(os.getenv("RAG_INGEST_MAX_ATTEMPTS", DEFAULT_INGEST_MAX_ATTEMPTS)),
+            close_timeout=float(os.getenv("RAG_INGEST_CLOSE_TIMEOUT", DEFAULT_INGEST_CLOSE_TIMEOUT)),
+        )
+        # Lexical index over the same documents, keyed by content hash like the vector store
+        self.lexical = BM25Index()
+        self._lexical_loaded = False
+        self.retrieval_mode = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+        self._query_embeddings: OrderedDict = OrderedDict()
+        self.query_embedding_hits = 0
+        self.retrieval_latency: Dict[str, deque] = {}
+        self.answered_by: Dict[str, int] = {}
+
+    def enqueue(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        # Off the critical path: embedding happens in the next batched flush
+        self.ingest.submit(texts, metadatas)
 
-    async def upload_data(self, texts: List[str]):
+    async def flush(self):
+        await self.ingest.flush()
+
+    async def aclose(self):
+        await self.ingest.aclose()
+
+    @staticmethod
+    def document_id(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    async def _stored_ids(self, ids: List[str]) -> Set[str]:
+        if self.vector_store_type == "numpy":
+            return {doc.id for doc in self.vectorstore.get_by_ids(ids)}
+        result = await asyncio.to_thread(self.vectorstore.get, ids=ids, include=[])
+        return set(result["ids"])
+
+    @traced()
+    async def upload_data(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
         logger.info('Uploading info for RAG....')
         try:
-            docs = self.text_splitter.create_documents(texts)
-            await self.vectorstore.aadd_documents(docs)
+            docs = self.text_splitter.create_documents(texts, metadatas)
+            # Documents are stored under their content hash so duplicates are skipped
+            # before embedding instead of growing the index
+            candidates = {}
+            for doc in docs:
+                doc_id = self.document_id(doc.page_content)
+                if doc_id not in self._known_ids and doc_id not in candidates:
+                    candidates[doc_id] = doc
+            if candidates:
+                self._known_ids.update(await self._stored_ids(list(candidates)))
+            new_ids = [doc_id for doc_id in candidates if doc_id not in self._known_ids]
+            self.skipped_duplicates += len(docs) - len(new_ids)
+            if not new_ids:
+                return []
+            # Reserve the ids so concurrent uploads of the same text don't race
+            self._known_ids.update(new_ids)
+            try:
+                await self.vectorstore.aadd_documents([candidates[doc_id] for doc_id in new_ids], ids=new_ids)
+            except Exception:
+                self._known_ids.difference_update(new_ids)
+                raise
+            self.uploaded += len(new_ids)
+            if self._lexical_loaded:
+                for doc_id in new_ids:
+                    self.lexical.add(doc_id, candidates[doc_id].page_content, candidates[doc_id].metadata)
+            return new_ids
         except Exception as e:
             logger.error(f"Error uploading data to RAG: {str(e)}")
             raise
 
-async def store_information(rag: RAG, info: str):
+    def _load_lexical(self):
+        if self._lexical_loaded:
+            return
+        if self.vector_store_type == "numpy":
+            stored = zip(self.vectorstore.texts, self.vectorstore.metadatas)
+        else:
+            result = self.vectorstore.get(include=["documents", "metadatas"])
+            stored = zip(result["documents"], result["metadatas"])
+        for text, metadata in stored:
+            self.lexical.add(self.document_id(text), text, metadata or {})
+        self._lexical_loaded = True
+
+    def _lexical_document(self, doc_id: str) -> 'Document':
+        from langchain_core.documents import Document
+        return Document(page_content=self.lexical.texts[doc_id], metadata=self.lexical.metadatas[doc_id])
+
+    async def _embed_query(self, query: str) -> List[float]:
+        vector = self._query_embeddings.get(query)
+        if vector is not None:
+            self._query_embeddings.move_to_end(query)
+            self.query_embedding_hits += 1
+            return vector
+        vector = await self.embeddings.aembed_query(query)
+        self._query_embeddings[query] = vector
+        if len(self._query_embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return vector
+
+    def _record_retrieval(self, path: str, start: float):
+        self.retrieval_latency.setdefault(path, deque(maxlen=1000)).append(time.perf_counter() - start)
+
+    @traced()
+    async def search(self, query: str, k: int = 4, mode: Optional[str] = None,
+                     filter: Optional[Dict[str, Any]] = None) -> List['Document']:
+        mode = mode or self.retrieval_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        start = time.perf_counter()
+        hits = []
+        if mode != "vector":
+            self._load_lexical()
+            hits = self.lexical.search(query, k, filter)
+            self._record_retrieval("lexical", start)
+            # Exact lookups (task ids, file or agent names) skip the embedding round-trip
+            if mode == "lexical" or self.lexical.is_confident(query, hits):
+                self.answered_by["lexical"] = self.answered_by.get("lexical", 0) + 1
+                return [self._lexical_document(doc_id) for doc_id, _ in hits]
+
+        vector_start = time.perf_counter()
+        embedding = await self._embed_query(query)
+        kwargs = {"filter": filter} if filter else {}
+        docs = await self.vectorstore.asimilarity_search_by_vector(embedding, k, **kwargs)
+        self._record_retrieval("vector", vector_start)
+        if mode == "vector":
+            self.answered_by["vector"] = self.answered_by.get("vector", 0) + 1
+            return docs
+
+        by_id = {self.document_id(doc.page_content): doc for doc in docs}
+        vector_ranking = list(by_id)
+        for doc_id, _ in hits:
+            by_id.setdefault(doc_id, self._lexical_document(doc_id))
+        fused = reciprocal_rank_fusion([[doc_id for doc_id, _ in hits], vector_ranking])
+        self._record_retrieval("hybrid", start)
+        self.answered_by["hybrid"] = self.answered_by.get("hybrid", 0) + 1
+        return [by_id[doc_id] for doc_id in fused[:k]]
+
+    def retrieval_stats(self) -> Dict[str, Any]:
+        latency = {
+            path: {"count": len(values), "p50_ms": percentile(list(values), 50) * 1000,
+                   "p95_ms": percentile(list(values), 95) * 1000}
+            for path, values in self.retrieval_latency.items()
+        }
+        return {
+            "latency": latency,
+            "answered_by": dict(self.answered_by),
+            "query_embedding_hits": self.query_embedding_hits,
+            "lexical_documents": len(self.lexical),
+        }
+
+async def store_information(rag: RAG, info: str, wait: bool = True, metadata: Optional[Dict[str, Any]] = None):
     try:
-        await rag.upload_data([info])
+        metadatas = [metadata] if metadata else None
+        if wait:
+            await rag.upload_data([info], metadatas)
+        else:
+            rag.enqueue([info], metadatas)
     except Exception as e:
         logger.error(f"Error storing information: {str(e)}")
         raise
 
-async def get_knowledge(rag: RAG, query: str) -> str:
+async def get_knowledge(rag: RAG, query: str, consistent: bool = False,
+                        filter: Optional[Dict[str, Any]] = None, mode: Optional[str] = None) -> str:
     try:
-        docs = await rag.vectorstore.asimilarity_search(query)
+        if consistent:
+            # Read-your-writes: make queued uploads visible before searching
+            await rag.flush()
+        docs = await rag.search(query, mode=mode, filter=filter)
         return "\n".join([doc.page_content for doc in docs])
     except Exception as e:
         logger.error(f"Error retrieving knowledge: {str(e)}")
@@ -0,0 +1,276 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, TypeVar, TYPE_CHECKING
+from concurrency.tracing import traced
+import logging
+
+if TYPE_CHECKING:
+    from tools.rag_utils import RAG
+    from tools.web_search import WebSearch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_CONCURRENCY = 8
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_PAGE_BYTES = 1_000_000
+DEFAULT_MAX_CHUNKS_PER_PAGE = 20
+DEFAULT_SEEN_SIZE = 10_000
+MIN_LINE_CHARS = 30
+
+# Dropped before extraction: never part of a page's prose
+BOILERPLATE_TAGS = ("script", "style", "noscript", "svg", "nav", "header", "footer", "form", "aside", "iframe")
+BLOCK_TAGS = ("p", "div", "section", "article", "main", "li", "pre", "blockquote", "td", "th", "br",
+              "h1", "h2", "h3", "h4", "h5", "h6", "dd", "dt", "figcaption")
+
+T = TypeVar("T")
+R = TypeVar("R")
+_DONE = object()
+
+async def concurrent_map(source: AsyncIterator[T], function: Callable[[T], Awaitable[Optional[R]]],
+                         concurrency: int, queue_size: int = DEFAULT_QUEUE_SIZE) -> AsyncIterator[R]:
+    """Apply function to every item of source with up to concurrency calls in flight.
+
+    Results are yielded as they complete; None results are dropped. Both queues
+    are bounded, so a slow consumer stops the workers, and the workers stop
+    pulling from source, instead of results piling up in memory. Closing the
+    generator early cancels the workers.
+    """
+    inbox: asyncio.Queue = asyncio.Queue(queue_size)
+    outbox: asyncio.Queue = asyncio.Queue(queue_size)
+    source_error: List[BaseException] = []
+
+    async def feed():
+        try:
+            async for item in source:
+                await inbox.put(item)
+        except Exception as e:
+            source_error.append(e)
+        for _ in range(concurrency):
+            await inbox.put(_DONE)
+
+    async def work():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                break
+            try:
+                result = await function(item)
+            except Exception as e:
+                logger.error(f"Error in pipeline stage {getattr(function, '__name__', function)}: {str(e)}")
+                continue
+            if result is not None:
+                await outbox.put(result)
+        await outbox.put(_DONE)
+
+    tasks = [asyncio.create_task(feed())] + [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            result = await outbox.get()
+            if result is _DONE:
+                finished += 1
+                continue
+            yield result
+        if source_error:
+            raise source_error[0]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def batched(source: AsyncIterator[T], batch_size: int) -> AsyncIterator[List[T]]:
+    batch: List[T] = []
+    async for item in source:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def extract_text(html: str) -> str:
+    """Readable text of an HTML page: one paragraph per block element, boilerplate removed."""
+    from lxml import html as lxml_html
+    from lxml.etree import ParserError
+
+    if not html.strip():
+        return ""
+    try:
+        document = lxml_html.fromstring(html)
+    except (ParserError, ValueError):
+        return ""
+    for element in list(document.iter(*BOILERPLATE_TAGS)):
+        element.drop_tree()
+    # Paragraph breaks after block elements, so the splitter can cut on them
+    for element in document.iter(*BLOCK_TAGS):
+        element.tail = "\n\n" + (element.tail or "")
+    paragraphs = []
+    for block in document.text_content().split("\n\n"):
+        line = " ".join(block.split())
+        # Menus, buttons and bylines are short; keeping them only adds noise to retrieval
+        if len(line) >= MIN_LINE_CHARS:
+            paragraphs.append(line)
+    return "\n\n".join(paragraphs)
+
+class SearchIngestor:
+    """Streams web search results into a RAG as deduplicated, embedded chunks.
+
+    search results -> fetch (fetch_concurrency pages at once) -> extract text ->
+    dedupe by content hash -> chunk -> batch of batch_size chunks -> upload.
+    Stages are async generators joined by bounded queues, so at most a few
+    queues' worth of pages and one batch of chunks are held at a time however
+    many results a search returns, and embedding one batch overlaps with
+    fetching the next pages. Once every batch holding a page's chunks is
+    uploaded, its URL and text hash are remembered (up to seen_size of each)
+    and later searches skip them; a page with a failed batch is retried. A
+    result whose page can't be fetched or has no text is ingested as its title
+    and snippet instead, and its URL is tried again by later searches.
+    """
+
+    def __init__(self, rag: 'RAG', web_search: Callable[[], 'WebSearch'],
+                 fetch_concurrency: Optional[int] = None, queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None, max_page_bytes: Optional[int] = None,
+                 max_chunks_per_page: Optional[int] = None, seen_size: int = DEFAULT_SEEN_SIZE):
+        self.rag = rag
+        # A factory, so the HTTP client is only built once a search actually runs
+        self.web_search = web_search
+        self.fetch_concurrency = fetch_concurrency or int(os.getenv("SEARCH_INGEST_FETCH_CONCURRENCY", DEFAULT_FETCH_CONCURRENCY))
+        self.queue_size = queue_size or int(os.getenv("SEARCH_INGEST_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        self.batch_size = batch_size or int(os.getenv("SEARCH_INGEST_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        self.max_page_bytes = max_page_bytes or int(os.getenv("SEARCH_INGEST_MAX_PAGE_BYTES", DEFAULT_MAX_PAGE_BYTES))
+        self.max_chunks_per_page = max_chunks_per_page or int(
+            os.getenv("SEARCH_INGEST_MAX_CHUNKS_PER_PAGE", DEFAULT_MAX_CHUNKS_PER_PAGE))
+        self.seen_size = seen_size
+        self.seen_urls: 'OrderedDict[str, None]' = OrderedDict()
+        self.seen_pages: 'OrderedDict[str, None]' = OrderedDict()
+        self.searches = 0
+        self.pages_fetched = 0
+        self.fetch_failures = 0
+        self.snippet_fallbacks = 0
+        self.skipped_urls = 0
+        self.duplicate_pages = 0
+        self.chunks = 0
+        self.batches = 0
+        self.failed_batches = 0
+
+    def _remember(self, seen: 'OrderedDict[str, None]', key: str) -> bool:
+        """Record key; False if it was already there."""
+        if key in seen:
+            seen.move_to_end(key)
+            return False
+        seen[key] = None
+        while len(seen) > self.seen_size:
+            seen.popitem(last=False)
+        return True
+
+    async def _fetch(self, result: Dict[str, str]) -> Optional[Dict[str, str]]:
+        url = result["url"]
+        text = ""
+        try:
+            html = await self.web_search().fetch(url, max_bytes=self.max_page_bytes)
+            self.pages_fetched += 1
+            # Parsing is CPU work; off the loop so it doesn't stall the other fetches
+            text = await asyncio.to_thread(extract_text, html)
+        except Exception as e:
+            self.fetch_failures += 1
+            logger.warning(f"Could not fetch {url}: {str(e)}")
+        read = bool(text)
+        if not read:
+            text = "\n\n".join(part for part in (result.get("title"), result.get("snippet")) if part)
+            if not text:
+                return None
+            self.snippet_fallbacks += 1
+        return {"url": url, "title": result.get("title", ""), "text": text, "read": read}
+
+    def _learned(self, page: Dict[str, Any]):
+        self._remember(self.seen_pages, page["hash"])
+        # A snippet stand-in doesn't count; the page itself is tried again next time
+        if page["read"]:
+            self._remember(self.seen_urls, page["url"])
+
+    async def _new_results(self, results: List[Dict[str, str]]) -> AsyncIterator[Dict[str, str]]:
+        # Only checked here; URLs are recorded once their pages are uploaded
+        queued = set()
+        for result in results:
+            url = result["url"]
+            if url in self.seen_urls or url in queued:
+                self.skipped_urls += 1
+                continue
+            queued.add(url)
+            yield result
+
+    async def _unique_pages(self, pages: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        # Mirrors and syndicated copies share a body, so pages are also deduplicated by a hash of their text
+        queued = set()
+        async for page in pages:
+            page["hash"] = self.rag.document_id(page["text"])
+            if page["hash"] in self.seen_pages or page["hash"] in queued:
+                self.duplicate_pages += 1
+                continue
+            queued.add(page["hash"])
+            yield page
+
+    async def _chunks(self, pages: AsyncIterator[Dict[str, Any]], query: str) -> AsyncIterator[Dict[str, Any]]:
+        async for page in pages:
+            # Same splitter as upload_data, so it passes these chunks through unchanged
+            pieces = self.rag.text_splitter.split_text(page["text"])[:self.max_chunks_per_page]
+            for i, piece in enumerate(pieces):
+                yield {"text": piece, "metadata": {"type": "web", "url": page["url"], "title": page["title"], "query": query},
+                       "page": page, "last": i == len(pieces) - 1}
+
+    async def ingest(self, results: List[Dict[str, str]], query: str) -> Dict[str, Any]:
+        """Run search results through the pipeline into the RAG; returns what was learned."""
+        start = time.perf_counter()
+        chunks = new_chunks = batches = 0
+        pages = concurrent_map(self._new_results(results), self._fetch, self.fetch_concurrency, self.queue_size)
+        async for batch in batched(self._chunks(self._unique_pages(pages), query), self.batch_size):
+            chunks += len(batch)
+            batches += 1
+            try:
+                # Counted from this upload's own ids; other swarms may be uploading to the same RAG
+                new_ids = await self.rag.upload_data([chunk["text"] for chunk in batch], [chunk["metadata"] for chunk in batch])
+                new_chunks += len(new_ids)
+            except Exception as e:
+                # One bad batch shouldn't lose the rest of the pages; its own pages stay unseen for a retry
+                self.failed_batches += 1
+                logger.error(f"Error ingesting web results for {query!r}: {str(e)}")
+                for chunk in batch:
+                    chunk["page"]["failed"] = True
+                continue
+            # Batches upload in order, so a page is in once the batch with its last chunk is
+            for chunk in batch:
+                if chunk["last"] and not chunk["page"].get("failed"):
+                    self._learned(chunk["page"])
+        self.chunks += chunks
+        self.batches += batches
+        return {
+            "chunks": chunks,
+            "new_chunks": new_chunks,
+            "batches": batches,
+            "elapsed_s": time.perf_counter() - start,
+        }
+
+    @traced("SearchIngestor.search_and_learn")
+    async def search_and_learn(self, query: str, max_results: int = 10) -> Dict[str, Any]:
+        """Search the web, return the results and ingest the pages behind them into the RAG."""
+        self.searches += 1
+        results = await self.web_search().search(query, max_results)
+        learned = await self.ingest(results, query)
+        logger.info(f"Learned {learned['new_chunks']} new chunks from {len(results)} results for {query!r}")
+        return {"results": results, "learned": learned}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "searches": self.searches,
+            "pages_fetched": self.pages_fetched,
+            "fetch_failures": self.fetch_failures,
+            "snippet_fallbacks": self.snippet_fallbacks,
+            "skipped_urls": self.skipped_urls,
+            "duplicate_pages": self.duplicate_pages,
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+        }
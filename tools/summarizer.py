@@ -0,0 +1,110 @@
+import asyncio
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from tools.message_store import MessageRecord
+from concurrency.metrics import call_scope
+from concurrency.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 20
+DEFAULT_FANOUT = 4
+
+Summarize = Callable[[str], Awaitable[str]]
+
+class RollingSummarizer:
+    """Incrementally summarizes a message stream into a tree of cached summaries.
+
+    Every chunk_size messages are summarized into a level-0 summary; whenever a
+    level holds fanout summaries they are merged into one summary a level up, like
+    carrying in a counter. All LLM work runs on a background worker, one step at a
+    time, so the checkpoint (seq of the last summarized message) only moves
+    forward. A briefing is the surviving summaries plus the raw messages after
+    the checkpoint.
+    """
+
+    def __init__(self, summarize: Summarize, chunk_size: int = DEFAULT_CHUNK_SIZE, fanout: int = DEFAULT_FANOUT):
+        self.summarize = summarize
+        self.chunk_size = chunk_size
+        self.fanout = fanout
+        self.levels: List[List[str]] = []
+        self.unsummarized: List[MessageRecord] = []
+        self.checkpoint = -1
+        self.chunk_summaries = 0
+        self.merges = 0
+        self.failures = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def add(self, record: MessageRecord):
+        self.unsummarized.append(record)
+        if len(self.unsummarized) >= self.chunk_size:
+            if self._worker is None or self._worker.done():
+                # Made together so both belong to the running loop, also after aclose() and a new asyncio.run
+                self._wakeup = asyncio.Event()
+                self._worker = asyncio.get_running_loop().create_task(self._run())
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                # Not on behalf of whichever agent's message happened to start the worker
+                with call_scope(phase="summarize", agent=None, task_id=None):
+                    await self._drain()
+            except Exception as e:
+                # Unsummarized messages stay raw and are retried on the next chunk
+                self.failures += 1
+                logger.error(f"Error updating rolling summary: {str(e)}")
+
+    @traced()
+    async def _drain(self):
+        while len(self.unsummarized) >= self.chunk_size:
+            chunk = self.unsummarized[:self.chunk_size]
+            lines = "\n".join(f"{r.sender} to {r.receiver}: {r.message}" for r in chunk)
+            summary = await self.summarize(
+                "Summarize the following agent messages, keeping decisions, task outcomes, file names "
+                f"and open questions. Limit the summary to 200 words.\n\n{lines}")
+            del self.unsummarized[:self.chunk_size]
+            self.checkpoint = chunk[-1].seq
+            self.chunk_summaries += 1
+            await self._push(0, summary)
+
+    async def _push(self, level: int, summary: str):
+        while len(self.levels) <= level:
+            self.levels.append([])
+        self.levels[level].append(summary)
+        if len(self.levels[level]) >= self.fanout:
+            parts = "\n\n".join(self.levels[level])
+            merged = await self.summarize(
+                "Merge these consecutive summaries of an agent conversation into one summary, keeping "
+                f"decisions, task outcomes, file names and open questions. Limit it to 300 words.\n\n{parts}")
+            self.levels[level] = []
+            self.merges += 1
+            await self._push(level + 1, merged)
+
+    def briefing_entries(self) -> List[Dict[str, Any]]:
+        # Highest levels cover the oldest messages, so emit them first
+        entries = [{"summary": summary} for level in reversed(self.levels) for summary in level]
+        entries.extend(record.to_dict() for record in self.unsummarized)
+        return entries
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "checkpoint": self.checkpoint,
+            "unsummarized": len(self.unsummarized),
+            "summaries": sum(len(level) for level in self.levels),
+            "chunk_summaries": self.chunk_summaries,
+            "merges": self.merges,
+            "failures": self.failures,
+        }
+
+    async def aclose(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import json
+import uuid
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Tuple, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+INDEX_FILE = "index.json"
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force cosine search over a contiguous float32 matrix.
+
+    Rows are L2-normalised on insert, so top-k is one matrix-vector product plus
+    argpartition. On disk the store is append-only: raw vectors in vectors.f32
+    (memory-mapped on load) and one JSON record per row in records.jsonl.
+    Metadata filters are exact matches (or membership, for list values) served
+    from an inverted index of scalar metadata fields.
+    """
+
+    def __init__(self, embedding: Embeddings, persist_directory: Optional[str] = None):
+        self.embedding = embedding
+        self.persist_directory = persist_directory
+        self.dim: Optional[int] = None
+        self._lock = threading.Lock()
+        # Rows loaded from disk stay memory-mapped; new rows go to a growable tail
+        self._base = np.zeros((0, 0), dtype=np.float32)
+        self._tail = np.zeros((0, 0), dtype=np.float32)
+        self._tail_len = 0
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._field_index: Dict[str, Dict[Any, List[int]]] = {}
+        if persist_directory:
+            os.makedirs(persist_directory, exist_ok=True)
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _load(self):
+        index_path = self._path(INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        with open(index_path) as f:
+            self.dim = json.load(f)["dim"]
+        records = []
+        record_ends = []
+        if os.path.exists(self._path(RECORDS_FILE)):
+            with open(self._path(RECORDS_FILE), 'rb') as f:
+                end = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated record")
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Torn final line from an interrupted append
+                        break
+                    end += len(line)
+                    record_ends.append(end)
+        vector_bytes = os.path.getsize(self._path(VECTORS_FILE)) if os.path.exists(self._path(VECTORS_FILE)) else 0
+        count = min(len(records), vector_bytes // (self.dim * 4))
+        # Rows are matched to vectors by position, so both files are cut back to the
+        # rows they agree on before anything is appended after them
+        self._truncate(VECTORS_FILE, count * self.dim * 4)
+        self._truncate(RECORDS_FILE, record_ends[count - 1] if count else 0)
+        if count:
+            self._base = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode='r', shape=(count, self.dim))
+        else:
+            self._base = np.zeros((0, self.dim), dtype=np.float32)
+        self._tail = np.zeros((0, self.dim), dtype=np.float32)
+        for record in records[:count]:
+            self._index_row(record["id"], record["text"], record["metadata"])
+        logger.info(f"Loaded {count} vectors from {self.persist_directory}")
+
+    def _truncate(self, name: str, size: int):
+        path = self._path(name)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            logger.warning(f"Truncating {os.path.getsize(path) - size} bytes of partial writes from {path}")
+            os.truncate(path, size)
+
+    def _persist(self, vectors: np.ndarray, records: List[Dict[str, Any]]):
+        sizes = {name: os.path.getsize(self._path(name)) if os.path.exists(self._path(name)) else 0
+                 for name in (VECTORS_FILE, RECORDS_FILE)}
+        try:
+            with open(self._path(VECTORS_FILE), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._path(RECORDS_FILE), 'a') as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+        except BaseException:
+            # Roll both files back so later appends stay row-aligned; a crash is fixed up by _load
+            for name, size in sizes.items():
+                self._truncate(name, size)
+            raise
+
+    def _index_row(self, doc_id: str, text: str, metadata: Dict[str, Any]):
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        self.texts.append(text)
+        self.metadatas.append(metadata)
+        self._rows[doc_id] = row
+        for key, value in metadata.items():
+            if isinstance(value, (str, int, float, bool)):
+                self._field_index.setdefault(key, {}).setdefault(value, []).append(row)
+
+    def _append_vectors(self, vectors: np.ndarray):
+        needed = self._tail_len + len(vectors)
+        if needed > len(self._tail):
+            grown = np.zeros((max(needed, 2 * len(self._tail), 64), self.dim), dtype=np.float32)
+            grown[:self._tail_len] = self._tail[:self._tail_len]
+            self._tail = grown
+        self._tail[self._tail_len:needed] = vectors
+        self._tail_len = needed
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = [dict(m or {}) for m in metadatas] if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = self._normalize(np.asarray(self.embedding.embed_documents(texts), dtype=np.float32))
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._base = np.zeros((0, self.dim), dtype=np.float32)
+                self._tail = np.zeros((0, self.dim), dtype=np.float32)
+                if self.persist_directory:
+                    with open(self._path(INDEX_FILE), 'w') as f:
+                        json.dump({"dim": self.dim}, f)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+
+            keep = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+            if len(keep) < len(ids):
+                vectors = vectors[keep]
+            if self.persist_directory and keep:
+                self._persist(vectors, [{"id": ids[i], "text": texts[i], "metadata": metadatas[i]} for i in keep])
+            self._append_vectors(vectors)
+            for i in keep:
+                self._index_row(ids[i], texts[i], metadatas[i])
+        return ids
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+        return [Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row]) for row in rows]
+
+    def _filter_rows(self, filter: Dict[str, Any]) -> Optional[np.ndarray]:
+        rows: Optional[Set[int]] = None
+        for key, wanted in filter.items():
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            index = self._field_index.get(key, {})
+            matched = set()
+            for value in values:
+                matched.update(index.get(value, ()))
+            rows = matched if rows is None else rows & matched
+            if not rows:
+                return np.zeros(0, dtype=np.int64)
+        return None if rows is None else np.fromiter(sorted(rows), dtype=np.int64)
+
+    def _scores(self, query: np.ndarray, filter: Optional[Dict[str, Any]]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        with self._lock:
+            # Snapshot under the writer lock so rows and ids stay aligned
+            base, tail = self._base, self._tail[:self._tail_len]
+            rows = self._filter_rows(filter) if filter else None
+        if rows is None:
+            return np.concatenate([base @ query, tail @ query]), None
+        base_rows = rows[rows < len(base)]
+        tail_rows = rows[rows >= len(base)] - len(base)
+        return np.concatenate([base[base_rows] @ query, tail[tail_rows] @ query]), rows
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        if not self.ids:
+            return []
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        scores, rows = self._scores(query, filter)
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for position in top:
+            row = int(rows[position]) if rows is not None else int(position)
+            doc = Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row])
+            results.append((doc, float(scores[position])))
+        return results
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                          **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_directory: Optional[str] = None,
+                   **kwargs: Any) -> 'NumpyVectorStore':
+        store = cls(embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
\ No newline at end of file
@@ -1,45 +1,253 @@
-import scrapy
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-from typing import List, Dict
+import os
+import time
 import asyncio
-from urllib.parse import quote_plus
-
-class WebSearchSpider(scrapy.Spider):
-    name = 'web_search_spider'
-    
-    def __init__(self, query: str, *args, **kwargs):
-        super(WebSearchSpider, self).__init__(*args, **kwargs)
-        self.start_urls = [f'https://www.google.com/search?q={quote_plus(query)}']
-        self.results = []
-
-    def parse(self, response):
-        # Extract search result snippets
-        for result in response.css('div.g'):
-            title = result.css('h3.r a::text').get()
-            snippet = result.css('div.s::text').get()
-            if title and snippet:
-                self.results.append({
-                    'title': title,
-                    'snippet': snippet
-                })
-
-        # Follow the "Next" page link if it exists
-        next_page = response.css('div#foot table#nav td.b a::attr(href)').get()
-        if next_page:
-            yield response.follow(next_page, self.parse)
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Tuple, AsyncIterator
+from urllib.parse import quote_plus, urlsplit, urljoin, parse_qs
+import httpx
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from concurrency.single_flight import SingleFlight
+from concurrency.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENGINE = "duckduckgo"
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_PER_HOST_LIMIT = 2
+DEFAULT_HOST_INTERVAL = 0.25
+DEFAULT_TIMEOUT = 15.0
+DEFAULT_CACHE_TTL = 3600.0
+DEFAULT_CACHE_SIZE = 512
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; swarm-web-search/1.0)"
+TEXT_CONTENT_TYPES = ("text/", "application/xhtml", "application/xml")
+
+# Turns a results page (HTML and its URL) into [{"title", "url", "snippet"}]
+ResultParser = Callable[[str, str], List[Dict[str, str]]]
+
+# Selectors are compiled to XPath once; compiling them per page would dominate parse time
+_DDG_RESULT = CSSSelector("div.result")
+_DDG_LINK = CSSSelector("a.result__a")
+_DDG_SNIPPET = CSSSelector(".result__snippet")
+_GOOGLE_RESULT = CSSSelector("div.g")
+_GOOGLE_TITLE = CSSSelector("h3")
+_GOOGLE_LINK = CSSSelector("a[href]")
+_GOOGLE_SNIPPET = CSSSelector("div.VwiC3b, div.s")
+
+def _text(elements: List[Any]) -> str:
+    return " ".join(" ".join(text for element in elements for text in element.itertext()).split())
+
+def _document(html: str):
+    return lxml_html.fromstring(html) if html.strip() else None
+
+def parse_duckduckgo(html: str, base_url: str) -> List[Dict[str, str]]:
+    document = _document(html)
+    if document is None:
+        return []
+    results = []
+    for result in _DDG_RESULT(document):
+        links = _DDG_LINK(result)
+        if not links:
+            continue
+        url = links[0].get("href", "")
+        # Result links go through a redirect that carries the target in uddg
+        target = parse_qs(urlsplit(url).query).get("uddg")
+        results.append({
+            "title": _text(links[:1]),
+            "url": target[0] if target else urljoin(base_url, url),
+            "snippet": _text(_DDG_SNIPPET(result)),
+        })
+    return [r for r in results if r["title"] and r["url"]]
+
+def parse_google(html: str, base_url: str) -> List[Dict[str, str]]:
+    document = _document(html)
+    if document is None:
+        return []
+    results = []
+    for result in _GOOGLE_RESULT(document):
+        links = _GOOGLE_LINK(result)
+        url = links[0].get("href", "") if links else ""
+        # Plain-HTML result pages wrap targets as /url?q=<target>
+        target = parse_qs(urlsplit(url).query).get("q") if url.startswith("/url?") else None
+        results.append({
+            "title": _text(_GOOGLE_TITLE(result)[:1]),
+            "url": target[0] if target else urljoin(base_url, url),
+            "snippet": _text(_GOOGLE_SNIPPET(result)),
+        })
+    return [r for r in results if r["title"] and r["snippet"]]
+
+# name -> (URL template with {query} and {num}, parser)
+SEARCH_ENGINES: Dict[str, Tuple[str, ResultParser]] = {
+    "duckduckgo": ("https://html.duckduckgo.com/html/?q={query}", parse_duckduckgo),
+    "google": ("https://www.google.com/search?q={query}&num={num}", parse_google),
+}
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
 
 class WebSearch:
-    def __init__(self):
-        self.process = CrawlerProcess(get_project_settings())
+    """Async web search over one pooled HTTP client.
+
+    Any number of searches and page fetches run concurrently, but each host sees
+    at most per_host_limit requests at a time, spaced host_interval seconds apart.
+    Results are cached for cache_ttl seconds under the normalized query, and
+    identical searches in flight share one request. The results page comes from
+    url_template and is read by parser, so another engine (or a local stand-in
+    server in tests) is a matter of passing both.
+    """
+
+    def __init__(self, engine: Optional[str] = None, url_template: Optional[str] = None,
+                 parser: Optional[ResultParser] = None, max_connections: Optional[int] = None,
+                 per_host_limit: Optional[int] = None, host_interval: Optional[float] = None,
+                 timeout: Optional[float] = None, cache_ttl: Optional[float] = None,
+                 cache_size: Optional[int] = None, user_agent: Optional[str] = None):
+        engine = engine or os.getenv("WEB_SEARCH_ENGINE", DEFAULT_ENGINE)
+        if engine not in SEARCH_ENGINES and not (url_template and parser):
+            raise ValueError(f"Unknown search engine: {engine}")
+        default_template, default_parser = SEARCH_ENGINES.get(engine, (None, None))
+        self.url_template = url_template or os.getenv("WEB_SEARCH_URL") or default_template
+        self.parser = parser or default_parser
+        self.max_connections = max_connections or int(os.getenv("WEB_SEARCH_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        self.per_host_limit = per_host_limit or int(os.getenv("WEB_SEARCH_PER_HOST", DEFAULT_PER_HOST_LIMIT))
+        self.host_interval = host_interval if host_interval is not None else float(
+            os.getenv("WEB_SEARCH_HOST_INTERVAL", DEFAULT_HOST_INTERVAL))
+        self.timeout = timeout or float(os.getenv("WEB_SEARCH_TIMEOUT", DEFAULT_TIMEOUT))
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("WEB_SEARCH_CACHE_TTL", DEFAULT_CACHE_TTL))
+        self.cache_size = cache_size or int(os.getenv("WEB_SEARCH_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+        self.user_agent = user_agent or DEFAULT_USER_AGENT
+        self.cache: 'OrderedDict[str, Tuple[float, List[Dict[str, str]]]]' = OrderedDict()
+        self.single_flight = SingleFlight()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_next_start: Dict[str, float] = {}
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Built on first request so the pool belongs to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout),
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True,
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        host = urlsplit(url).netloc
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        async with slots:
+            if self.host_interval:
+                # Reserve the next start slot for this host before sleeping so waiters queue up behind it
+                now = time.monotonic()
+                start = max(now, self._host_next_start.get(host, 0.0))
+                self._host_next_start[host] = start + self.host_interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+            self.requests += 1
+            try:
+                yield
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+
+    async def _get(self, url: str) -> httpx.Response:
+        async with self._host_slot(url):
+            response = await self.client.get(url)
+            response.raise_for_status()
+        return response
+
+    async def fetch(self, url: str, max_bytes: Optional[int] = None) -> str:
+        """Body of a page, through the same pool and per-host limits as searches.
+
+        With max_bytes the body is streamed and cut off at that size, and pages
+        that aren't text (PDFs, images, archives) come back empty unread.
+        """
+        if max_bytes is None:
+            return (await self._get(url)).text
+        body = bytearray()
+        async with self._host_slot(url):
+            async with self.client.stream("GET", url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "text/html")
+                if not content_type.startswith(TEXT_CONTENT_TYPES):
+                    return ""
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= max_bytes:
+                        break
+        return body[:max_bytes].decode(response.encoding or "utf-8", errors="replace")
+
+    def _cached(self, key: str) -> Optional[List[Dict[str, str]]]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if self.cache_ttl and time.monotonic() - entry[0] > self.cache_ttl:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return entry[1]
+
+    def _remember(self, key: str, results: List[Dict[str, str]]):
+        self.cache[key] = (time.monotonic(), results)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    @traced("WebSearch.search")
     async def search(self, query: str, max_results: int = 10) -> List[Dict[str, str]]:
-        spider = WebSearchSpider(query=query)
-        self.process.crawl(spider)
-        
-        # Run the crawler in a separate thread
-        await asyncio.get_event_loop().run_in_executor(None, self.process.start)
-        
-        # Return the results, limited to max_results
-        print('Scrapping the web...')
-        return spider.results[:max_results]
+        normalized = normalize_query(query)
+        # Cached per page of results, so any max_results up to the page size is a hit
+        key = f"{self.url_template}\n{normalized}"
+        results = self._cached(key)
+        if results is not None:
+            self.cache_hits += 1
+            return results[:max_results]
+        self.cache_misses += 1
+        results = await self.single_flight.do(key, lambda: self._search(key, normalized, max_results))
+        return results[:max_results]
+
+    async def _search(self, key: str, normalized: str, max_results: int) -> List[Dict[str, str]]:
+        url = self.url_template.format(query=quote_plus(normalized), num=max(max_results, 10))
+        response = await self._get(url)
+        results = self.parser(response.text, str(response.url))
+        self._remember(key, results)
+        return results
+
+    async def search_many(self, queries: List[str], max_results: int = 10) -> Dict[str, List[Dict[str, str]]]:
+        """Run several searches concurrently; a failed query maps to no results."""
+        outcomes = await asyncio.gather(*[self.search(query, max_results) for query in queries], return_exceptions=True)
+        results = {}
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Web search failed for {query!r}: {str(outcome)}")
+                outcome = []
+            results[query] = outcome
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "cached_queries": len(self.cache),
+            "coalesced": self.single_flight.coalesced,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
\ No newline at end of file